@@ -14,6 +14,9 @@ const today = new Date();
 let currentMonth = today.getMonth();
 let currentYear = today.getFullYear();
 let timeEntries = [];
+let currentCalendarBundle = null;
+// Monatssummen enthalten vorgemerkte Offline-Änderungen, deren Provision noch fehlt
+let monthSummaryPending = false;
 let employees = [];
 let revenueEntries = [];
 let currentRevenueMonth = currentMonth;
@@ -128,6 +131,7 @@ function applyRoleRestrictions() {
 function resetAppData() {
     currentEmployee = null;
     timeEntries = [];
+    currentCalendarBundle = null;
     employees = [];
     revenueEntries = [];
     reportsOverviewSummaries = [];
@@ -184,6 +188,8 @@ function setAuthState(authData) {
     updateAuthVisibility();
     applyRoleRestrictions();
     updateInactivityTracking();
+    updateEventStream();
+    replayOutbox();
 }
 
 function clearAuthState() {
@@ -197,6 +203,9 @@ function clearAuthState() {
     currentRevenueYear = currentYear;
     currentReportsMonth = currentMonth;
     currentReportsYear = currentYear;
+    updateEventStream();
+    // Zwischengespeicherte Daten nicht für die nächste Anmeldung am selben Gerät liegen lassen
+    clearCachedResponses();
     resetAppData();
     updateAuthVisibility();
     applyRoleRestrictions();
@@ -454,39 +463,364 @@ document.addEventListener('DOMContentLoaded', () => {
     setupAuthHandlers();
 });
 
+// Cache the app shell so the front-desk tablets start instantly
+if ('serviceWorker' in navigator) {
+    window.addEventListener('load', () => {
+        navigator.serviceWorker.register('/sw.js').catch(error => {
+            console.warn('Service Worker konnte nicht registriert werden:', error);
+        });
+    });
+}
+
 // API Functions
+const REVENUE_CALENDAR_FIELDS = ['id', 'date', 'amount', 'notes'].join(',');
+
+// Convert a columnar payload ({columns, rows}) back into a list of objects
+function rowsFromColumnar(data) {
+    const { columns, rows } = data;
+    return rows.map(row => {
+        const item = {};
+        columns.forEach((column, index) => {
+            item[column] = row[index];
+        });
+        return item;
+    });
+}
+
+function isColumnarPayload(data) {
+    return Boolean(data) && Array.isArray(data.columns) && Array.isArray(data.rows);
+}
+
 async function apiCall(endpoint, options = {}) {
     try {
-        const fetchOptions = {
-            ...options,
-            headers: withAuthHeaders({
-                'Content-Type': 'application/json',
-                ...(options.headers || {})
-            })
-        };
+        const response = await apiFetch(endpoint, options);
+        const data = await readApiResponse(response);
+        return isColumnarPayload(data) ? rowsFromColumnar(data) : data;
+    } catch (error) {
+        console.error('API call failed:', error);
+        throw error;
+    }
+}
 
-        const response = await fetch(`${API_BASE_URL}${endpoint}`, fetchOptions);
+// fetch mit Anmeldung; Netzwerkfehler werden als error.offline markiert
+async function apiFetch(endpoint, options = {}) {
+    const fetchOptions = {
+        ...options,
+        headers: withAuthHeaders({
+            'Content-Type': 'application/json',
+            ...(options.headers || {})
+        })
+    };
 
-        const data = await response.json().catch(() => ({}));
+    try {
+        return await fetch(`${API_BASE_URL}${endpoint}`, fetchOptions);
+    } catch (error) {
+        error.offline = true;
+        throw error;
+    }
+}
 
-        if (response.status === 401) {
-            handleUnauthorized();
-            throw new Error(data.error || 'Authentifizierung erforderlich');
+async function readApiResponse(response) {
+    const data = await response.json().catch(() => ({}));
+
+    if (response.status === 401) {
+        handleUnauthorized();
+        throw new Error(data.error || 'Authentifizierung erforderlich');
+    }
+
+    if (response.status === 403) {
+        throw new Error(data.error || 'Keine Berechtigung');
+    }
+
+    if (!response.ok) {
+        const message = data.error || data.message || `HTTP error! status: ${response.status}`;
+        const error = new Error(message);
+        error.status = response.status;
+        throw error;
+    }
+
+    return data;
+}
+
+// Offline-Cache: Antworten (z. B. Monatsdaten des Kalenders) liegen in IndexedDB
+// und werden sofort angezeigt; der Server bestätigt sie im Hintergrund per ETag.
+// Schreibvorgänge ohne Verbindung landen in einer Warteschlange (outbox) und
+// werden in der Reihenfolge ihrer Erfassung nachgereicht.
+const OFFLINE_DB_NAME = 'zeiterfassung-offline';
+const OFFLINE_DB_VERSION = 1;
+let offlineDbPromise = null;
+let outboxReplaying = false;
+
+function openOfflineDb() {
+    if (!window.indexedDB) {
+        return Promise.resolve(null);
+    }
+    if (!offlineDbPromise) {
+        offlineDbPromise = new Promise(resolve => {
+            const request = indexedDB.open(OFFLINE_DB_NAME, OFFLINE_DB_VERSION);
+            request.onupgradeneeded = () => {
+                const db = request.result;
+                db.createObjectStore('responses', { keyPath: 'endpoint' });
+                db.createObjectStore('outbox', { keyPath: 'seq', autoIncrement: true });
+            };
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => {
+                // Ohne IndexedDB (z. B. privater Modus) einfach ohne Cache weiterarbeiten
+                console.warn('Offline-Cache nicht verfügbar:', request.error);
+                resolve(null);
+            };
+        });
+    }
+    return offlineDbPromise;
+}
+
+async function offlineStore(storeName, mode, action) {
+    const db = await openOfflineDb();
+    if (!db) {
+        return undefined;
+    }
+    return new Promise((resolve, reject) => {
+        const transaction = db.transaction(storeName, mode);
+        const request = action(transaction.objectStore(storeName));
+        transaction.oncomplete = () => resolve(request ? request.result : undefined);
+        transaction.onerror = () => reject(transaction.error);
+    });
+}
+
+function readCachedResponse(endpoint) {
+    return offlineStore('responses', 'readonly', store => store.get(endpoint)).catch(() => undefined);
+}
+
+function writeCachedResponse(endpoint, data, etag = null) {
+    return offlineStore('responses', 'readwrite', store => store.put({ endpoint, data, etag, savedAt: Date.now() }))
+        .catch(error => console.warn('Offline-Cache konnte nicht geschrieben werden:', error));
+}
+
+function clearCachedResponses() {
+    return offlineStore('responses', 'readwrite', store => store.clear()).catch(() => undefined);
+}
+
+// GET mit Cache: onData erhält zuerst den gespeicherten Stand (fromCache = true),
+// danach den Serverstand, falls er sich geändert hat. Ohne Verbindung bleibt es beim Cache.
+async function cachedApiCall(endpoint, onData) {
+    const cached = await readCachedResponse(endpoint);
+    if (cached) {
+        onData(cached.data, true);
+    }
+
+    let response;
+    try {
+        response = await apiFetch(endpoint, {
+            headers: cached?.etag ? { 'If-None-Match': cached.etag } : {}
+        });
+    } catch (error) {
+        if (cached) {
+            console.warn(`Keine Verbindung, ${endpoint} aus dem Offline-Cache angezeigt`);
+            return;
         }
+        throw error;
+    }
 
-        if (response.status === 403) {
-            throw new Error(data.error || 'Keine Berechtigung');
+    replayOutbox();
+    if (response.status === 304) {
+        return;
+    }
+    const data = await readApiResponse(response);
+    await writeCachedResponse(endpoint, data, response.headers.get('ETag'));
+    onData(data, false);
+}
+
+// Schreibvorgang senden oder ohne Verbindung vormerken; liefert {queued: true} beim Vormerken
+async function queuedApiCall(endpoint, options, label) {
+    const pending = await pendingOutboxItems();
+    if (!pending.length) {
+        try {
+            return await apiCall(endpoint, options);
+        } catch (error) {
+            if (!error.offline) {
+                throw error;
+            }
         }
+    }
 
-        if (!response.ok) {
-            const message = data.error || data.message || `HTTP error! status: ${response.status}`;
-            throw new Error(message);
+    await offlineStore('outbox', 'readwrite', store => store.add({
+        endpoint,
+        method: options.method,
+        body: options.body || null,
+        label,
+        username: currentUser?.username || null,
+        queuedAt: Date.now()
+    }));
+    showError(`Keine Verbindung: ${label} wird übertragen, sobald der Server erreichbar ist.`);
+    return { queued: true };
+}
+
+async function pendingOutboxItems() {
+    const items = await offlineStore('outbox', 'readonly', store => store.getAll()).catch(() => undefined);
+    // Vorgemerkte Änderungen gehören zur Anmeldung, unter der sie erfasst wurden
+    return (items || []).filter(item => item.username === (currentUser?.username || null));
+}
+
+// Vorgemerkte Schreibvorgänge der Reihe nach nachreichen. Konflikte (409) und
+// andere Ablehnungen werden gemeldet und verworfen, bei Netzwerkfehlern wird abgebrochen.
+async function replayOutbox() {
+    if (outboxReplaying || !isAuthenticated()) {
+        return;
+    }
+    outboxReplaying = true;
+    let replayed = 0;
+    try {
+        for (const item of await pendingOutboxItems()) {
+            try {
+                await apiCall(item.endpoint, { method: item.method, body: item.body });
+            } catch (error) {
+                if (error.offline || !isAuthenticated()) {
+                    break;
+                }
+                const reason = error.status === 409 ? 'Konflikt' : 'abgelehnt';
+                showError(`Offline erfasste Änderung (${item.label}) ${reason}: ${error.message}`);
+            }
+            await offlineStore('outbox', 'readwrite', store => store.delete(item.seq));
+            replayed += 1;
+        }
+    } finally {
+        outboxReplaying = false;
+    }
+    if (replayed) {
+        refreshCalendarAfterResync();
+    }
+}
+
+window.addEventListener('online', () => replayOutbox());
+
+// Änderungsmeldungen des Servers (Server-Sent Events über fetch, damit der
+// Authorization-Header mitgeschickt werden kann; EventSource kann das nicht)
+const EVENT_STREAM_RETRY_MS = 5000;
+let eventStreamController = null;
+let eventStreamRetryId = null;
+
+function updateEventStream() {
+    if (isAuthenticated()) {
+        startEventStream();
+    } else {
+        stopEventStream();
+    }
+}
+
+function stopEventStream() {
+    clearTimeout(eventStreamRetryId);
+    eventStreamRetryId = null;
+    if (eventStreamController) {
+        eventStreamController.abort();
+        eventStreamController = null;
+    }
+}
+
+async function startEventStream(isReconnect = false) {
+    if (eventStreamController || !window.ReadableStream) {
+        return;
+    }
+    const controller = new AbortController();
+    eventStreamController = controller;
+
+    try {
+        const response = await fetch(`${API_BASE_URL}/events`, {
+            headers: withAuthHeaders({ Accept: 'text/event-stream' }),
+            signal: controller.signal
+        });
+        if (!response.ok || !response.body) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        if (isReconnect) {
+            // Während der Unterbrechung verpasste Änderungen nachladen
+            refreshCalendarAfterResync();
         }
 
-        return data;
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+            let boundary = buffer.indexOf('\n\n');
+            while (boundary !== -1) {
+                dispatchServerEvent(buffer.slice(0, boundary));
+                buffer = buffer.slice(boundary + 2);
+                boundary = buffer.indexOf('\n\n');
+            }
+        }
     } catch (error) {
-        console.error('API call failed:', error);
-        throw error;
+        if (controller.signal.aborted) {
+            return;
+        }
+        console.warn('Änderungsmeldungen unterbrochen:', error);
+    }
+
+    if (eventStreamController === controller) {
+        eventStreamController = null;
+        if (isAuthenticated()) {
+            eventStreamRetryId = setTimeout(() => startEventStream(true), EVENT_STREAM_RETRY_MS);
+        }
+    }
+}
+
+function dispatchServerEvent(block) {
+    let type = 'message';
+    const dataLines = [];
+    block.split('\n').forEach(line => {
+        if (line.startsWith('event: ')) {
+            type = line.slice(7);
+        } else if (line.startsWith('data: ')) {
+            dataLines.push(line.slice(6));
+        }
+    });
+    if (!dataLines.length) {
+        return;
+    }
+
+    const event = JSON.parse(dataLines.join('\n'));
+    if (type === 'resync') {
+        refreshCalendarAfterResync();
+    } else if (type === 'change' && event.entity === 'time_entries') {
+        applyTimeEntryChange(event);
+    } else if (type === 'change' && event.entity === 'employees') {
+        loadEmployees();
+    }
+}
+
+function refreshCalendarAfterResync() {
+    if (currentEmployee && document.getElementById('calendarContainer')?.children.length) {
+        loadCalendar();
+    }
+}
+
+// Geänderten Eintrag in timeEntries übernehmen und nur dessen Tageszelle neu zeichnen
+function applyTimeEntryChange(event) {
+    if (!currentEmployee) {
+        return;
+    }
+    const existing = timeEntries.find(entry => entry.id === event.id);
+    const employeeId = event.row ? event.row.employee_id : existing?.employee_id;
+    if (employeeId !== currentEmployee.id) {
+        return;
+    }
+
+    const monthPrefix = `${currentYear}-${String(currentMonth + 1).padStart(2, '0')}-`;
+    const affectedDates = new Set();
+    if (existing) {
+        timeEntries = timeEntries.filter(entry => entry.id !== event.id);
+        affectedDates.add(existing.date);
+    }
+    if (event.row && event.row.date.startsWith(monthPrefix)) {
+        timeEntries.push({ ...existing, ...event.row });
+        affectedDates.add(event.row.date);
+    }
+    affectedDates.forEach(renderCalendarDay);
+    if (affectedDates.size) {
+        refreshMonthSummary();
     }
 }
 
@@ -497,22 +831,12 @@ async function loadEmployees() {
     }
     try {
         console.log('Loading employees...');
-        employees = await apiCall('/employees');
-        console.log('Employees loaded:', employees);
-        
-        const select = document.getElementById('employeeSelect');
-        select.innerHTML = '<option value="">Mitarbeiter auswählen</option>';
-        
-        employees.forEach(emp => {
-            if (emp.is_active) {
-                const option = document.createElement('option');
-                option.value = emp.id;
-                option.textContent = emp.name;
-                select.appendChild(option);
-            }
+        await cachedApiCall('/employees?format=columnar', data => {
+            employees = rowsFromColumnar(data);
+            renderEmployeeSelect();
+            renderEmployeeList();
         });
-
-        renderEmployeeList();
+        console.log('Employees loaded:', employees);
     } catch (error) {
         console.error('Error loading employees:', error);
         if (!isAuthenticated()) {
@@ -522,30 +846,68 @@ async function loadEmployees() {
     }
 }
 
+function renderEmployeeSelect() {
+    const select = document.getElementById('employeeSelect');
+    const selected = select.value;
+    select.innerHTML = '<option value="">Mitarbeiter auswählen</option>';
+
+    employees.forEach(emp => {
+        if (emp.is_active) {
+            const option = document.createElement('option');
+            option.value = emp.id;
+            option.textContent = emp.name;
+            select.appendChild(option);
+        }
+    });
+    select.value = selected;
+}
+
 // Load dashboard
 async function loadDashboard() {
     try {
         console.log('Loading dashboard...');
-        const activeEmployees = employees.filter(emp => emp.is_active).length;
-        const withCommission = employees.filter(emp => emp.is_active && emp.has_commission).length;
-        const totalHours = employees.filter(emp => emp.is_active).reduce((sum, emp) => sum + emp.contract_hours, 0);
-        
+        const stats = await apiCall('/dashboard');
+        const working = stats.staffing_today.filter(entry => entry.entry_type === 'work').length;
+        const revenueToday = stats.revenue_today;
+        const revenueLabel = revenueToday.amount === null
+            ? '–'
+            : `${Number(revenueToday.amount).toFixed(2)}€`;
+        const thresholdLabel = revenueToday.threshold === null
+            ? 'keine Schwelle'
+            : `Schwelle ${Number(revenueToday.threshold).toFixed(2)}€${revenueToday.threshold_met ? ' ✓' : ''}`;
+
         const statsGrid = document.getElementById('statsGrid');
         statsGrid.innerHTML = `
             <div class="stat-card">
-                <div class="stat-number">${activeEmployees}</div>
+                <div class="stat-number">${stats.active_employees}</div>
                 <div class="stat-label">Aktive Mitarbeiter</div>
             </div>
             <div class="stat-card">
-                <div class="stat-number">0</div>
+                <div class="stat-number">${formatHoursMinutes(stats.hours_week)}</div>
                 <div class="stat-label">Stunden diese Woche</div>
             </div>
             <div class="stat-card">
-                <div class="stat-number">${withCommission}</div>
+                <div class="stat-number">${formatHoursMinutes(stats.hours_month)}</div>
+                <div class="stat-label">Stunden diesen Monat</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-number">${Number(stats.commission_mtd).toFixed(2)}€</div>
+                <div class="stat-label">Provision im Monat</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-number">${working}</div>
+                <div class="stat-label">Heute im Dienst</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-number">${revenueLabel}</div>
+                <div class="stat-label">Umsatz heute (${thresholdLabel})</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-number">${stats.with_commission}</div>
                 <div class="stat-label">Mit Provision</div>
             </div>
             <div class="stat-card">
-                <div class="stat-number">${totalHours}</div>
+                <div class="stat-number">${stats.contract_hours_week}</div>
                 <div class="stat-label">Vertragsstunden/Woche</div>
             </div>
         `;
@@ -885,18 +1247,90 @@ async function loadCalendar() {
     updateMonthLockNotice();
 
     try {
-        // Load time entries for the month
-        timeEntries = await apiCall(`/time-entries?employee_id=${employeeId}&year=${year}&month=${month + 1}`);
-        console.log('Time entries loaded:', timeEntries);
+        // Einträge, Umsätze und Monatssummen in einem Aufruf laden, zuerst aus dem Offline-Cache
+        await cachedApiCall(calendarEndpoint(employeeId, year, month), (bundle, fromCache) => {
+            if (currentEmployee?.id != employeeId || currentMonth !== month || currentYear !== year) {
+                return; // Inzwischen wurde ein anderer Monat gewählt
+            }
+            timeEntries = bundle.entries;
+            currentEmployee = { ...currentEmployee, ...bundle.employee };
+            currentCalendarBundle = bundle;
+            console.log('Time entries loaded:', timeEntries);
+            if (!fromCache) {
+                monthSummaryPending = false;
+            }
 
-        renderCalendar();
-        renderMonthSummary();
+            renderCalendar();
+            renderMonthSummary(bundle.summary, monthSummaryPending);
+        });
     } catch (error) {
         console.error('Error loading calendar:', error);
         showError('Fehler beim Laden des Kalenders: ' + error.message);
     }
 }
 
+function calendarEndpoint(employeeId, year, month) {
+    return `/calendar/${employeeId}/${year}/${month + 1}`;
+}
+
+// Vorgemerkte Änderung sofort anzeigen und im Offline-Cache des Monats ablegen.
+// Die Monatssummen gelten als vorläufig, bis replayOutbox den Monat neu lädt.
+function applyQueuedTimeEntry(date, entry) {
+    timeEntries = timeEntries.filter(item => item.date !== date);
+    if (entry) {
+        timeEntries.push(entry);
+    }
+    renderCalendarDay(date);
+    monthSummaryPending = true;
+    refreshMonthSummary();
+}
+
+// Monatssummen aus timeEntries neu bilden, anzeigen und im Offline-Cache ablegen.
+// Der Cache-Eintrag verliert sein ETag, damit der Server ihn beim nächsten Laden ersetzt.
+function refreshMonthSummary() {
+    if (!currentCalendarBundle) {
+        return;
+    }
+    const summary = { ...currentCalendarBundle.summary, ...summarizeMonthEntries(timeEntries) };
+    currentCalendarBundle = { ...currentCalendarBundle, entries: timeEntries, summary };
+    renderMonthSummary(summary, monthSummaryPending);
+    writeCachedResponse(calendarEndpoint(currentEmployee.id, currentYear, currentMonth), currentCalendarBundle);
+}
+
+// Kennzahlen wie build_month_summary auf dem Server (Nachtschichten über Mitternacht)
+function summarizeMonthEntries(entries) {
+    const summary = {
+        total_hours: 0,
+        total_commission: 0,
+        work_days: 0,
+        vacation_days: 0,
+        sick_days: 0,
+        total_duftreise_bis_18: 0,
+        total_duftreise_ab_18: 0
+    };
+    const minutesOf = time => {
+        const [hours, minutes] = time.split(':').map(Number);
+        return hours * 60 + minutes;
+    };
+    entries.forEach(entry => {
+        if (entry.entry_type === 'work' && entry.start_time && entry.end_time) {
+            const minutes = (minutesOf(entry.end_time) - minutesOf(entry.start_time) + 1440) % 1440;
+            summary.total_hours += minutes / 60 - (entry.pause_minutes || 0) / 60;
+            summary.work_days += 1;
+        } else if (entry.entry_type === 'vacation') {
+            summary.vacation_days += 1;
+        } else if (entry.entry_type === 'sick') {
+            summary.sick_days += 1;
+        }
+        summary.total_commission += Number(entry.commission) || 0;
+        summary.total_duftreise_bis_18 += Number(entry.duftreise_bis_18) || 0;
+        summary.total_duftreise_ab_18 += Number(entry.duftreise_ab_18) || 0;
+    });
+    summary.total_hours = Math.round(summary.total_hours * 100) / 100;
+    summary.total_commission = Math.round(summary.total_commission * 100) / 100;
+    return summary;
+}
+
 function updateMonthLockNotice() {
     const notice = document.getElementById('monthLockNotice');
     if (!notice) {
@@ -944,35 +1378,7 @@ function renderCalendar() {
     const currentDate = new Date(startDate);
     for (let week = 0; week < 6; week++) {
         for (let day = 0; day < 7; day++) {
-            const isCurrentMonth = currentDate.getMonth() === currentMonth;
-            const dateStr = formatDate(currentDate);
-            const entry = timeEntries.find(e => e.date === dateStr);
-
-            let dayClass = 'calendar-day';
-            if (!isCurrentMonth) dayClass += ' other-month';
-            if (entry) dayClass += ' has-data';
-            const lockedForEmployee = isEmployeeEditingLocked(dateStr);
-            if (lockedForEmployee) dayClass += ' locked-day';
-            
-            let dayInfo = '';
-            if (entry) {
-                if (entry.entry_type === 'vacation') {
-                    dayInfo = '<div class="day-info">Urlaub</div>';
-                } else if (entry.entry_type === 'sick') {
-                    dayInfo = '<div class="day-info">Krank</div>';
-                } else if (entry.start_time && entry.end_time) {
-                    const hours = calculateHours(entry.start_time, entry.end_time, entry.pause_minutes || 0);
-                    dayInfo = `<div class="day-info">${entry.start_time}-${entry.end_time}<br>${formatHoursMinutes(hours)}</div>`;
-                }
-            }
-            
-            html += `
-                <div class="${dayClass}" onclick="onCalendarDayClick('${dateStr}')">
-                    <div class="day-number">${currentDate.getDate()}</div>
-                    ${dayInfo}
-                </div>
-            `;
-            
+            html += calendarDayHtml(currentDate);
             currentDate.setDate(currentDate.getDate() + 1);
         }
     }
@@ -981,42 +1387,65 @@ function renderCalendar() {
     container.innerHTML = html;
 }
 
-// Render month summary
-function renderMonthSummary() {
-    const summary = document.getElementById('monthSummary');
-    
-    // Calculate statistics
-    const workDays = timeEntries.filter(e => e.entry_type === 'work' && e.start_time && e.end_time).length;
-    const vacationDays = timeEntries.filter(e => e.entry_type === 'vacation').length;
-    const sickDays = timeEntries.filter(e => e.entry_type === 'sick').length;
-    
-    const totalHours = timeEntries.reduce((sum, entry) => {
-        if (entry.entry_type === 'work' && entry.start_time && entry.end_time) {
-            return sum + calculateHours(entry.start_time, entry.end_time, entry.pause_minutes || 0);
+// HTML einer Kalenderzelle; data-date erlaubt das gezielte Neuzeichnen einzelner Tage
+function calendarDayHtml(date) {
+    const isCurrentMonth = date.getMonth() === currentMonth;
+    const dateStr = formatDate(date);
+    const entry = timeEntries.find(e => e.date === dateStr);
+
+    let dayClass = 'calendar-day';
+    if (!isCurrentMonth) dayClass += ' other-month';
+    if (entry) dayClass += ' has-data';
+    const lockedForEmployee = isEmployeeEditingLocked(dateStr);
+    if (lockedForEmployee) dayClass += ' locked-day';
+
+    let dayInfo = '';
+    if (entry) {
+        if (entry.entry_type === 'vacation') {
+            dayInfo = '<div class="day-info">Urlaub</div>';
+        } else if (entry.entry_type === 'sick') {
+            dayInfo = '<div class="day-info">Krank</div>';
+        } else if (entry.start_time && entry.end_time) {
+            const hours = calculateHours(entry.start_time, entry.end_time, entry.pause_minutes || 0);
+            dayInfo = `<div class="day-info">${entry.start_time}-${entry.end_time}<br>${formatHoursMinutes(hours)}</div>`;
         }
-        return sum;
-    }, 0);
-    
-    const totalDuftreiseBis18 = timeEntries.reduce((sum, entry) => {
-        const value = Number(entry.duftreise_bis_18 ?? 0);
-        return sum + (Number.isFinite(value) ? value : 0);
-    }, 0);
+    }
+
+    return `
+        <div class="${dayClass}" data-date="${dateStr}" onclick="onCalendarDayClick('${dateStr}')">
+            <div class="day-number">${date.getDate()}</div>
+            ${dayInfo}
+        </div>
+    `;
+}
+
+// Nur die Zelle eines Tages neu zeichnen (z. B. nach einer Änderungsmeldung)
+function renderCalendarDay(dateStr) {
+    const cell = document.querySelector(`#calendarContainer .calendar-day[data-date="${dateStr}"]`);
+    if (!cell) {
+        return;
+    }
+    const [year, month, day] = dateStr.split('-').map(Number);
+    cell.outerHTML = calendarDayHtml(new Date(year, month - 1, day));
+}
 
-    const totalDuftreiseAb18 = timeEntries.reduce((sum, entry) => {
-        const value = Number(entry.duftreise_ab_18 ?? 0);
-        return sum + (Number.isFinite(value) ? value : 0);
-    }, 0);
+// Render month summary (Kennzahlen werden vom Server berechnet)
+function renderMonthSummary(monthSummary, pending = false) {
+    const summary = document.getElementById('monthSummary');
 
-    const totalProvision = timeEntries.reduce((sum, entry) => {
-        const commission = Number(entry.commission ?? 0);
-        return sum + (Number.isFinite(commission) ? commission : 0);
-    }, 0);
+    const workDays = monthSummary.work_days;
+    const vacationDays = monthSummary.vacation_days;
+    const sickDays = monthSummary.sick_days;
+    const totalDuftreiseBis18 = monthSummary.total_duftreise_bis_18;
+    const totalDuftreiseAb18 = monthSummary.total_duftreise_ab_18;
 
+    const totalHours = Number(monthSummary.total_hours ?? 0);
+    const totalProvision = Number(monthSummary.total_commission ?? 0);
     const safeTotalHours = Number.isFinite(totalHours) ? totalHours : 0;
     const safeTotalProvision = Number.isFinite(totalProvision) ? totalProvision : 0;
     
     summary.innerHTML = `
-        <div class="summary-title">Monatsübersicht ${currentEmployee.name}</div>
+        <div class="summary-title">Monatsübersicht ${currentEmployee.name}${pending ? ' (vorläufig, Provision wird nach der Übertragung aktualisiert)' : ''}</div>
         <div class="summary-grid">
             <div class="summary-item">
                 <div class="summary-value">${formatHoursMinutes(safeTotalHours)}</div>
@@ -1194,13 +1623,19 @@ async function saveEntry() {
         return;
     }
 
+    // Konflikterkennung: der Server lehnt ab, wenn sich der Eintrag inzwischen geändert hat
+    const existingEntry = timeEntries.find(entry => entry.date === date);
+    data.expected_version = existingEntry ? (existingEntry.version ?? null) : 0;
+
     try {
         if (entryId && workFieldsEmpty) {
             const shouldDelete = confirm('Alle Pflichtfelder wurden geleert. Soll der Eintrag gelöscht werden?');
             if (shouldDelete) {
-                await deleteEntryById(entryId);
+                const result = await deleteEntryById(entryId);
                 closeModal();
-                await loadCalendar();
+                if (!result.queued) {
+                    await loadCalendar();
+                }
             } else {
                 alert('Verwenden Sie zum Entfernen den Löschen-Button.');
             }
@@ -1212,21 +1647,34 @@ async function saveEntry() {
             return;
         }
 
+        const label = `Eintrag vom ${date}`;
+        let result;
         if (entryId) {
             // Update existing entry
-            await apiCall(`/time-entries/${entryId}`, {
+            result = await queuedApiCall(`/time-entries/${entryId}`, {
                 method: 'PUT',
                 body: JSON.stringify(data)
-            });
+            }, label);
         } else {
             // Create new entry
-            await apiCall('/time-entries', {
+            result = await queuedApiCall('/time-entries', {
                 method: 'POST',
                 body: JSON.stringify(data)
-            });
+            }, label);
         }
 
         closeModal();
+        if (result.queued) {
+            const { expected_version: expectedVersion, ...fields } = data;
+            applyQueuedTimeEntry(date, {
+                ...existingEntry,
+                ...fields,
+                id: existingEntry?.id ?? null,
+                // Version, die der Server nach dem Nachreichen haben wird
+                version: expectedVersion === null ? null : expectedVersion + 1
+            });
+            return;
+        }
         await loadCalendar(); // Reload calendar
     } catch (error) {
         console.error('Error saving entry:', error);
@@ -1235,9 +1683,15 @@ async function saveEntry() {
 }
 
 async function deleteEntryById(entryId) {
-    await apiCall(`/time-entries/${entryId}`, {
+    const entry = timeEntries.find(item => String(item.id) === String(entryId));
+    const query = entry?.version ? `?expected_version=${entry.version}` : '';
+    const result = await queuedApiCall(`/time-entries/${entryId}${query}`, {
         method: 'DELETE'
-    });
+    }, `Löschen des Eintrags vom ${entry?.date || entryId}`);
+    if (result.queued && entry) {
+        applyQueuedTimeEntry(entry.date, null);
+    }
+    return result;
 }
 
 async function deleteCurrentEntry() {
@@ -1260,9 +1714,11 @@ async function deleteCurrentEntry() {
     }
 
     try {
-        await deleteEntryById(entryId);
+        const result = await deleteEntryById(entryId);
         closeModal();
-        await loadCalendar();
+        if (!result.queued) {
+            await loadCalendar();
+        }
     } catch (error) {
         console.error('Error deleting entry:', error);
         alert(error.message);
@@ -1447,7 +1903,9 @@ async function loadRevenueCalendar() {
     currentRevenueYear = year;
 
     try {
-        revenueEntries = await apiCall(`/revenue?year=${year}&month=${month + 1}`);
+        revenueEntries = await apiCall(
+            `/revenue?year=${year}&month=${month + 1}&fields=${REVENUE_CALENDAR_FIELDS}&format=columnar`
+        );
         renderRevenueCalendar();
     } catch (error) {
         console.error('Error loading revenue:', error);
@@ -1585,8 +2043,8 @@ async function saveCommissionSettings() {
         monthly_max: parseFloat(document.getElementById('commissionMonthlyMax').value) || 0
     };
     try {
-        await apiCall('/commission-settings', { method: 'POST', body: JSON.stringify(data) });
-        alert('Gespeichert');
+        const result = await apiCall('/commission-settings', { method: 'POST', body: JSON.stringify(data) });
+        alert(result.rebuild ? 'Gespeichert – Provisionen werden im Hintergrund neu berechnet' : 'Gespeichert');
     } catch (error) {
         console.error('Error saving commission settings:', error);
         alert('Fehler beim Speichern der Einstellungen: ' + error.message);
@@ -1645,6 +2103,7 @@ async function saveThresholds() {
         return;
     }
     const rows = document.querySelectorAll('#thresholdTableBody tr');
+    let rebuild = null;
     try {
         for (const row of rows) {
             const weekday = parseInt(row.querySelector('.th-weekday').value);
@@ -1653,12 +2112,13 @@ async function saveThresholds() {
             const valid_from_input = row.querySelector('.th-valid-from')?.value;
             const valid_from = formatDateInput(valid_from_input);
             if (isNaN(weekday) || isNaN(employee_count)) continue;
-            await apiCall('/commission-thresholds', {
+            const result = await apiCall('/commission-thresholds', {
                 method: 'POST',
                 body: JSON.stringify({ weekday, employee_count, threshold, valid_from })
             });
+            rebuild = rebuild || result.rebuild;
         }
-        alert('Gespeichert');
+        alert(rebuild ? 'Gespeichert – Provisionen werden im Hintergrund neu berechnet' : 'Gespeichert');
         loadCommissionThresholds();
     } catch (error) {
         console.error('Error saving thresholds:', error);
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: JSON-Encoding und Kompression einer vollen Monatsübersicht
+
+Vergleicht den Standard-JSON-Provider von Flask mit FastJSONProvider
+(orjson, falls installiert) und zeigt die Antwortgröße mit gzip/Brotli.
+
+Aufruf: python bench_json.py [--employees 25] [--iterations 200]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import zlib
+
+from flask.json.provider import DefaultJSONProvider
+
+import server
+
+
+def seed_month(employee_count, year, month):
+    """Lege Mitarbeitende mit einem vollständig erfassten Monat an"""
+    conn = server.get_db_connection()
+    cursor = conn.cursor()
+    for index in range(employee_count):
+        cursor.execute(
+            'INSERT INTO employees (name, contract_hours, has_commission, is_active, start_date) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (f'Mitarbeiter {index:02d}', 40, index % 2, 1, '2020-01-01'),
+        )
+        employee_id = cursor.lastrowid
+        for day in range(1, 29):
+            cursor.execute(
+                '''
+                    INSERT INTO time_entries (
+                        employee_id, date, entry_type, start_time, end_time, pause_minutes,
+                        commission, duftreise_bis_18, duftreise_ab_18, notes
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''',
+                (
+                    employee_id, f'{year}-{month:02d}-{day:02d}', 'work', '09:00', '18:00', 45,
+                    0, day % 3, day % 2, 'Frühschicht Kasse' if day % 4 else '',
+                ),
+            )
+    for day in range(1, 29):
+        cursor.execute(
+            'INSERT INTO revenue (date, amount, notes) VALUES (?, ?, ?)',
+            (f'{year}-{month:02d}-{day:02d}', 1500 + day * 10, ''),
+        )
+    conn.commit()
+    conn.close()
+
+
+def time_dumps(provider, payload, iterations):
+    """Durchschnittliche Zeit eines dumps()-Aufrufs in Millisekunden"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        encoded = provider.dumps(payload, separators=(',', ':'))
+    elapsed = time.perf_counter() - start
+    return elapsed / iterations * 1000, encoded.encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--employees', type=int, default=25)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        server.DB_PATH = os.path.join(tmp_dir, 'bench.db')
+        server.init_database()
+        seed_month(args.employees, 2024, 5)
+        overview = server.get_month_overview(2024, 5)
+
+    stdlib_ms, stdlib_body = time_dumps(DefaultJSONProvider(server.app), overview, args.iterations)
+    fast_ms, fast_body = time_dumps(server.FastJSONProvider(server.app), overview, args.iterations)
+
+    encoder = 'orjson' if server.orjson is not None else 'stdlib (orjson nicht installiert)'
+    print(f'Monatsübersicht: {args.employees} Mitarbeitende, {len(stdlib_body) / 1024:.1f} KiB JSON')
+    print(f'  DefaultJSONProvider:    {stdlib_ms:8.3f} ms')
+    print(f'  FastJSONProvider:       {fast_ms:8.3f} ms  [{encoder}]  x{stdlib_ms / fast_ms:.1f}')
+
+    compressor = zlib.compressobj(server.GZIP_LEVEL, zlib.DEFLATED, 31)
+    gzip_body = compressor.compress(fast_body) + compressor.flush()
+    print(f'  gzip (Stufe {server.GZIP_LEVEL}):         {len(gzip_body) / 1024:8.1f} KiB')
+    if server.brotli is not None:
+        brotli_body = server.brotli.compress(fast_body, quality=server.BROTLI_QUALITY)
+        print(f'  Brotli (Qualität {server.BROTLI_QUALITY}):     {len(brotli_body) / 1024:8.1f} KiB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Startzeit und Speicherbedarf beim Import von server.py
+
+Startet für jede Messung einen frischen Python-Prozess, importiert server
+und misst Importdauer und maximalen Arbeitsspeicher (RSS). Der mit
+tracemalloc gemessene Speicher der Importe kommt aus getrennten Läufen,
+weil tracemalloc den Import selbst stark verlangsamt. Ohne das Modul resource
+(Windows) entfällt die RSS-Angabe.
+
+Aufruf: python bench_startup.py [--runs 10]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = '''
+import json, sys, time, tracemalloc
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+traced = sys.argv[1] == 'traced'
+if traced:
+    tracemalloc.start()
+started = time.perf_counter()
+import server
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    'seconds': elapsed,
+    'traced_bytes': tracemalloc.get_traced_memory()[0] if traced else None,
+    'max_rss_kib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None,
+    'reportlab_loaded': 'reportlab' in sys.modules,
+}))
+'''
+
+
+def measure(runs, mode):
+    """Messwerte je Lauf in einem frischen Interpreter"""
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE, mode],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    results = measure(args.runs, 'plain')
+    seconds = [item['seconds'] * 1000 for item in results]
+    traced_results = measure(max(1, args.runs // 5), 'traced')
+    traced = statistics.median(item['traced_bytes'] for item in traced_results) / 1024 / 1024
+    rss_values = [item['max_rss_kib'] for item in results if item['max_rss_kib'] is not None]
+    print(f'import server: {args.runs} Läufe')
+    print(f'  Dauer (Median):           {statistics.median(seconds):8.1f} ms  (min {min(seconds):.1f} ms)')
+    print(f'  Importspeicher (Median):  {traced:8.1f} MiB  [tracemalloc]')
+    if rss_values:
+        print(f'  Max. RSS (Median):        {statistics.median(rss_values) / 1024:8.1f} MiB')
+    else:
+        print('  Max. RSS:                 nicht verfügbar (kein Modul resource)')
+    print(f"  ReportLab geladen:        {'ja' if results[0]['reportlab_loaded'] else 'nein'}")
+
+
+if __name__ == '__main__':
+    main()
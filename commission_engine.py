@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Provisionsregeln ohne Datenbankzugriff
+
+Die Regeln von compute_commission_for_date als reine Funktionen: Eingaben
+sind kompakte Arrays (Tage, Zeilen je Mitarbeiter und Tag, Stunden, Umsatz),
+Ausgabe sind die Provisionen je Zeile. evaluate_days ist die skalare
+Referenz, evaluate_days_batch rechnet mit NumPy viele Tage auf einmal.
+
+Bedeutung der Eingaben:
+  days           aufsteigende ISO-Daten (YYYY-MM-DD)
+  row_day        Index in ``days`` je Zeile (Zeilen nach Tag sortiert)
+  row_employee   Mitarbeiter je Zeile (nur Mitarbeitende mit Provision)
+  row_hours      Arbeitsstunden des Mitarbeiters an diesem Tag
+  row_hours_before  Arbeitsstunden des Mitarbeiters vor diesem Tag
+  revenue        Tagesumsatz je Eintrag in ``days``
+  rules          Ergebnis von build_rules
+
+Innerhalb eines Monats gilt das Maximum über die bereits berechneten
+früheren Tage (Monat genullt, Tage aufsteigend berechnet).
+"""
+
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:  # NumPy ist optional, die skalare Referenz genügt
+    np = None
+
+COMMISSION_HOUR_THRESHOLD = 160
+
+
+def build_rules(percentage, monthly_max, threshold_rows):
+    """Regeln aus Einstellungen und Schwellenzeilen (weekday, employee_count, threshold, valid_from)"""
+    thresholds = {}
+    for row in sorted(threshold_rows, key=lambda item: item['valid_from'], reverse=True):
+        thresholds.setdefault((row['weekday'], row['employee_count']), []).append(
+            (row['valid_from'], row['threshold'])
+        )
+    return {
+        'percentage': percentage,
+        'monthly_max': monthly_max,
+        'thresholds': thresholds,
+        'thresholds_configured': bool(threshold_rows),
+    }
+
+
+def threshold_for(rules, date_str, employee_count):
+    """Gültige Schwelle für Tag und Besetzung (None = keine passende Schwelle)"""
+    weekday = datetime.strptime(date_str, '%Y-%m-%d').weekday()
+    for valid_from, threshold in rules['thresholds'].get((weekday, employee_count), ()):
+        if valid_from <= date_str:
+            return threshold
+    # Ohne konfigurierte Schwellen gilt jeder Umsatz als ausreichend
+    return None if rules['thresholds_configured'] else 0
+
+
+def is_eligible(hours_before, hours):
+    """160-Stunden-Grenze: zählt ab dem Tag, an dem sie erreicht wird"""
+    return hours_before + hours >= COMMISSION_HOUR_THRESHOLD
+
+
+def day_commission_pool(revenue, threshold, percentage, total_hours):
+    """Zu verteilende Provision eines Tages"""
+    if threshold is not None and revenue >= threshold and total_hours > 0 and percentage > 0:
+        return revenue * (percentage / 100.0)
+    return 0
+
+
+def split_day_commission(pool, eligible_hours, monthly_max, month_total):
+    """Provision eines Tages nach Stunden aufteilen und am Monatsmaximum kappen
+
+    ``eligible_hours`` ordnet berechtigten Mitarbeitenden ihre Stunden zu,
+    ``month_total(employee)`` liefert die bereits ausgezahlte Monatssumme.
+    """
+    total_hours = sum(eligible_hours.values())
+    result = {}
+    for employee, hours in eligible_hours.items():
+        commission = 0
+        if pool > 0:
+            share = hours / total_hours if total_hours else 0
+            allowed = max(0, monthly_max - month_total(employee))
+            commission = min(pool * share, allowed)
+        result[employee] = round(commission, 2)
+    return result
+
+
+def evaluate_days(days, row_day, row_employee, row_hours, row_hours_before, revenue, rules):
+    """Skalare Referenz: Provision je Zeile als Liste"""
+    commissions = [0.0] * len(row_day)
+    month_totals = {}
+    current_month = None
+
+    start = 0
+    while start < len(row_day):
+        day = row_day[start]
+        end = start
+        while end < len(row_day) and row_day[end] == day:
+            end += 1
+
+        date_str = days[day]
+        if date_str[:7] != current_month:
+            current_month = date_str[:7]
+            month_totals = {}
+
+        eligible_hours = {}
+        eligible_rows = {}
+        for row in range(start, end):
+            if is_eligible(row_hours_before[row], row_hours[row]):
+                eligible_hours[row_employee[row]] = row_hours[row]
+                eligible_rows[row_employee[row]] = row
+
+        threshold = threshold_for(rules, date_str, end - start)
+        pool = day_commission_pool(
+            revenue[day], threshold, rules['percentage'], sum(eligible_hours.values())
+        )
+        split = split_day_commission(
+            pool, eligible_hours, rules['monthly_max'], lambda employee: month_totals.get(employee, 0)
+        )
+        for employee, commission in split.items():
+            commissions[eligible_rows[employee]] = commission
+            month_totals[employee] = month_totals.get(employee, 0) + commission
+
+        start = end
+
+    return commissions
+
+
+def _round_cents(values):
+    """Wie round(x, 2) je Element; NumPy rundet Grenzfälle sonst anders"""
+    scaled = values * 100
+    rounded = np.round(values, 2)
+    fraction = np.abs(scaled - np.trunc(scaled))
+    for index in np.flatnonzero(np.abs(fraction - 0.5) < 1e-6):
+        rounded[index] = round(float(values[index]), 2)
+    return rounded
+
+
+def evaluate_days_batch(days, row_day, row_employee, row_hours, row_hours_before, revenue, rules):
+    """NumPy-Variante von evaluate_days für viele Tage auf einmal; liefert ein Array"""
+    if np is None:
+        raise RuntimeError('evaluate_days_batch benötigt NumPy')
+
+    row_day = np.asarray(row_day, dtype=np.int64)
+    row_employee = np.asarray(row_employee, dtype=np.int64)
+    row_hours = np.asarray(row_hours, dtype=np.float64)
+    row_hours_before = np.asarray(row_hours_before, dtype=np.float64)
+    revenue = np.asarray(revenue, dtype=np.float64)
+    commissions = np.zeros(len(row_day))
+    if not len(row_day):
+        return commissions
+
+    eligible = (row_hours_before + row_hours) >= COMMISSION_HOUR_THRESHOLD
+    eligible_hours = np.where(eligible, row_hours, 0.0)
+
+    # Summen je Tag in Zeilenreihenfolge wie in der skalaren Referenz
+    day_count = len(days)
+    total_hours = np.zeros(day_count)
+    np.add.at(total_hours, row_day, eligible_hours)
+    staffing = np.bincount(row_day, minlength=day_count)
+
+    # Schwellen hängen vom Datum ab und werden je Tag nachgeschlagen
+    percentage = rules['percentage']
+    pools = np.zeros(day_count)
+    for day in np.flatnonzero(staffing):
+        threshold = threshold_for(rules, days[day], int(staffing[day]))
+        pools[day] = day_commission_pool(revenue[day], threshold, percentage, total_hours[day])
+
+    day_total = total_hours[row_day]
+    share = np.divide(eligible_hours, day_total, out=np.zeros(len(row_day)), where=day_total > 0)
+    raw = np.where(eligible & (pools[row_day] > 0), pools[row_day] * share, 0.0)
+
+    # Monatsmaximum: Gruppen (Mitarbeiter, Monat) schrittweise über alle Gruppen gleichzeitig
+    months = np.array([date_str[:7] for date_str in days])
+    _, month_index = np.unique(months, return_inverse=True)
+    group_keys = month_index[row_day] * (int(row_employee.max()) + 1) + row_employee
+    order = np.lexsort((np.arange(len(row_day)), group_keys))
+    sorted_keys = group_keys[order]
+    group_start = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+    group_id = np.cumsum(group_start) - 1
+    position = np.arange(len(order)) - np.flatnonzero(group_start)[group_id]
+
+    monthly_max = rules['monthly_max']
+    paid = np.zeros(group_id[-1] + 1)
+    for step in range(int(position.max()) + 1):
+        rows = order[position == step]
+        groups = group_id[position == step]
+        active = eligible[rows]
+        rows, groups = rows[active], groups[active]
+        allowed = np.maximum(0, monthly_max - paid[groups])
+        values = _round_cents(np.minimum(raw[rows], allowed))
+        commissions[rows] = values
+        paid[groups] += values
+
+    return commissions
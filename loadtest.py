@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Lasttest: Schichtwechsel mit vielen gleichzeitigen Zugriffen
+
+Legt eine temporäre Datenbank mit Mitarbeitenden und einem erfassten
+Vormonat an, startet server.py dafür in einem eigenen Prozess und schickt
+aus mehreren Threads gleichzeitig eine einstellbare Mischung aus
+Zeiterfassungen, Umsätzen, Monatsübersichten und PDF-Exporten.
+
+Am Ende stehen Durchsatz, Latenzen (p50/p95/p99) je Anfrageart,
+Sperrfehler ("database is locked") sowie verlorene Schreibvorgänge:
+jede bestätigte Zeiterfassung bzw. jeder bestätigte Umsatz wird mit dem
+Datenbankinhalt abgeglichen. Bei mehreren Schreibvorgängen auf denselben
+Tag muss der gespeicherte Wert einer der bestätigten sein.
+
+Aufruf: python loadtest.py [--workers 20] [--duration 30]
+                           [--mix entry=70,revenue=10,overview=15,pdf=5]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+import server
+
+SERVER_BOOTSTRAP = '''
+import logging, sys
+import server
+server.DB_PATH = sys.argv[1]
+server.init_database()
+logging.getLogger('werkzeug').setLevel(logging.ERROR)
+server.app.run(host='127.0.0.1', port=int(sys.argv[2]), threaded=True)
+'''
+
+DEFAULT_MIX = 'entry=70,revenue=10,overview=15,pdf=5'
+OPERATIONS = ('entry', 'revenue', 'overview', 'pdf')
+LOAD_YEAR, LOAD_MONTH = 2024, 6
+LOAD_DAYS = 30
+
+
+def parse_mix(value):
+    """'entry=70,pdf=5' -> Gewichte je Anfrageart"""
+    weights = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f'Unbekannte Anfrageart: {name} (erlaubt: {", ".join(OPERATIONS)})')
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def seed_database(db_path, employee_count):
+    """Mitarbeitende und einen vollständig erfassten Vormonat anlegen; liefert die IDs"""
+    server.DB_PATH = db_path
+    server.init_database()
+    conn = server.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('UPDATE commission_settings SET percentage = ?, monthly_max = ? WHERE id = 1', (5, 400))
+    employee_ids = []
+    for index in range(employee_count):
+        cursor.execute(
+            'INSERT INTO employees (name, contract_hours, has_commission, is_active, start_date) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (f'Mitarbeiter {index:02d}', 40, index % 2, 1, '2020-01-01'),
+        )
+        employee_ids.append(cursor.lastrowid)
+        for day in range(1, 29):
+            cursor.execute(
+                '''
+                    INSERT INTO time_entries (
+                        employee_id, date, entry_type, start_time, end_time, pause_minutes,
+                        commission, duftreise_bis_18, duftreise_ab_18, notes
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''',
+                (employee_ids[-1], f'{LOAD_YEAR}-{LOAD_MONTH - 1:02d}-{day:02d}', 'work',
+                 '09:00', '18:00', 45, 0, day % 3, day % 2, ''),
+            )
+    for day in range(1, 29):
+        cursor.execute(
+            'INSERT INTO revenue (date, amount, notes) VALUES (?, ?, ?)',
+            (f'{LOAD_YEAR}-{LOAD_MONTH - 1:02d}-{day:02d}', 1500 + day * 10, ''),
+        )
+    conn.commit()
+    conn.close()
+    return employee_ids
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(db_path, port, log_file):
+    """server.py in einem eigenen Prozess starten und auf /api/health warten
+
+    Die Ausgabe des Servers (inkl. Tracebacks) landet in ``log_file``.
+    """
+    process = subprocess.Popen(
+        [sys.executable, '-c', SERVER_BOOTSTRAP, db_path, str(port)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=log_file, stderr=subprocess.STDOUT,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            log_file.seek(0)
+            raise SystemExit(f'Server konnte nicht gestartet werden:\n{log_file.read()}')
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/health', timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise SystemExit('Server antwortet nicht auf /api/health')
+
+
+class LoadClient:
+    """HTTP-Aufrufe gegen den Testserver mit Zeitmessung"""
+
+    def __init__(self, base_url, token):
+        self.base_url = base_url
+        self.token = token
+
+    def request(self, method, path, payload=None):
+        """Liefert (Status, Antworttext, Sekunden); Status 0 bei Verbindungsfehlern"""
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        req.add_header('Authorization', f'Bearer {self.token}')
+        if body is not None:
+            req.add_header('Content-Type', 'application/json')
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=60) as response:
+                data = response.read()
+                status = response.status
+        except urllib.error.HTTPError as exc:
+            data = exc.read()
+            status = exc.code
+        except OSError as exc:
+            data = str(exc).encode('utf-8')
+            status = 0
+        return status, data.decode('utf-8', 'replace'), time.perf_counter() - started
+
+
+def login(base_url, username, password):
+    req = urllib.request.Request(
+        base_url + '/api/login',
+        data=json.dumps({'username': username, 'password': password}).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST',
+    )
+    with urllib.request.urlopen(req, timeout=10) as response:
+        return json.loads(response.read())['token']
+
+
+class LoadRun:
+    """Gemeinsamer Zustand der Worker-Threads"""
+
+    def __init__(self, client, employee_ids, weights, deadline):
+        self.client = client
+        self.employee_ids = employee_ids
+        self.operations = list(weights)
+        self.weights = [weights[name] for name in self.operations]
+        self.deadline = deadline
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = []
+        # Bestätigte Schreibvorgänge: Schlüssel -> Menge bestätigter Werte
+        self.acked_entries = defaultdict(set)
+        self.acked_revenue = defaultdict(set)
+        self.revenue_counter = itertools.count()
+
+    def record(self, operation, status, text, seconds):
+        with self.lock:
+            self.latencies[operation].append(seconds)
+            if 200 <= status < 300:
+                return True
+            self.errors[operation] += 1
+            if len(self.error_samples) < 5:
+                self.error_samples.append(f"{operation}: HTTP {status} {' '.join(text.split())[:160]}")
+            return False
+
+    def worker(self, index):
+        rng = random.Random(index)
+        employee_id = self.employee_ids[index % len(self.employee_ids)]
+        counter = itertools.count()
+        while time.monotonic() < self.deadline:
+            operation = rng.choices(self.operations, self.weights)[0]
+            if operation == 'entry':
+                step = next(counter)
+                date = f'{LOAD_YEAR}-{LOAD_MONTH:02d}-{step % LOAD_DAYS + 1:02d}'
+                notes = f'lt-{index}-{step}'
+                payload = {
+                    'employee_id': employee_id, 'date': date, 'entry_type': 'work',
+                    'start_time': rng.choice(['08:00', '09:00', '10:00']),
+                    'end_time': rng.choice(['16:00', '17:00', '18:30']),
+                    'pause_minutes': 30, 'notes': notes,
+                }
+                status, text, seconds = self.client.request('POST', '/api/time-entries', payload)
+                if self.record(operation, status, text, seconds):
+                    with self.lock:
+                        self.acked_entries[(employee_id, date)].add(notes)
+            elif operation == 'revenue':
+                step = next(self.revenue_counter)
+                date = f'{LOAD_YEAR}-{LOAD_MONTH:02d}-{step % LOAD_DAYS + 1:02d}'
+                amount = 1000 + step
+                payload = {'date': date, 'amount': amount, 'notes': ''}
+                status, text, seconds = self.client.request('POST', '/api/revenue', payload)
+                if self.record(operation, status, text, seconds):
+                    with self.lock:
+                        self.acked_revenue[date].add(amount)
+            elif operation == 'overview':
+                status, text, seconds = self.client.request(
+                    'GET', f'/api/reports/overview/{LOAD_YEAR}/{LOAD_MONTH}'
+                )
+                self.record(operation, status, text, seconds)
+            else:
+                status, text, seconds = self.client.request(
+                    'GET', f'/api/reports/overview/{LOAD_YEAR}/{LOAD_MONTH}/export/pdf'
+                )
+                self.record(operation, status, text, seconds)
+
+
+def check_writes(db_path, run):
+    """Bestätigte Schreibvorgänge mit der Datenbank abgleichen; liefert (verloren, doppelt)"""
+    conn = sqlite3.connect(db_path)
+    lost = duplicates = 0
+    for (employee_id, date), acked in run.acked_entries.items():
+        rows = conn.execute(
+            'SELECT notes FROM time_entries WHERE employee_id = ? AND date = ?', (employee_id, date)
+        ).fetchall()
+        duplicates += max(0, len(rows) - 1)
+        if not any(row[0] in acked for row in rows):
+            lost += 1
+    for date, acked in run.acked_revenue.items():
+        rows = conn.execute('SELECT amount FROM revenue WHERE date = ?', (date,)).fetchall()
+        duplicates += max(0, len(rows) - 1)
+        if not any(row[0] in acked for row in rows):
+            lost += 1
+    conn.close()
+    return lost, duplicates
+
+
+def count_lock_errors(log_file):
+    """Sperrfehler aus den Tracebacks im Serverprotokoll zählen
+
+    Der Server antwortet darauf nur mit einem allgemeinen 500er.
+    """
+    log_file.seek(0)
+    return sum('database is locked' in line for line in log_file if 'OperationalError' in line)
+
+
+def percentile_ms(values, percent):
+    if len(values) < 2:
+        return values[0] * 1000 if values else 0.0
+    return statistics.quantiles(values, n=100, method='inclusive')[percent - 1] * 1000
+
+
+def print_report(run, elapsed, lock_errors, lost, duplicates):
+    total = sum(len(values) for values in run.latencies.values())
+    print(f'\n{total} Anfragen in {elapsed:.1f} s = {total / elapsed:.1f} Anfragen/s')
+    print(f"{'Art':<10}{'Anzahl':>8}{'Fehler':>8}{'/s':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for operation in OPERATIONS:
+        values = run.latencies.get(operation)
+        if not values:
+            continue
+        print(
+            f'{operation:<10}{len(values):>8}{run.errors[operation]:>8}{len(values) / elapsed:>8.1f}'
+            f'{percentile_ms(values, 50):>10.1f}{percentile_ms(values, 95):>10.1f}'
+            f'{percentile_ms(values, 99):>10.1f}'
+        )
+    print(f'Sperrfehler (database is locked): {lock_errors}')
+    print(f'Verlorene Schreibvorgänge: {lost}')
+    print(f'Doppelte Zeilen je Mitarbeiter/Tag bzw. Tag: {duplicates}')
+    for sample in run.error_samples:
+        print(f'  {sample}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=20, help='Gleichzeitige Clients (Standard: 20)')
+    parser.add_argument('--duration', type=float, default=30, help='Dauer in Sekunden (Standard: 30)')
+    parser.add_argument('--employees', type=int, default=None, help='Mitarbeitende (Standard: wie --workers)')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'Gewichte je Anfrageart (Standard: {DEFAULT_MIX})')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default=server.USERS['admin']['password'])
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix='zeiterfassung-loadtest-')
+    db_path = os.path.join(tmp_dir, 'zeiterfassung.db')
+    employee_ids = seed_database(db_path, args.employees or args.workers)
+    port = free_port()
+    log_file = open(os.path.join(tmp_dir, 'server.log'), 'w+', encoding='utf-8', errors='replace')
+    process = start_server(db_path, port, log_file)
+    try:
+        base_url = f'http://127.0.0.1:{port}'
+        client = LoadClient(base_url, login(base_url, args.username, args.password))
+        mix = ', '.join(f'{name}={weight:g}' for name, weight in args.mix.items())
+        print(f'{args.workers} Clients, {args.duration:g} s, Mischung {mix}')
+
+        started = time.monotonic()
+        run = LoadRun(client, employee_ids, args.mix, started + args.duration)
+        threads = [threading.Thread(target=run.worker, args=(index,)) for index in range(args.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+    lost, duplicates = check_writes(db_path, run)
+    print_report(run, elapsed, count_lock_errors(log_file), lost, duplicates)
+    log_file.close()
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+PDF-Erzeugung mit ReportLab
+
+Wird von server.py erst beim ersten PDF importiert, damit Prozesse ohne
+PDF-Export ReportLab gar nicht laden. Absatz- und Tabellenstile werden
+einmal je Prozess aufgebaut und danach wiederverwendet; alle Funktionen
+liefern die PDF-Bytes.
+"""
+
+import io
+from datetime import datetime
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.platypus import (
+    SimpleDocTemplate,
+    Paragraph,
+    Table,
+    TableStyle,
+    Spacer,
+)
+
+
+@lru_cache(maxsize=None)
+def stylesheet():
+    """Standard-Stylesheet plus eigene Absatzstile (nur lesend verwenden)"""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='Small', parent=styles['Normal'], fontSize=9, leading=11))
+    styles.add(
+        ParagraphStyle(
+            name='Metric',
+            parent=styles['Normal'],
+            leading=14,
+            alignment=1,
+            spaceBefore=0,
+            spaceAfter=0,
+        )
+    )
+    styles.add(
+        ParagraphStyle(
+            name='EmployeeName',
+            parent=styles['Normal'],
+            fontSize=12,
+            leading=14,
+            spaceBefore=0,
+            spaceAfter=0,
+        )
+    )
+    return styles
+
+
+TABLE_STYLE_COMMANDS = {
+    'overview_summary': [
+        ('BACKGROUND', (0, 0), (0, 0), colors.HexColor('#EEF2F7')),
+        ('BACKGROUND', (1, 0), (-1, 0), colors.HexColor('#F9FAFB')),
+        ('BOX', (0, 0), (-1, -1), 0.6, colors.HexColor('#D8DFEA')),
+        ('INNERGRID', (1, 0), (-1, -1), 0.4, colors.HexColor('#E5EAF2')),
+        ('LEFTPADDING', (0, 0), (-1, -1), 10),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+        ('TOPPADDING', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+    ],
+    'overview_detail': [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E3E8F0')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#1F2937')),
+        ('BOX', (0, 0), (-1, -1), 0.4, colors.HexColor('#D1D5DB')),
+        ('INNERGRID', (0, 0), (-1, -1), 0.25, colors.HexColor('#E5E7EB')),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('ALIGN', (2, 1), (8, -1), 'CENTER'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 6),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+        ('TOPPADDING', (0, 0), (-1, -1), 4),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ],
+    'employee_summary': [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+        ('BACKGROUND', (0, 0), (-1, -1), colors.whitesmoke),
+    ],
+    'employee_entries': [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ],
+    'range': [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('BACKGROUND', (0, -1), (-1, -1), colors.whitesmoke),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+        ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
+    ],
+}
+
+
+@lru_cache(maxsize=None)
+def table_style(name):
+    """Tabellenstil aus TABLE_STYLE_COMMANDS, einmal je Prozess erzeugt"""
+    return TableStyle(TABLE_STYLE_COMMANDS[name])
+
+
+def render_month_overview(prepared_overview, month_name, generated_at, include_details=False):
+    """Erzeuge ein PDF-Dokument der Monatsübersicht und liefere dessen Bytes."""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=landscape(A4),
+        leftMargin=15 * mm,
+        rightMargin=15 * mm,
+        topMargin=20 * mm,
+        bottomMargin=20 * mm,
+        title=f"Monatsübersicht {month_name} {prepared_overview.get('year', '')}",
+    )
+
+    styles = stylesheet()
+
+    story = []
+    title_parts = ["Monatsübersicht", month_name, str(prepared_overview.get('year', ''))]
+    title_text = " ".join(part for part in title_parts if part)
+    story.append(Paragraph(title_text.strip(), styles['Title']))
+    story.append(
+        Paragraph(
+            f"Generiert am {generated_at.strftime('%d.%m.%Y %H:%M')}",
+            styles['Small'],
+        )
+    )
+    story.append(Spacer(1, 12))
+
+    def format_decimal(value, suffix=''):
+        if value is None:
+            return '-'
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return str(value)
+        formatted = f"{number:.2f}" if not number.is_integer() else f"{int(number)}"
+        return f"{formatted}{suffix}"
+
+    def format_hours_minutes(value):
+        if value is None:
+            return '-'
+        try:
+            total_minutes = int(round(float(value) * 60))
+        except (TypeError, ValueError):
+            return str(value)
+
+        hours = total_minutes // 60
+        minutes = total_minutes % 60
+        return f"{hours} h {minutes:02d} min"
+
+    for item in prepared_overview.get('employees', []):
+        employee = item.get('employee', {}) or {}
+        summary = item.get('summary', {}) or {}
+        entries = item.get('entries', []) or []
+        employee_name = employee.get('name') or 'Unbekannter Mitarbeitender'
+        safe_employee_name = escape(employee_name)
+        name_paragraph = Paragraph(
+            (
+                "<para alignment='left'><font size='12'><b>{}</b></font><br/>"
+                "<font size='9' color='#555555'>Monatsübersicht</font></para>"
+            ).format(safe_employee_name),
+            styles['EmployeeName'],
+        )
+
+        metrics_config = [
+            ('Gesamtstunden', summary.get('total_hours'), ''),
+            ('Arbeitstage', summary.get('work_days'), ''),
+            ('Urlaubstage', summary.get('vacation_days'), ''),
+            ('Krankheitstage', summary.get('sick_days'), ''),
+            (
+                'Duftreisen vor 18 Uhr',
+                summary.get('total_duftreise_bis_18'),
+                '',
+            ),
+            (
+                'Duftreisen nach 18 Uhr',
+                summary.get('total_duftreise_ab_18'),
+                '',
+            ),
+            ('Provision gesamt', summary.get('total_commission'), ' €'),
+        ]
+
+        metric_cells = []
+        for label, value, suffix in metrics_config:
+            if label == 'Gesamtstunden':
+                metric_value = format_hours_minutes(value)
+            else:
+                metric_value = format_decimal(value, suffix)
+            metric_value = escape(metric_value)
+            metric_label = escape(label)
+            metric_cells.append(
+                Paragraph(
+                    "<para alignment='center'><font size='14'><b>{}</b></font><br/><font size='9' color='#555555'>{}</font></para>".format(
+                        metric_value, metric_label
+                    ),
+                    styles['Metric'],
+                )
+            )
+
+        available_width = doc.width
+        name_col_width = available_width * 0.22
+        if metric_cells:
+            metric_col_width = (available_width - name_col_width) / len(metric_cells)
+        else:
+            metric_col_width = available_width - name_col_width
+
+        summary_row = [name_paragraph] + metric_cells
+        summary_table = Table(
+            [summary_row],
+            colWidths=[name_col_width] + [metric_col_width] * len(metric_cells),
+            hAlign='LEFT',
+        )
+        summary_table.setStyle(table_style('overview_summary'))
+        story.append(summary_table)
+
+        if include_details:
+            story.append(Spacer(1, 8))
+
+            if entries:
+                detail_headers = [
+                    'Datum',
+                    'Typ',
+                    'Start',
+                    'Ende',
+                    'Pause',
+                    'Arbeitszeit',
+                    'Duftreisen < 18',
+                    'Duftreisen ≥ 18',
+                    'Provision',
+                    'Notizen',
+                ]
+                detail_rows = [
+                    [Paragraph(f'<b>{escape(header)}</b>', styles['Small']) for header in detail_headers]
+                ]
+
+                for entry in entries:
+                    pause_value = entry.get('pause_minutes')
+                    if pause_value in (None, ''):
+                        pause_display = '-'
+                    else:
+                        pause_display = f"{int(pause_value)} min"
+
+                    detail_rows.append(
+                        [
+                            Paragraph(escape(entry.get('formatted_date') or '-'), styles['Small']),
+                            Paragraph(escape(entry.get('entry_type_label') or '-'), styles['Small']),
+                            Paragraph(escape(entry.get('start_time') or '-'), styles['Small']),
+                            Paragraph(escape(entry.get('end_time') or '-'), styles['Small']),
+                            Paragraph(escape(pause_display), styles['Small']),
+                            Paragraph(
+                                escape(format_hours_minutes(entry.get('calculated_hours'))),
+                                styles['Small'],
+                            ),
+                            Paragraph(
+                                escape(format_decimal(entry.get('duftreise_bis_18'))),
+                                styles['Small'],
+                            ),
+                            Paragraph(
+                                escape(format_decimal(entry.get('duftreise_ab_18'))),
+                                styles['Small'],
+                            ),
+                            Paragraph(
+                                escape(format_decimal(entry.get('commission'), ' €')),
+                                styles['Small'],
+                            ),
+                            Paragraph(escape(entry.get('notes') or '-'), styles['Small']),
+                        ]
+                    )
+
+                column_widths = [
+                    doc.width * width
+                    for width in [0.1, 0.12, 0.08, 0.08, 0.08, 0.1, 0.08, 0.08, 0.1, 0.18]
+                ]
+
+                detail_table = Table(detail_rows, colWidths=column_widths, repeatRows=1)
+                detail_table.setStyle(table_style('overview_detail'))
+                story.append(detail_table)
+            else:
+                story.append(Paragraph('Keine Tagesdaten vorhanden.', styles['Small']))
+
+        story.append(Spacer(1, 14))
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def render_employee_month(employee, entries, summary, month_name, year, entry_type_labels):
+    """PDF des Monatsberichts eines Mitarbeiters"""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, title='Monatsbericht')
+    styles = stylesheet()
+
+    generated_at = datetime.now().strftime('%d.%m.%Y %H:%M')
+
+    story = []
+    title = Paragraph(
+        f"Monatsbericht {escape(employee['name'])} – {escape(month_name)} {year}",
+        styles['Title'],
+    )
+    story.append(title)
+    story.append(Spacer(1, 6 * mm))
+    story.append(Paragraph(f"Generiert am {generated_at} Uhr", styles['Normal']))
+    story.append(Spacer(1, 10 * mm))
+
+    summary_data = [
+        ['Gesamtstunden', f"{summary.get('total_hours', 0):.2f}"],
+        ['Arbeitstage', summary.get('work_days', 0)],
+        ['Urlaubstage', summary.get('vacation_days', 0)],
+        ['Krankheitstage', summary.get('sick_days', 0)],
+        ['Provision gesamt (€)', f"{summary.get('total_commission', 0):.2f}"],
+        ['Duftreisen vor 18 Uhr', summary.get('total_duftreise_bis_18', 0)],
+        ['Duftreisen nach 18 Uhr', summary.get('total_duftreise_ab_18', 0)],
+    ]
+
+    if 'contract_hours_month' in summary:
+        summary_data.append(['Vertragsstunden (Monat)', f"{summary['contract_hours_month']:.2f}"])
+
+    summary_table = Table(summary_data, colWidths=[70 * mm, 50 * mm])
+    summary_table.setStyle(table_style('employee_summary'))
+
+    story.append(summary_table)
+    story.append(Spacer(1, 12 * mm))
+
+    table_header = ['Datum', 'Art', 'Arbeitszeit', 'Pause (Min)', 'Provision (€)', 'Duftreisen', 'Notizen']
+    table_rows = [table_header]
+
+    for entry in entries:
+        entry_date = entry.get('date')
+        formatted_date = ''
+        if entry_date:
+            try:
+                formatted_date = datetime.strptime(entry_date, '%Y-%m-%d').strftime('%d.%m.%Y')
+            except ValueError:
+                formatted_date = entry_date
+
+        entry_type_label = entry_type_labels.get(entry.get('entry_type'), entry.get('entry_type', ''))
+        if entry.get('entry_type') == 'work':
+            work_time = ' - '.join(filter(None, [entry.get('start_time'), entry.get('end_time')]))
+        else:
+            work_time = ''
+
+        pause_minutes = entry.get('pause_minutes') or 0
+        commission_value = entry.get('commission') or 0
+        duft_bis = entry.get('duftreise_bis_18') or 0
+        duft_ab = entry.get('duftreise_ab_18') or 0
+        duft_text = ''
+        if duft_bis or duft_ab:
+            duft_text = f"bis 18: {duft_bis}\nab 18: {duft_ab}"
+
+        notes_raw = entry.get('notes') or ''
+        notes_paragraph = Paragraph(escape(notes_raw).replace('\n', '<br/>'), styles['BodyText'])
+
+        table_rows.append([
+            formatted_date,
+            entry_type_label,
+            work_time,
+            pause_minutes,
+            f"{commission_value:.2f}",
+            duft_text,
+            notes_paragraph,
+        ])
+
+    if len(table_rows) == 1:
+        table_rows.append(['-', '-', '-', '-', '-', '-', Paragraph('Keine Einträge', styles['BodyText'])])
+
+    entry_table = Table(
+        table_rows,
+        colWidths=[22 * mm, 24 * mm, 28 * mm, 24 * mm, 26 * mm, 32 * mm, 60 * mm],
+        repeatRows=1,
+    )
+    entry_table.setStyle(table_style('employee_entries'))
+
+    story.append(entry_table)
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def render_range_report(report, period_label, month_label, generated_at):
+    """PDF mit Monats- und Gesamtsummen für einen Zeitraum
+
+    ``month_label(year, month)`` liefert die Bezeichnung einer Monatszeile.
+    """
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=landscape(A4),
+        leftMargin=15 * mm,
+        rightMargin=15 * mm,
+        topMargin=20 * mm,
+        bottomMargin=20 * mm,
+        title=f"Auswertung {report['from']} bis {report['to']}",
+    )
+    styles = stylesheet()
+
+    story = [
+        Paragraph(f"Auswertung {escape(period_label)}", styles['Title']),
+        Paragraph(f"Generiert am {generated_at.strftime('%d.%m.%Y %H:%M')}", styles['Normal']),
+        Spacer(1, 8 * mm),
+    ]
+
+    headers = [
+        'Monat', 'Gesamtstunden', 'Arbeitstage', 'Urlaubstage', 'Krankheitstage',
+        'Duftreisen < 18', 'Duftreisen ≥ 18', 'Provision (€)',
+    ]
+
+    def summary_row(label, summary):
+        return [
+            label,
+            f"{summary.get('total_hours', 0):.2f}",
+            summary.get('work_days', 0),
+            summary.get('vacation_days', 0),
+            summary.get('sick_days', 0),
+            summary.get('total_duftreise_bis_18', 0),
+            summary.get('total_duftreise_ab_18', 0),
+            f"{summary.get('total_commission', 0):.2f}",
+        ]
+
+    for item in report.get('employees', []):
+        employee = item.get('employee', {})
+        story.append(Paragraph(escape(employee.get('name') or ''), styles['Heading2']))
+
+        rows = [headers]
+        for month_item in item.get('months', []):
+            label = month_label(month_item['year'], month_item['month'])
+            rows.append(summary_row(label, month_item['summary']))
+        rows.append(summary_row('Gesamt', item.get('summary', {})))
+
+        table = Table(rows, repeatRows=1, hAlign='LEFT')
+        table.setStyle(table_style('range'))
+        story.append(table)
+        story.append(Spacer(1, 10 * mm))
+
+    if not report.get('employees'):
+        story.append(Paragraph('Keine Daten für den ausgewählten Zeitraum vorhanden.', styles['Normal']))
+
+    doc.build(story)
+    return buffer.getvalue()
@@ -3,34 +3,80 @@
 Arbeitszeiterfassung Backend mit SQLite
 """
 
+import argparse
+import cProfile
 import logging
 import sqlite3
+import base64
+import binascii
 import json
 import csv
+import gzip
+import hashlib
+import heapq
 import io
+import mimetypes
 import os
+import queue
+import re
 import secrets
-from datetime import datetime, date
-from xml.sax.saxutils import escape
-
-from flask import Flask, request, jsonify, send_from_directory, Response, g
+import shutil
+import threading
+import time
+import tracemalloc
+import zipfile
+import zlib
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from datetime import datetime, date, timedelta
+
+from flask import Flask, request, jsonify, Response, g, abort
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import mm
-from reportlab.platypus import (
-    SimpleDocTemplate,
-    Paragraph,
-    Table,
-    TableStyle,
-    Spacer,
-)
+
+import commission_engine
+
+# Optionale Beschleuniger: schnellerer JSON-Encoder und Brotli-Kompression
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 if not logging.getLogger().handlers:
     logging.basicConfig(level=logging.INFO)
 
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON-Provider, der orjson nutzt, falls installiert, sonst die Standardbibliothek"""
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs not in ({}, {'separators': (',', ':')}, {'indent': 2}):
+            return super().dumps(obj, **kwargs)
+
+        option = orjson.OPT_PASSTHROUGH_DATETIME
+        if 'indent' in kwargs:
+            option |= orjson.OPT_INDENT_2
+
+        try:
+            return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+        except TypeError:
+            # z. B. Ganzzahlen außerhalb von 64 Bit – die Standardbibliothek kann das
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
-CORS(app)  # Erlaube Cross-Origin Requests
+app.json = FastJSONProvider(app)
+CORS(app, expose_headers=['X-Next-Cursor'])  # Erlaube Cross-Origin Requests
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +99,18 @@ LOGIN_EXEMPT_PATHS = {'/api/login', '/api/health'}
 # Datenbank-Pfad
 DB_PATH = 'zeiterfassung.db'
 
+# Online-Sicherungen (Verzeichnis, Intervall in Stunden, Anzahl aufbewahrter Sicherungen)
+BACKUP_DIR = os.environ.get('BACKUP_DIR', 'backups')
+BACKUP_INTERVAL_HOURS = float(os.environ.get('BACKUP_INTERVAL_HOURS', 24))
+BACKUP_RETENTION = int(os.environ.get('BACKUP_RETENTION', 14))
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_SLEEP = 0.005
+
+BACKUP_STATUS = {'running': False, 'last_success': None, 'last_error': None}
+_backup_lock = threading.Lock()
+_backup_status_lock = threading.Lock()
+_backup_scheduler_stop = threading.Event()
+
 MONTH_NAMES = [
     'Januar', 'Februar', 'März', 'April', 'Mai', 'Juni',
     'Juli', 'August', 'September', 'Oktober', 'November', 'Dezember'
@@ -64,7 +122,73 @@ ENTRY_TYPE_LABELS = {
     'sick': 'Krankheit'
 }
 
-COMMISSION_HOUR_THRESHOLD = 160
+COMMISSION_HOUR_THRESHOLD = commission_engine.COMMISSION_HOUR_THRESHOLD
+
+# Seitengröße für GET /api/time-entries (Standard und serverseitige Obergrenze)
+TIME_ENTRIES_DEFAULT_LIMIT = 500
+TIME_ENTRIES_MAX_LIMIT = 2000
+
+# Für fields= erlaubte Spalten der Listen-Endpunkte (SQL-Ausdruck je Feld)
+TIME_ENTRY_FIELDS = {
+    'id': 'te.id',
+    'employee_id': 'te.employee_id',
+    'date': 'te.date',
+    'entry_type': 'te.entry_type',
+    'start_time': 'te.start_time',
+    'end_time': 'te.end_time',
+    'pause_minutes': 'te.pause_minutes',
+    'commission': 'te.commission',
+    'duftreise_bis_18': 'te.duftreise_bis_18',
+    'duftreise_ab_18': 'te.duftreise_ab_18',
+    'notes': 'te.notes',
+    'created_at': 'te.created_at',
+    'employee_name': 'e.name',
+}
+REVENUE_FIELDS = {name: name for name in ('id', 'date', 'amount', 'notes', 'created_at')}
+EMPLOYEE_FIELDS = {
+    name: name
+    for name in (
+        'id', 'name', 'contract_hours', 'has_commission', 'is_active',
+        'start_date', 'end_date', 'created_at',
+    )
+}
+
+# Antwortkompression: nur Texttypen ab einer Mindestgröße, günstige Stufen
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/javascript',
+    'text/css',
+    'text/csv',
+    'text/html',
+    'text/plain',
+}
+COMPRESSION_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+# Statische Dateien: werden beim Start eingelesen, gehasht und vorkomprimiert
+STATIC_ROOT = os.path.dirname(os.path.abspath(__file__))
+FINGERPRINTED_ASSETS = ('app.js',)
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+# Maximale Spannweite für Zeitraum-Auswertungen (in Monaten)
+MAX_REPORT_RANGE_MONTHS = 120
+
+# Prozesse für den ZIP-Export der Monatsberichte (0 = alle CPU-Kerne)
+PDF_EXPORT_WORKERS = int(os.environ.get('PDF_EXPORT_WORKERS', 0))
+
+# Arbeitsstunden eines Eintrags in SQL, identisch zu build_month_summary
+# (timedelta.seconds rechnet über Mitternacht, Pause wird abgezogen)
+SUMMARY_HOURS_SQL = '''
+    (((strftime('%s', te.end_time) - strftime('%s', te.start_time)) % 86400 + 86400) % 86400) / 3600.0
+    - COALESCE(te.pause_minutes, 0) / 60.0
+'''
+HAS_WORK_TIMES_SQL = (
+    "te.entry_type = 'work' "
+    "AND COALESCE(te.start_time, '') != '' AND COALESCE(te.end_time, '') != ''"
+)
 
 
 def calculate_work_hours(start_time, end_time, pause_minutes):
@@ -79,6 +203,42 @@ def calculate_work_hours(start_time, end_time, pause_minutes):
     return max(duration - pause, 0.0)
 
 
+def parse_year_month(value):
+    """Lese einen Monat im Format YYYY-MM und liefere (Jahr, Monat)"""
+    parsed = datetime.strptime((value or '').strip(), '%Y-%m')
+    return parsed.year, parsed.month
+
+
+def month_date_bounds(year, month):
+    """Erster Tag des Monats und erster Tag des Folgemonats als ISO-Strings"""
+    start = date(year, month, 1)
+    if month == 12:
+        end = date(year + 1, 1, 1)
+    else:
+        end = date(year, month + 1, 1)
+    return start.isoformat(), end.isoformat()
+
+
+def iter_months(start_year, start_month, end_year, end_month):
+    """Alle Monate (Jahr, Monat) zwischen Start und Ende einschließlich"""
+    year, month = start_year, start_month
+    while (year, month) <= (end_year, end_month):
+        yield year, month
+        month += 1
+        if month > 12:
+            year += 1
+            month = 1
+
+
+def get_archived_hours_before(cursor, employee_id, year):
+    """Übertragene Stunden aus archivierten Jahren vor ``year``"""
+    row = cursor.execute(
+        'SELECT COALESCE(SUM(hours), 0) AS total FROM archived_hours WHERE employee_id = ? AND year < ?',
+        (employee_id, year),
+    ).fetchone()
+    return row['total']
+
+
 def get_employee_hours_before(cursor, employee_id, date_str):
     """Summiere alle Arbeitsstunden eines Mitarbeiters vor einem bestimmten Datum."""
     rows = cursor.execute(
@@ -93,7 +253,8 @@ def get_employee_hours_before(cursor, employee_id, date_str):
         (employee_id, date_str),
     ).fetchall()
 
-    total = 0.0
+    # Archivierte Jahre liegen vollständig vor allen Einträgen der Hauptdatenbank
+    total = get_archived_hours_before(cursor, employee_id, int(date_str[:4]))
     for row in rows:
         total += calculate_work_hours(row['start_time'], row['end_time'], row['pause_minutes'])
     return total
@@ -156,11 +317,78 @@ def enforce_authentication():
     g.current_user = {**session, 'token': token}
 
 
-def init_database():
-    """Initialisiere SQLite-Datenbank mit Tabellen"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
+def _choose_content_encoding():
+    """Wähle anhand von Accept-Encoding die beste unterstützte Kompression"""
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+
+def _compress_stream(chunks, encoding):
+    """Komprimiere einen Antwort-Iterator blockweise, ohne ihn zu puffern"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        compress, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        compress, finish = compressor.compress, compressor.flush
+
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compress(chunk)
+            if data:
+                yield data
+        yield finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close:
+            close()
+
+
+@app.after_request
+def compress_response(response):
+    """Komprimiere API-, Export- und Textantworten per gzip oder Brotli"""
+    if (
+        response.status_code != 200
+        or request.method == 'HEAD'
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or 'Content-Encoding' in response.headers
+    ):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    streamed = response.is_streamed or response.direct_passthrough
+    length = response.content_length
+    if length is None and not streamed:
+        length = len(response.get_data())
+    if length is not None and length < COMPRESSION_MIN_SIZE:
+        return response
+
+    encoding = _choose_content_encoding()
+    if not encoding:
+        return response
+
+    if streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.direct_passthrough = False
+        response.headers.pop('Content-Length', None)
+    else:
+        response.set_data(b''.join(_compress_stream([response.get_data()], encoding)))
+
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+# Schema-Migrationen: Version steht in PRAGMA user_version, jede Migration
+# läuft genau einmal in einer eigenen Transaktion.
+
+def _migrate_base_schema(cursor):
+    """Grundtabellen; ergänzt fehlende Spalten älterer Datenbanken"""
     # Mitarbeiter-Tabelle
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS employees (
@@ -182,7 +410,7 @@ def init_database():
         cursor.execute('ALTER TABLE employees ADD COLUMN start_date DATE')
     if 'end_date' not in cols:
         cursor.execute('ALTER TABLE employees ADD COLUMN end_date DATE')
-    
+
     # Zeiterfassung-Tabelle
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS time_entries (
@@ -201,7 +429,7 @@ def init_database():
             FOREIGN KEY (employee_id) REFERENCES employees (id)
         )
     ''')
-    
+
     # Umsatz-Tabelle
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS revenue (
@@ -221,11 +449,11 @@ def init_database():
             monthly_max REAL NOT NULL DEFAULT 0
         )
     ''')
-    cursor.execute('SELECT COUNT(*) FROM commission_settings')
-    if cursor.fetchone()[0] == 0:
-        cursor.execute('INSERT INTO commission_settings (id, percentage, monthly_max) VALUES (1, 0, 0)')
+    cursor.execute('INSERT OR IGNORE INTO commission_settings (id, percentage, monthly_max) VALUES (1, 0, 0)')
 
-    # Provisionsschwellen
+
+def _migrate_commission_thresholds(cursor):
+    """Provisionsschwellen mit Gültigkeitsdatum und eindeutigem (weekday, employee_count, valid_from)"""
     cursor.execute(
         "SELECT name FROM sqlite_master WHERE type='table' AND name='commission_thresholds'"
     )
@@ -245,51 +473,287 @@ def init_database():
 
     if not table_exists:
         create_commission_thresholds_table()
+        return
+
+    cursor.execute('PRAGMA table_info(commission_thresholds)')
+    columns = [row[1] for row in cursor.fetchall()]
+    needs_migration = 'valid_from' not in columns
+
+    if not needs_migration:
+        cursor.execute('PRAGMA index_list(commission_thresholds)')
+        indexes = cursor.fetchall()
+        has_desired_unique = False
+        for index in indexes:
+            if index[2]:  # unique index
+                idx_name = index[1]
+                cursor.execute(f"PRAGMA index_info('{idx_name}')")
+                idx_columns = [info[2] for info in cursor.fetchall()]
+                if idx_columns == ['weekday', 'employee_count', 'valid_from']:
+                    has_desired_unique = True
+                    break
+        needs_migration = not has_desired_unique
+
+    if needs_migration:
+        cursor.execute('ALTER TABLE commission_thresholds RENAME TO commission_thresholds_old')
+        create_commission_thresholds_table()
+        valid_from = "COALESCE(valid_from, '1970-01-01')" if 'valid_from' in columns else "'1970-01-01'"
+        cursor.execute(f'''
+            INSERT INTO commission_thresholds (id, weekday, employee_count, threshold, valid_from)
+            SELECT id, weekday, employee_count, threshold, {valid_from}
+            FROM commission_thresholds_old
+        ''')
+        cursor.execute('DROP TABLE commission_thresholds_old')
     else:
-        cursor.execute('PRAGMA table_info(commission_thresholds)')
-        columns = [row[1] for row in cursor.fetchall()]
-        needs_migration = 'valid_from' not in columns
-
-        if not needs_migration:
-            cursor.execute('PRAGMA index_list(commission_thresholds)')
-            indexes = cursor.fetchall()
-            has_desired_unique = False
-            for index in indexes:
-                if index[2]:  # unique index
-                    idx_name = index[1]
-                    cursor.execute(f"PRAGMA index_info('{idx_name}')")
-                    idx_columns = [info[2] for info in cursor.fetchall()]
-                    if idx_columns == ['weekday', 'employee_count', 'valid_from']:
-                        has_desired_unique = True
-                        break
-            needs_migration = not has_desired_unique
-
-        if needs_migration:
-            cursor.execute('ALTER TABLE commission_thresholds RENAME TO commission_thresholds_old')
-            create_commission_thresholds_table()
-            if 'valid_from' in columns:
-                cursor.execute('''
-                    INSERT INTO commission_thresholds (id, weekday, employee_count, threshold, valid_from)
-                    SELECT id, weekday, employee_count, threshold,
-                           COALESCE(valid_from, '1970-01-01')
-                    FROM commission_thresholds_old
-                ''')
-            else:
-                cursor.execute('''
-                    INSERT INTO commission_thresholds (id, weekday, employee_count, threshold, valid_from)
-                    SELECT id, weekday, employee_count, threshold,
-                           '1970-01-01'
-                    FROM commission_thresholds_old
-                ''')
-            cursor.execute('DROP TABLE commission_thresholds_old')
-        else:
-            cursor.execute(
-                "UPDATE commission_thresholds SET valid_from = '1970-01-01' WHERE valid_from IS NULL"
+        cursor.execute(
+            "UPDATE commission_thresholds SET valid_from = '1970-01-01' WHERE valid_from IS NULL"
+        )
+
+
+def _migrate_date_indexes(cursor):
+    """Indizes für datumsbasierte Abfragen (Monats- und Zeitraumauswertungen)"""
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_time_entries_employee_date ON time_entries (employee_id, date)'
+    )
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_time_entries_date ON time_entries (date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_revenue_date ON revenue (date)')
+
+
+def _migrate_archive_tables(cursor):
+    """Archivierte Jahre und übertragene Stundensummen (für die 160-Stunden-Grenze)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS archived_years (
+            year INTEGER PRIMARY KEY,
+            path TEXT NOT NULL,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS archived_hours (
+            employee_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            hours REAL NOT NULL,
+            PRIMARY KEY (employee_id, year)
+        )
+    ''')
+
+
+def _migrate_month_snapshots(cursor):
+    """Abgeschlossene Monate: eingefrorene Übersicht mit Prüfsumme"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS month_snapshots (
+            period TEXT PRIMARY KEY,
+            payload TEXT NOT NULL,
+            checksum TEXT NOT NULL,
+            closed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            closed_by TEXT
+        )
+    ''')
+
+
+# Tabellen mit Änderungsprotokoll: Datumsspalte (oder None) und überwachte Spalten
+CHANGE_LOG_TABLES = {
+    'time_entries': ('date', (
+        'employee_id', 'date', 'entry_type', 'start_time', 'end_time', 'pause_minutes',
+        'commission', 'duftreise_bis_18', 'duftreise_ab_18', 'notes',
+    )),
+    'revenue': ('date', ('date', 'amount', 'notes')),
+    'employees': (None, (
+        'name', 'contract_hours', 'has_commission', 'is_active', 'start_date', 'end_date',
+    )),
+}
+
+
+def _migrate_change_log(cursor):
+    """Änderungsprotokoll mit fortlaufender Nummer, befüllt durch Trigger"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            op TEXT NOT NULL,  -- insert, update, delete
+            date TEXT,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_change_log_entity_row ON change_log (entity, row_id)')
+
+    for table, (date_column, columns) in CHANGE_LOG_TABLES.items():
+        new_date = f'NEW.{date_column}' if date_column else 'NULL'
+        old_date = f'OLD.{date_column}' if date_column else 'NULL'
+        old_values = ', '.join(f'OLD.{column}' for column in columns)
+        new_values = ', '.join(f'NEW.{column}' for column in columns)
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_insert_log AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO change_log (entity, row_id, op, date) VALUES ('{table}', NEW.id, 'insert', {new_date});
+            END
+        ''')
+        # Neuberechnungen schreiben oft unveränderte Werte zurück: nur echte Änderungen protokollieren
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_update_log AFTER UPDATE ON {table}
+            WHEN ({old_values}) IS NOT ({new_values})
+            BEGIN
+                INSERT INTO change_log (entity, row_id, op, date) VALUES ('{table}', NEW.id, 'update', {new_date});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_delete_log AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO change_log (entity, row_id, op, date) VALUES ('{table}', OLD.id, 'delete', {old_date});
+            END
+        ''')
+
+
+# Felder, die Mitarbeitende selbst erfassen; nur deren Änderung erhöht die Version.
+# Provisionen fehlen bewusst: Neuberechnungen sollen keine Konflikte auslösen.
+TIME_ENTRY_VERSIONED_COLUMNS = (
+    'employee_id', 'date', 'entry_type', 'start_time', 'end_time', 'pause_minutes',
+    'duftreise_bis_18', 'duftreise_ab_18', 'notes',
+)
+
+
+def _migrate_time_entry_versions(cursor):
+    """Versionsnummer je Zeiterfassung für die Konflikterkennung beim Offline-Abgleich"""
+    cursor.execute('PRAGMA table_info(time_entries)')
+    if 'version' not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE time_entries ADD COLUMN version INTEGER NOT NULL DEFAULT 1')
+
+    old_values = ', '.join(f'OLD.{column}' for column in TIME_ENTRY_VERSIONED_COLUMNS)
+    new_values = ', '.join(f'NEW.{column}' for column in TIME_ENTRY_VERSIONED_COLUMNS)
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_time_entries_version AFTER UPDATE ON time_entries
+        WHEN ({old_values}) IS NOT ({new_values}) AND NEW.version = OLD.version
+        BEGIN
+            UPDATE time_entries SET version = OLD.version + 1 WHERE id = NEW.id;
+        END
+    ''')
+
+
+def _migrate_time_entry_unique_day(cursor):
+    """Höchstens eine Zeiterfassung je Mitarbeiter und Tag (Grundlage für das Upsert)
+
+    Doppelte Einträge aus gleichzeitigen Speichervorgängen werden entfernt;
+    behalten wird jeweils der älteste, den das Speichern bisher überschrieben
+    hat. Die entfernten Zeilen bleiben in ``time_entries_removed_duplicates``
+    erhalten. Provisionen werden hier nicht angefasst: die betroffenen Monate
+    berechnet ``init_database`` nach den Migrationen neu.
+    """
+    duplicates = 'id NOT IN (SELECT MIN(id) FROM time_entries GROUP BY employee_id, date)'
+    cursor.execute(f'SELECT DISTINCT substr(date, 1, 7) FROM time_entries WHERE {duplicates} ORDER BY 1')
+    months = [row[0] for row in cursor.fetchall()]
+    if months:
+        cursor.execute(
+            f'CREATE TABLE time_entries_removed_duplicates AS SELECT * FROM time_entries WHERE {duplicates}'
+        )
+        cursor.execute(f'DELETE FROM time_entries WHERE {duplicates}')
+        logger.warning(
+            '%s doppelte Zeiterfassungen nach time_entries_removed_duplicates verschoben (Monate: %s)',
+            cursor.rowcount, ', '.join(months),
+        )
+
+    cursor.execute('DROP INDEX IF EXISTS idx_time_entries_employee_date')
+    cursor.execute(
+        'CREATE UNIQUE INDEX idx_time_entries_employee_date ON time_entries (employee_id, date)'
+    )
+
+
+# Reihenfolge nie ändern, neue Migrationen nur hinten anhängen.
+# Die Migrationen sind so geschrieben, dass sie auch auf Datenbanken aus der
+# Zeit vor der Versionierung (user_version 0) korrekt laufen.
+MIGRATIONS = [
+    (1, 'Grundschema', _migrate_base_schema),
+    (2, 'Provisionsschwellen mit valid_from', _migrate_commission_thresholds),
+    (3, 'Datumsindizes', _migrate_date_indexes),
+    (4, 'Archivtabellen', _migrate_archive_tables),
+    (5, 'Monatsabschlüsse', _migrate_month_snapshots),
+    (6, 'Änderungsprotokoll', _migrate_change_log),
+    (7, 'Versionen der Zeiterfassungen', _migrate_time_entry_versions),
+    (8, 'Eine Zeiterfassung je Mitarbeiter und Tag', _migrate_time_entry_unique_day),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def init_database():
+    """Initialisiere SQLite-Datenbank: ausstehende Migrationen ausführen
+
+    Eine aktuelle Datenbank kostet nur ``PRAGMA user_version``. Jede
+    Migration läuft in einer eigenen Transaktion zusammen mit dem Hochsetzen
+    der Version; liefert die Liste der ausgeführten Versionen.
+    """
+    started = time.perf_counter()
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    try:
+        if conn.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+            return []
+
+        # WAL bleibt in der Datei gespeichert und muss daher nur einmal gesetzt werden:
+        # ein Commit synchronisiert nur noch das Log statt Journal und Datenbank, Leser
+        # blockieren Schreibende nicht mehr. Außerhalb einer Transaktion, vor den Migrationen.
+        conn.execute('PRAGMA journal_mode = WAL')
+
+        applied = []
+        cursor = conn.cursor()
+        for version, description, migrate in MIGRATIONS:
+            migration_started = time.perf_counter()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                # Erneut lesen: ein anderer Prozess kann die Migration inzwischen ausgeführt haben
+                if cursor.execute('PRAGMA user_version').fetchone()[0] >= version:
+                    cursor.execute('ROLLBACK')
+                    continue
+                migrate(cursor)
+                cursor.execute(f'PRAGMA user_version = {int(version)}')
+                cursor.execute('COMMIT')
+            except Exception:
+                cursor.execute('ROLLBACK')
+                logger.exception('Migration %s (%s) fehlgeschlagen', version, description)
+                raise
+            applied.append(version)
+            logger.info(
+                'Migration %s (%s) in %.1f ms',
+                version, description, (time.perf_counter() - migration_started) * 1000,
             )
-    
-    conn.commit()
+    finally:
+        conn.close()
+
+    if applied:
+        logger.info(
+            'Datenbankschema auf Version %s gebracht (%.1f ms)',
+            SCHEMA_VERSION, (time.perf_counter() - started) * 1000,
+        )
+        print("Datenbank initialisiert!")
+    if 8 in applied:
+        _recompute_removed_duplicate_months()
+    return applied
+
+
+def _recompute_removed_duplicate_months():
+    """Provisionen der Monate neu berechnen, aus denen Migration 8 Duplikate entfernt hat
+
+    Läuft nach allen Migrationen mit dem aktuellen Schema; abgeschlossene
+    Monate behalten ihren Snapshot.
+    """
+    conn = get_db_connection()
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'time_entries_removed_duplicates'"
+    ).fetchone()
+    months = [] if not exists else [
+        row['month'] for row in conn.execute(
+            'SELECT DISTINCT substr(date, 1, 7) AS month FROM time_entries_removed_duplicates ORDER BY 1'
+        )
+    ]
     conn.close()
-    print("Datenbank initialisiert!")
+
+    updated = 0
+    for month in months:
+        year, month_number = parse_year_month(month)
+        updated += rebuild_commissions(year, month_number, year, month_number, workers=1)
+    if months:
+        logger.warning(
+            'Provisionen nach dem Entfernen doppelter Zeiterfassungen neu berechnet (Monate: %s, %s Einträge)',
+            ', '.join(months), updated,
+        )
+
 
 def get_db_connection():
     """Erstelle Datenbankverbindung"""
@@ -297,11 +761,89 @@ def get_db_connection():
     conn.row_factory = sqlite3.Row  # Ermöglicht dict-ähnlichen Zugriff
     return conn
 
+
+def archive_path(year):
+    """Pfad der Archivdatei eines Jahres neben der Hauptdatenbank"""
+    return os.path.join(os.path.dirname(os.path.abspath(DB_PATH)), f'zeiterfassung_{int(year)}.db')
+
+
+ARCHIVED_TABLES = ('time_entries', 'revenue')
+
+
+def attach_archives(conn, start_date=None, end_date=None):
+    """Archivierte Jahre eines Zeitraums lesbar einbinden
+
+    Die betroffenen Archivdateien werden per ATTACH eingebunden und
+    ``time_entries``/``revenue`` durch TEMP-Views über Haupt- und
+    Archivdaten verdeckt, sodass bestehende Abfragen unverändert
+    funktionieren. Nur für lesende Verbindungen und vor BEGIN aufrufen.
+    """
+    query = 'SELECT year, path FROM archived_years WHERE 1=1'
+    params = []
+    if start_date:
+        query += ' AND year >= ?'
+        params.append(int(start_date[:4]))
+    if end_date:
+        query += ' AND year <= ?'
+        params.append(int(end_date[:4]))
+    archives = conn.execute(query + ' ORDER BY year', params).fetchall()
+    if not archives:
+        return conn
+
+    for archive in archives:
+        path = archive['path']
+        if not os.path.isabs(path):
+            path = os.path.join(os.path.dirname(os.path.abspath(DB_PATH)), path)
+        conn.execute(f"ATTACH DATABASE ? AS archive_{int(archive['year'])}", (path,))
+
+    for table in ARCHIVED_TABLES:
+        columns = [row['name'] for row in conn.execute(f'PRAGMA main.table_info({table})')]
+        selects = [f"SELECT {', '.join(columns)} FROM main.{table}"]
+        for archive in archives:
+            schema = f"archive_{int(archive['year'])}"
+            archived_columns = {row['name'] for row in conn.execute(f'PRAGMA {schema}.table_info({table})')}
+            # Später ergänzte Spalten fehlen in älteren Archiven
+            select_list = ', '.join(
+                column if column in archived_columns else f'NULL AS {column}' for column in columns
+            )
+            selects.append(f'SELECT {select_list} FROM {schema}.{table}')
+        conn.execute(f"CREATE TEMP VIEW {table} AS {' UNION ALL '.join(selects)}")
+    return conn
+
+
 def compute_commission_for_date(date_str):
     """Berechne Provisionen für einen bestimmten Tag"""
     conn = get_db_connection()
     cursor = conn.cursor()
+    recompute_commission_for_date(cursor, date_str)
+    conn.commit()
+    conn.close()
+
+
+def lookup_commission_threshold(cursor, date_str, employee_count):
+    """Gültige Umsatzschwelle für Wochentag und Besetzung (None = keine passende Schwelle)"""
+    weekday = datetime.strptime(date_str, '%Y-%m-%d').weekday()
+    th = cursor.execute(
+        '''
+            SELECT threshold FROM commission_thresholds
+            WHERE weekday = ? AND employee_count = ? AND valid_from <= ?
+            ORDER BY valid_from DESC
+            LIMIT 1
+        ''',
+        (weekday, employee_count, date_str),
+    ).fetchone()
+    if th:
+        return th['threshold']
+
+    # Ohne konfigurierte Schwellen gilt jeder Umsatz als ausreichend
+    configured_thresholds = cursor.execute(
+        'SELECT COUNT(*) AS cnt FROM commission_thresholds'
+    ).fetchone()['cnt']
+    return 0 if configured_thresholds == 0 else None
 
+
+def recompute_commission_for_date(cursor, date_str):
+    """Berechne Provisionen eines Tages innerhalb einer bestehenden Transaktion"""
     # Umsatz des Tages
     rev = cursor.execute(
         'SELECT amount FROM revenue WHERE date = ?',
@@ -346,65 +888,36 @@ def compute_commission_for_date(date_str):
     eligible_hours = {}
     for emp_id, hours in emp_hours.items():
         previous_hours = get_employee_hours_before(cursor, emp_id, date_str)
-        if previous_hours + hours >= COMMISSION_HOUR_THRESHOLD:
+        if commission_engine.is_eligible(previous_hours, hours):
             eligible_hours[emp_id] = hours
         else:
             ineligible_entry_ids.append(entry_ids[emp_id])
 
-    emp_hours = eligible_hours
-
     employee_count = len(commission_employee_ids)
+    threshold = lookup_commission_threshold(cursor, date_str, employee_count)
+    pool = commission_engine.day_commission_pool(
+        revenue, threshold, percentage, sum(eligible_hours.values())
+    )
 
-    weekday = datetime.strptime(date_str, '%Y-%m-%d').weekday()
-    th = cursor.execute(
-        '''
-            SELECT threshold FROM commission_thresholds
-            WHERE weekday = ? AND employee_count = ? AND valid_from <= ?
-            ORDER BY valid_from DESC
-            LIMIT 1
-        ''',
-        (weekday, employee_count, date_str),
-    ).fetchone()
-    if th:
-        threshold = th['threshold']
-    else:
-        configured_thresholds = cursor.execute(
-            'SELECT COUNT(*) AS cnt FROM commission_thresholds'
-        ).fetchone()['cnt']
-        threshold = 0 if configured_thresholds == 0 else None
+    month_start, month_end = month_date_bounds(int(date_str[:4]), int(date_str[5:7]))
 
-    total_hours = sum(emp_hours.values())
-    total_commission = 0
-    if threshold is not None and revenue >= threshold and total_hours > 0 and percentage > 0:
-        total_commission = revenue * (percentage / 100.0)
+    def month_total(emp_id):
+        row = cursor.execute(
+            '''
+                SELECT SUM(commission) AS total FROM time_entries
+                WHERE employee_id = ? AND date >= ? AND date < ? AND date != ?
+            ''',
+            (emp_id, month_start, month_end, date_str),
+        ).fetchone()
+        return row['total'] or 0
 
+    commissions = commission_engine.split_day_commission(pool, eligible_hours, monthly_max, month_total)
     ids = list(entry_ids.values())
 
-    for emp_id, hours in emp_hours.items():
-        entry_id = entry_ids[emp_id]
-        commission = 0
-        if total_commission > 0:
-            share = hours / total_hours if total_hours else 0
-            raw_commission = total_commission * share
-
-            y, m, _ = date_str.split('-')
-            month_total = cursor.execute(
-                '''
-                    SELECT SUM(commission) AS total FROM time_entries
-                    WHERE employee_id = ?
-                      AND strftime('%Y', date) = ?
-                      AND strftime('%m', date) = ?
-                      AND date != ?
-                ''',
-                (emp_id, y, m, date_str),
-            ).fetchone()
-            month_total = month_total['total'] or 0
-            allowed = max(0, monthly_max - month_total)
-            commission = min(raw_commission, allowed)
-
+    for emp_id, commission in commissions.items():
         cursor.execute(
             'UPDATE time_entries SET commission = ? WHERE id = ?',
-            (round(commission, 2), entry_id),
+            (commission, entry_ids[emp_id]),
         )
 
     for entry_id in ineligible_entry_ids:
@@ -426,8 +939,153 @@ def compute_commission_for_date(date_str):
             'UPDATE time_entries SET commission = 0 WHERE date = ?', (date_str,)
         )
 
-    conn.commit()
-    conn.close()
+def entry_work_hours(entry_type, start_time, end_time, pause_minutes):
+    """Arbeitsstunden eines Eintrags, wie sie in die 160-Stunden-Grenze eingehen"""
+    if entry_type != 'work' or start_time is None or end_time is None:
+        return 0.0
+    return calculate_work_hours(start_time, end_time, pause_minutes)
+
+
+def _employee_day_commissions(cursor, date_str):
+    """Provision je Mitarbeiter an einem Tag"""
+    rows = cursor.execute(
+        '''
+            SELECT employee_id, SUM(COALESCE(commission, 0)) AS total
+            FROM time_entries
+            WHERE date = ?
+            GROUP BY employee_id
+        ''',
+        (date_str,),
+    ).fetchall()
+    return {row['employee_id']: row['total'] for row in rows}
+
+
+def plan_eligibility_dates(cursor, employee_id, deltas):
+    """Spätere Tage, an denen sich die 160-Stunden-Berechtigung durch Stundenänderungen umkehrt
+
+    ``deltas`` ordnet geänderten Tagen die Stundendifferenz (neu - alt) zu.
+    Die Suche endet, sobald alte und neue Summe die Grenze überschritten
+    haben oder sich die Differenzen aufheben.
+    """
+    employee = cursor.execute(
+        'SELECT has_commission FROM employees WHERE id = ?', (employee_id,)
+    ).fetchone()
+    if not employee or not employee['has_commission']:
+        return []
+
+    first_date = min(deltas)
+    last_date = max(deltas)
+    rows = cursor.execute(
+        '''
+            SELECT date, entry_type, start_time, end_time, pause_minutes
+            FROM time_entries
+            WHERE employee_id = ?
+              AND entry_type = 'work'
+              AND start_time IS NOT NULL AND end_time IS NOT NULL
+              AND date >= ?
+            ORDER BY date
+        ''',
+        (employee_id, first_date),
+    ).fetchall()
+
+    hours_by_date = {}
+    for row in rows:
+        hours_by_date.setdefault(row['date'], 0.0)
+        hours_by_date[row['date']] += entry_work_hours(
+            row['entry_type'], row['start_time'], row['end_time'], row['pause_minutes']
+        )
+
+    affected = []
+    new_before = get_employee_hours_before(cursor, employee_id, first_date)
+    shift = 0.0
+    for day in sorted(set(hours_by_date) | set(deltas)):
+        new_hours = hours_by_date.get(day, 0.0)
+        if day not in deltas:
+            if day > last_date:
+                old_before = new_before - shift
+                if abs(shift) < 1e-9 or min(old_before, new_before) >= COMMISSION_HOUR_THRESHOLD:
+                    break
+            new_eligible = new_before + new_hours >= COMMISSION_HOUR_THRESHOLD
+            old_eligible = new_before - shift + new_hours >= COMMISSION_HOUR_THRESHOLD
+            if new_eligible != old_eligible:
+                affected.append(day)
+        shift += deltas.get(day, 0.0)
+        new_before += new_hours
+
+    return affected
+
+
+def recompute_commission_cascade(cursor, changes):
+    """Provisionen der geänderten Tage und aller davon abhängigen späteren Tage neu berechnen
+
+    ``changes`` enthält Tupel (employee_id, date, hours_delta); für reine
+    Umsatzänderungen ist employee_id None. Neu berechnet werden die geänderten
+    Tage, spätere Tage mit umgekehrter 160-Stunden-Berechtigung sowie spätere
+    Tage desselben Monats, solange das Monatsmaximum eines Mitarbeiters greift.
+    Jeder Tag wird höchstens einmal und in aufsteigender Reihenfolge berechnet;
+    Tage abgeschlossener Monate bleiben unverändert.
+    Liefert die sortierte Liste der neu berechneten Tage.
+    """
+    closed_periods = {row['period'] for row in cursor.execute('SELECT period FROM month_snapshots')}
+    deltas_by_employee = {}
+    pending = set()
+    for employee_id, date_str, hours_delta in changes:
+        pending.add(date_str)
+        if employee_id is not None and hours_delta:
+            employee_deltas = deltas_by_employee.setdefault(employee_id, {})
+            employee_deltas[date_str] = employee_deltas.get(date_str, 0.0) + hours_delta
+
+    for employee_id, deltas in deltas_by_employee.items():
+        pending.update(plan_eligibility_dates(cursor, employee_id, deltas))
+
+    settings = cursor.execute(
+        'SELECT monthly_max FROM commission_settings WHERE id = 1'
+    ).fetchone()
+    monthly_max = settings['monthly_max'] if settings else 0
+
+    queue = list(pending)
+    heapq.heapify(queue)
+    done = set()
+    while queue:
+        date_str = heapq.heappop(queue)
+        if date_str in done or date_str[:7] in closed_periods:
+            continue
+        done.add(date_str)
+
+        before = _employee_day_commissions(cursor, date_str)
+        recompute_commission_for_date(cursor, date_str)
+        after = _employee_day_commissions(cursor, date_str)
+
+        month_start, month_end = month_date_bounds(int(date_str[:4]), int(date_str[5:7]))
+        for employee_id in set(before) | set(after):
+            change = after.get(employee_id, 0) - before.get(employee_id, 0)
+            if abs(change) < 0.005:
+                continue
+
+            month_total = cursor.execute(
+                '''
+                    SELECT COALESCE(SUM(commission), 0) AS total FROM time_entries
+                    WHERE employee_id = ? AND date >= ? AND date < ?
+                ''',
+                (employee_id, month_start, month_end),
+            ).fetchone()['total']
+            # Nur wenn das Maximum vorher oder nachher erreicht ist, ändern sich spätere Tage
+            if max(month_total, month_total - change) < monthly_max - 0.01:
+                continue
+
+            later_days = cursor.execute(
+                '''
+                    SELECT DISTINCT date FROM time_entries
+                    WHERE employee_id = ? AND date > ? AND date < ?
+                ''',
+                (employee_id, date_str, month_end),
+            ).fetchall()
+            for row in later_days:
+                if row['date'] not in done:
+                    heapq.heappush(queue, row['date'])
+
+    return sorted(done)
+
 
 # API Endpunkte
 
@@ -469,14 +1127,56 @@ def logout():
     return jsonify({'message': 'Abgemeldet'})
 
 
+def parse_fields_param(allowed, required=('id',)):
+    """Lese fields= und liefere die SELECT-Liste; ValueError bei unbekannten Feldern"""
+    raw = request.args.get('fields')
+    if not raw:
+        names = list(allowed)
+    else:
+        requested = [name.strip() for name in raw.split(',') if name.strip()]
+        unknown = [name for name in requested if name not in allowed]
+        if unknown:
+            raise ValueError(f"Unbekannte Felder: {', '.join(unknown)}")
+        names = list(required) + [name for name in requested if name not in required]
+        names = list(dict.fromkeys(names))
+
+    return ', '.join(
+        allowed[name] if allowed[name] == name else f'{allowed[name]} AS {name}'
+        for name in names
+    )
+
+
+def parse_format_param():
+    """Antwortformat aus format= lesen ('json' oder 'columnar')"""
+    fmt = request.args.get('format') or 'json'
+    if fmt not in ('json', 'columnar'):
+        raise ValueError('format muss json oder columnar sein')
+    return fmt
+
+
+def rows_response(rows, fmt, columns):
+    """JSON-Antwort für Listen, wahlweise spaltenorientiert ({columns, rows})"""
+    if fmt == 'columnar':
+        return jsonify({'columns': columns, 'rows': [list(row) for row in rows]})
+    return jsonify([dict(row) for row in rows])
+
+
 @app.route('/api/employees', methods=['GET'])
 def get_employees():
     """Alle Mitarbeiter abrufen"""
+    try:
+        select_list = parse_fields_param(EMPLOYEE_FIELDS)
+        fmt = parse_format_param()
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
     conn = get_db_connection()
-    employees = conn.execute('SELECT * FROM employees ORDER BY name').fetchall()
+    cursor = conn.execute(f'SELECT {select_list} FROM employees ORDER BY name')
+    columns = [column[0] for column in cursor.description]
+    employees = cursor.fetchall()
     conn.close()
     
-    return jsonify([dict(row) for row in employees])
+    return rows_response(employees, fmt, columns)
 
 @app.route('/api/employees', methods=['POST'])
 def create_employee():
@@ -515,6 +1215,11 @@ def update_employee(employee_id):
     data = request.json
 
     conn = get_db_connection()
+    previous = conn.execute(
+        'SELECT e.has_commission, MIN(te.date) AS first_entry FROM employees e '
+        'LEFT JOIN time_entries te ON te.employee_id = e.id WHERE e.id = ?',
+        (employee_id,),
+    ).fetchone()
     conn.execute(
         'UPDATE employees SET name = ?, contract_hours = ?, has_commission = ?, is_active = ?, start_date = ?, end_date = ? WHERE id = ?',
         (
@@ -529,18 +1234,67 @@ def update_employee(employee_id):
     )
     conn.commit()
     conn.close()
+
+    # Die Provisionsberechtigung bestimmt die Verteilung an allen Tagen mit Einträgen
+    rebuild = None
+    if previous['first_entry'] and bool(previous['has_commission']) != bool(data.get('has_commission', False)):
+        rebuild = request_open_months_rebuild(previous['first_entry'])
     
-    return jsonify({'message': 'Mitarbeiter aktualisiert'})
+    return jsonify({'message': 'Mitarbeiter aktualisiert', 'rebuild': rebuild}), 202 if rebuild else 200
+
+def encode_cursor(date_str, row_id):
+    """Kodiere eine Keyset-Position (Datum, ID) als undurchsichtigen Cursor"""
+    raw = json.dumps([date_str, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Lese einen mit encode_cursor erzeugten Cursor; ValueError bei ungültigen Werten"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date_str, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        datetime.strptime(date_str, '%Y-%m-%d')
+        return date_str, int(row_id)
+    except (TypeError, ValueError, binascii.Error) as exc:
+        raise ValueError('Ungültiger Cursor') from exc
+
+
+def parse_page_limit(value, default, maximum):
+    """Seitengröße aus dem Query-Parameter lesen und serverseitig begrenzen"""
+    if value in (None, ''):
+        return default
+    limit = int(value)
+    if limit < 1:
+        raise ValueError('limit muss positiv sein')
+    return min(limit, maximum)
+
 
 @app.route('/api/time-entries', methods=['GET'])
 def get_time_entries():
-    """Zeiterfassungen abrufen"""
+    """Zeiterfassungen abrufen (seitenweise, neueste zuerst)"""
     employee_id = request.args.get('employee_id')
     month = request.args.get('month')
     year = request.args.get('year')
+    date_from = request.args.get('from')
+    date_to = request.args.get('to')
+    cursor_param = request.args.get('cursor')
+
+    try:
+        limit = parse_page_limit(
+            request.args.get('limit'), TIME_ENTRIES_DEFAULT_LIMIT, TIME_ENTRIES_MAX_LIMIT
+        )
+        for value in (date_from, date_to):
+            if value:
+                datetime.strptime(value, '%Y-%m-%d')
+        position = decode_cursor(cursor_param) if cursor_param else None
+        month_bounds = month_date_bounds(int(year), int(month)) if month and year else None
+        select_list = parse_fields_param(TIME_ENTRY_FIELDS, required=('id', 'date'))
+        fmt = parse_format_param()
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
     
-    query = '''
-        SELECT te.*, e.name as employee_name 
+    query = f'''
+        SELECT {select_list}
         FROM time_entries te 
         JOIN employees e ON te.employee_id = e.id
         WHERE 1=1
@@ -551,155 +1305,124 @@ def get_time_entries():
         query += ' AND te.employee_id = ?'
         params.append(employee_id)
     
-    if month and year:
-        query += ' AND strftime("%m", te.date) = ? AND strftime("%Y", te.date) = ?'
-        params.append(f"{int(month):02d}")
-        params.append(year)
+    if month_bounds:
+        query += ' AND te.date >= ? AND te.date < ?'
+        params.extend(month_bounds)
+
+    if date_from:
+        query += ' AND te.date >= ?'
+        params.append(date_from)
+
+    if date_to:
+        query += ' AND te.date <= ?'
+        params.append(date_to)
+
+    if position:
+        query += ' AND (te.date < ? OR (te.date = ? AND te.id < ?))'
+        params.extend([position[0], position[0], position[1]])
     
-    query += ' ORDER BY te.date DESC'
+    query += ' ORDER BY te.date DESC, te.id DESC LIMIT ?'
+    params.append(limit + 1)
+
+    # Nur die Archive einbinden, die der Zeitraum berührt
+    range_starts = [value for value in (month_bounds and month_bounds[0], date_from) if value]
+    range_ends = [value for value in (month_bounds and month_bounds[1], date_to, position and position[0]) if value]
     
     conn = get_db_connection()
-    entries = conn.execute(query, params).fetchall()
+    attach_archives(conn, max(range_starts, default=None), min(range_ends, default=None))
+    cursor = conn.execute(query, params)
+    columns = [column[0] for column in cursor.description]
+    entries = cursor.fetchall()
     conn.close()
-    
-    return jsonify([dict(row) for row in entries])
 
-@app.route('/api/time-entries', methods=['POST'])
-def create_time_entry():
-    """Neue Zeiterfassung erstellen"""
-    data = request.json
+    response = rows_response(entries[:limit], fmt, columns)
+    if len(entries) > limit:
+        last = entries[limit - 1]
+        response.headers['X-Next-Cursor'] = encode_cursor(last['date'], last['id'])
+    return response
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
+class ApiError(Exception):
+    """Fachlicher Fehler einer Schreiboperation mit HTTP-Statuscode"""
 
-    employee = cursor.execute(
-        'SELECT start_date, end_date FROM employees WHERE id = ?',
-        (data['employee_id'],)
-    ).fetchone()
-    if not employee:
-        conn.close()
-        return jsonify({'error': 'Mitarbeiter nicht gefunden'}), 404
+    def __init__(self, message, status_code=400, details=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        # Zusätzliche Felder der Fehlerantwort, z. B. failed_index im Batch
+        self.details = details or {}
 
-    entry_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
 
-    # Beschäftigungszeitraum prüfen
+MONTH_LOCKED_MESSAGE = 'Der Monat ist abgeschlossen. Änderungen sind nicht mehr möglich.'
+
+
+def _check_employment_period(employee, entry_date):
+    """Prüfe, ob ein Datum im Beschäftigungszeitraum liegt"""
     start = datetime.strptime(employee['start_date'], '%Y-%m-%d').date() if employee['start_date'] else None
     end = datetime.strptime(employee['end_date'], '%Y-%m-%d').date() if employee['end_date'] else None
 
     if (start and entry_date < start) or (end and entry_date > end):
-        conn.close()
         if start and end:
             period = f"{start.isoformat()} bis {end.isoformat()}"
         elif start:
             period = f"ab {start.isoformat()}"
         else:
             period = f"bis {end.isoformat()}"
-        return jsonify({'error': f'Datum außerhalb des Beschäftigungszeitraums ({period})'}), 400
+        raise ApiError(f'Datum außerhalb des Beschäftigungszeitraums ({period})', 400)
 
-    if current_user_is_employee() and is_month_locked_for_employee(data['date']):
-        conn.close()
-        return jsonify({'error': 'Der Monat ist abgeschlossen. Änderungen sind nicht mehr möglich.'}), 403
 
-    # Prüfe ob bereits Eintrag für diesen Tag existiert
-    existing = cursor.execute(
-        'SELECT id FROM time_entries WHERE employee_id = ? AND date = ?',
-        (data['employee_id'], data['date'])
+def _check_month_lock(date_str):
+    """Mitarbeitende dürfen abgeschlossene Monate nicht mehr ändern"""
+    if current_user_is_employee() and is_month_locked_for_employee(date_str):
+        raise ApiError(MONTH_LOCKED_MESSAGE, 403)
+
+
+def _check_not_archived(cursor, date_str):
+    """Archivierte Jahre sind schreibgeschützt"""
+    archived = cursor.execute(
+        'SELECT 1 FROM archived_years WHERE year = ?', (int(str(date_str)[:4]),)
     ).fetchone()
-    
-    if existing:
-        # Update existierenden Eintrag
-        cursor.execute('''
-            UPDATE time_entries SET 
-                entry_type = ?, start_time = ?, end_time = ?, pause_minutes = ?,
-                commission = ?, duftreise_bis_18 = ?, duftreise_ab_18 = ?, notes = ?
-            WHERE id = ?
-        ''', (
-            data.get('entry_type', 'work'),
-            data.get('start_time'),
-            data.get('end_time'),
-            data.get('pause_minutes', 0),
-            data.get('commission', 0.0),
-            data.get('duftreise_bis_18', 0),
-            data.get('duftreise_ab_18', 0),
-            data.get('notes', ''),
-            existing['id']
-        ))
-        entry_id = existing['id']
-    else:
-        # Neuen Eintrag erstellen
-        cursor.execute('''
-            INSERT INTO time_entries 
-            (employee_id, date, entry_type, start_time, end_time, pause_minutes,
-             commission, duftreise_bis_18, duftreise_ab_18, notes)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data['employee_id'],
-            data['date'],
-            data.get('entry_type', 'work'),
-            data.get('start_time'),
-            data.get('end_time'),
-            data.get('pause_minutes', 0),
-            data.get('commission', 0.0),
-            data.get('duftreise_bis_18', 0),
-            data.get('duftreise_ab_18', 0),
-            data.get('notes', '')
-        ))
-        entry_id = cursor.lastrowid
-    
-    conn.commit()
-    conn.close()
+    if archived:
+        raise ApiError(f'Das Jahr {str(date_str)[:4]} ist archiviert. Änderungen sind nicht mehr möglich.', 409)
 
-    # Provision neu berechnen
-    compute_commission_for_date(data['date'])
 
-    return jsonify({'id': entry_id, 'message': 'Zeiterfassung gespeichert'})
+def _check_month_open(cursor, date_str):
+    """Abgeschlossene Monate sind bis zur Wiedereröffnung schreibgeschützt"""
+    period = str(date_str)[:7]
+    closed = cursor.execute('SELECT 1 FROM month_snapshots WHERE period = ?', (period,)).fetchone()
+    if closed:
+        raise ApiError(f'Der Monat {period} ist abgeschlossen. Änderungen sind erst nach Wiedereröffnung möglich.', 409)
 
-@app.route('/api/time-entries/<int:entry_id>', methods=['PUT'])
-def update_time_entry(entry_id):
-    """Zeiterfassung aktualisieren"""
-    data = request.json
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Prüfe ob Eintrag existiert
-    existing = cursor.execute('SELECT * FROM time_entries WHERE id = ?', (entry_id,)).fetchone()
-    
-    if not existing:
-        conn.close()
-        return jsonify({'error': 'Zeiterfassung nicht gefunden'}), 404
 
-    employee = cursor.execute(
-        'SELECT start_date, end_date FROM employees WHERE id = ?',
-        (existing['employee_id'],)
-    ).fetchone()
-    entry_date = datetime.strptime(data.get('date', existing['date']), '%Y-%m-%d').date()
+def _check_expected_version(data, current_version):
+    """Optimistische Sperre: ``expected_version`` muss zur gespeicherten Version passen
 
-    # Beschäftigungszeitraum prüfen
-    start = datetime.strptime(employee['start_date'], '%Y-%m-%d').date() if employee['start_date'] else None
-    end = datetime.strptime(employee['end_date'], '%Y-%m-%d').date() if employee['end_date'] else None
+    Ohne ``expected_version`` wird nicht geprüft. Version 0 bedeutet, dass
+    noch kein Eintrag erwartet wird (Neuanlage).
+    """
+    expected = data.get('expected_version')
+    if expected is None:
+        return
+    try:
+        valid = not isinstance(expected, (bool, float)) and int(expected) >= 0
+    except (TypeError, ValueError):
+        valid = False
+    if not valid:
+        raise ApiError('expected_version muss eine ganze Zahl ab 0 sein', 400)
+    if int(expected) != current_version:
+        raise ApiError(
+            'Der Eintrag wurde inzwischen geändert '
+            f'(Version {current_version}, erwartet {int(expected)}). Bitte neu laden.',
+            409,
+        )
 
-    if (start and entry_date < start) or (end and entry_date > end):
-        conn.close()
-        if start and end:
-            period = f"{start.isoformat()} bis {end.isoformat()}"
-        elif start:
-            period = f"ab {start.isoformat()}"
-        else:
-            period = f"bis {end.isoformat()}"
-        return jsonify({'error': f'Datum außerhalb des Beschäftigungszeitraums ({period})'}), 400
 
-    if current_user_is_employee() and is_month_locked_for_employee(entry_date.isoformat()):
-        conn.close()
-        return jsonify({'error': 'Der Monat ist abgeschlossen. Änderungen sind nicht mehr möglich.'}), 403
+def _time_entry_version(cursor, entry_id):
+    return cursor.execute('SELECT version FROM time_entries WHERE id = ?', (entry_id,)).fetchone()['version']
 
-    # Update Eintrag
-    cursor.execute('''
-        UPDATE time_entries SET 
-            entry_type = ?, start_time = ?, end_time = ?, pause_minutes = ?,
-            commission = ?, duftreise_bis_18 = ?, duftreise_ab_18 = ?, notes = ?
-        WHERE id = ?
-    ''', (
+
+def _time_entry_values(data):
+    """Spaltenwerte einer Zeiterfassung aus den Anfragedaten"""
+    return (
         data.get('entry_type', 'work'),
         data.get('start_time'),
         data.get('end_time'),
@@ -708,42 +1431,187 @@ def update_time_entry(entry_id):
         data.get('duftreise_bis_18', 0),
         data.get('duftreise_ab_18', 0),
         data.get('notes', ''),
-        entry_id
-    ))
-    
-    conn.commit()
-    conn.close()
+    )
 
-    # Provision neu berechnen
-    compute_commission_for_date(entry_date.isoformat())
 
-    return jsonify({'message': 'Zeiterfassung aktualisiert'})
+def _new_entry_hours(data):
+    """Arbeitsstunden, die ein Eintrag mit den Anfragedaten hätte"""
+    return entry_work_hours(
+        data.get('entry_type', 'work'), data.get('start_time'), data.get('end_time'),
+        data.get('pause_minutes', 0),
+    )
 
 
-@app.route('/api/time-entries/<int:entry_id>', methods=['DELETE'])
-def delete_time_entry(entry_id):
-    """Zeiterfassung löschen"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def _existing_entry_hours(row):
+    return entry_work_hours(row['entry_type'], row['start_time'], row['end_time'], row['pause_minutes'])
+
+
+def save_time_entry(cursor, data, changes=None):
+    """Zeiterfassung für Mitarbeiter und Tag anlegen oder überschreiben; liefert (ID, Datum)
+
+    Ist ``changes`` eine Liste, wird (employee_id, Datum, Stundendifferenz)
+    für recompute_commission_cascade angehängt.
+    """
+    employee = cursor.execute(
+        'SELECT start_date, end_date FROM employees WHERE id = ?',
+        (data['employee_id'],)
+    ).fetchone()
+    if not employee:
+        raise ApiError('Mitarbeiter nicht gefunden', 404)
+
+    entry_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+    _check_employment_period(employee, entry_date)
+    _check_month_lock(data['date'])
+    _check_not_archived(cursor, data['date'])
+    _check_month_open(cursor, data['date'])
+
+    # Bisheriger Eintrag des Tages: Version und Stunden für die Neuberechnung
+    existing = cursor.execute(
+        '''
+            SELECT id, entry_type, start_time, end_time, pause_minutes, version
+            FROM time_entries WHERE employee_id = ? AND date = ?
+        ''',
+        (data['employee_id'], data['date'])
+    ).fetchone()
+    _check_expected_version(data, existing['version'] if existing else 0)
+    old_hours = _existing_entry_hours(existing) if existing else 0.0
 
-    entry = cursor.execute('SELECT date FROM time_entries WHERE id = ?', (entry_id,)).fetchone()
+    # Anlegen oder Überschreiben in einer Anweisung über den eindeutigen Index
+    cursor.execute('''
+        INSERT INTO time_entries
+        (employee_id, date, entry_type, start_time, end_time, pause_minutes,
+         commission, duftreise_bis_18, duftreise_ab_18, notes)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (employee_id, date) DO UPDATE SET
+            entry_type = excluded.entry_type, start_time = excluded.start_time,
+            end_time = excluded.end_time, pause_minutes = excluded.pause_minutes,
+            commission = excluded.commission, duftreise_bis_18 = excluded.duftreise_bis_18,
+            duftreise_ab_18 = excluded.duftreise_ab_18, notes = excluded.notes
+    ''', (data['employee_id'], data['date']) + _time_entry_values(data))
+    entry_id = existing['id'] if existing else cursor.lastrowid
+
+    if changes is not None:
+        changes.append((data['employee_id'], data['date'], _new_entry_hours(data) - old_hours))
+    return entry_id, data['date']
+
+
+def update_time_entry_row(cursor, entry_id, data, changes=None):
+    """Bestehende Zeiterfassung aktualisieren; liefert das Datum des Eintrags"""
+    existing = cursor.execute('SELECT * FROM time_entries WHERE id = ?', (entry_id,)).fetchone()
+    if not existing:
+        raise ApiError('Zeiterfassung nicht gefunden', 404)
+
+    employee = cursor.execute(
+        'SELECT start_date, end_date FROM employees WHERE id = ?',
+        (existing['employee_id'],)
+    ).fetchone()
+    entry_date = datetime.strptime(data.get('date', existing['date']), '%Y-%m-%d').date()
+    _check_employment_period(employee, entry_date)
+    _check_month_lock(entry_date.isoformat())
+    _check_not_archived(cursor, entry_date.isoformat())
+    _check_month_open(cursor, existing['date'])
+    _check_month_open(cursor, entry_date.isoformat())
+    _check_expected_version(data, existing['version'])
+
+    cursor.execute('''
+        UPDATE time_entries SET 
+            entry_type = ?, start_time = ?, end_time = ?, pause_minutes = ?,
+            commission = ?, duftreise_bis_18 = ?, duftreise_ab_18 = ?, notes = ?
+        WHERE id = ?
+    ''', _time_entry_values(data) + (entry_id,))
 
+    if changes is not None:
+        changes.append((
+            existing['employee_id'], existing['date'],
+            _new_entry_hours(data) - _existing_entry_hours(existing),
+        ))
+    return entry_date.isoformat()
+
+
+def delete_time_entry_row(cursor, entry_id, changes=None, expected_version=None):
+    """Zeiterfassung löschen; liefert das Datum des gelöschten Eintrags"""
+    entry = cursor.execute('SELECT * FROM time_entries WHERE id = ?', (entry_id,)).fetchone()
     if not entry:
-        conn.close()
-        return jsonify({'error': 'Zeiterfassung nicht gefunden'}), 404
+        raise ApiError('Zeiterfassung nicht gefunden', 404)
+
+    _check_month_lock(entry['date'])
+    _check_month_open(cursor, entry['date'])
+    _check_expected_version({'expected_version': expected_version}, entry['version'])
+    cursor.execute('DELETE FROM time_entries WHERE id = ?', (entry_id,))
+    if changes is not None:
+        changes.append((entry['employee_id'], entry['date'], -_existing_entry_hours(entry)))
+    return entry['date']
+
 
-    entry_date = entry['date']
+@contextmanager
+def immediate_transaction():
+    """Cursor in einer BEGIN-IMMEDIATE-Transaktion: Prüfung, Schreiben und Neuberechnung
 
-    if current_user_is_employee() and is_month_locked_for_employee(entry_date):
+    Die Schreibsperre gilt ab Beginn, gleichzeitige Schreibende warten also
+    vor dem ersten Lesen. Commit nur bei fehlerfreiem Durchlauf, sonst
+    Rollback; die Verbindung wird in jedem Fall geschlossen.
+    """
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        yield cursor
+        conn.commit()
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
         conn.close()
-        return jsonify({'error': 'Der Monat ist abgeschlossen. Änderungen sind nicht mehr möglich.'}), 403
 
-    cursor.execute('DELETE FROM time_entries WHERE id = ?', (entry_id,))
 
-    conn.commit()
-    conn.close()
+@contextmanager
+def request_data_errors():
+    """Fehlende oder falsch typisierte Felder der Anfrage als ApiError 400 melden"""
+    try:
+        yield
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ApiError(f'Ungültige Daten: {exc}', 400) from exc
 
-    compute_commission_for_date(entry_date)
+
+@app.route('/api/time-entries', methods=['POST'])
+def create_time_entry():
+    """Neue Zeiterfassung erstellen"""
+    data = request.json
+
+    with immediate_transaction() as cursor:
+        changes = []
+        with request_data_errors():
+            entry_id, _ = save_time_entry(cursor, data, changes)
+        # Provision des Tages und abhängiger späterer Tage neu berechnen
+        recompute_commission_cascade(cursor, changes)
+        version = _time_entry_version(cursor, entry_id)
+
+    return jsonify({'id': entry_id, 'version': version, 'message': 'Zeiterfassung gespeichert'})
+
+@app.route('/api/time-entries/<int:entry_id>', methods=['PUT'])
+def update_time_entry(entry_id):
+    """Zeiterfassung aktualisieren"""
+    data = request.json
+
+    with immediate_transaction() as cursor:
+        changes = []
+        with request_data_errors():
+            update_time_entry_row(cursor, entry_id, data, changes)
+        # Provision des Tages und abhängiger späterer Tage neu berechnen
+        recompute_commission_cascade(cursor, changes)
+        version = _time_entry_version(cursor, entry_id)
+
+    return jsonify({'version': version, 'message': 'Zeiterfassung aktualisiert'})
+
+
+@app.route('/api/time-entries/<int:entry_id>', methods=['DELETE'])
+def delete_time_entry(entry_id):
+    """Zeiterfassung löschen (optional mit ?expected_version=)"""
+    expected_version = request.args.get('expected_version', type=int)
+    with immediate_transaction() as cursor:
+        changes = []
+        delete_time_entry_row(cursor, entry_id, changes, expected_version)
+        # Provision des Tages und abhängiger späterer Tage neu berechnen
+        recompute_commission_cascade(cursor, changes)
 
     return jsonify({'message': 'Zeiterfassung gelöscht'})
 
@@ -756,8 +1624,14 @@ def get_revenue():
 
     month = request.args.get('month')
     year = request.args.get('year')
+
+    try:
+        select_list = parse_fields_param(REVENUE_FIELDS)
+        fmt = parse_format_param()
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
     
-    query = 'SELECT * FROM revenue WHERE 1=1'
+    query = f'SELECT {select_list} FROM revenue WHERE 1=1'
     params = []
     
     if month and year:
@@ -768,27 +1642,29 @@ def get_revenue():
     query += ' ORDER BY date DESC'
     
     conn = get_db_connection()
-    revenue = conn.execute(query, params).fetchall()
+    if month and year and year.isdigit():
+        attach_archives(conn, f'{year}-01-01', f'{year}-12-31')
+    else:
+        attach_archives(conn)
+    cursor = conn.execute(query, params)
+    columns = [column[0] for column in cursor.description]
+    revenue = cursor.fetchall()
     conn.close()
     
-    return jsonify([dict(row) for row in revenue])
-
-@app.route('/api/revenue', methods=['POST'])
-def create_revenue():
-    """Umsatz für ein Datum erstellen oder aktualisieren"""
-    is_admin = current_user_is_admin()
-    is_employee = current_user_is_employee()
-    if not (is_admin or is_employee):
-        return jsonify({'error': 'Nur Administratoren oder Mitarbeitende dürfen Umsätze bearbeiten'}), 403
+    return rows_response(revenue, fmt, columns)
 
-    data = request.json
+def _require_revenue_write_access():
+    """Nur Administratoren oder Mitarbeitende dürfen Umsätze bearbeiten"""
+    if not (current_user_is_admin() or current_user_is_employee()):
+        raise ApiError('Nur Administratoren oder Mitarbeitende dürfen Umsätze bearbeiten', 403)
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
 
-    if is_employee and is_month_locked_for_employee(data.get('date')):
-        conn.close()
-        return jsonify({'error': 'Der Monat ist abgeschlossen. Änderungen sind nicht mehr möglich.'}), 403
+def save_revenue(cursor, data, changes=None):
+    """Umsatz eines Tages anlegen oder überschreiben; liefert (ID, Datum)"""
+    _require_revenue_write_access()
+    _check_month_lock(data.get('date'))
+    _check_not_archived(cursor, data['date'])
+    _check_month_open(cursor, data['date'])
 
     # Prüfen, ob für das Datum bereits ein Umsatz existiert
     existing = cursor.execute(
@@ -809,13 +1685,815 @@ def create_revenue():
         )
         revenue_id = cursor.lastrowid
 
+    if changes is not None:
+        changes.append((None, data['date'], 0.0))
+    return revenue_id, data['date']
+
+
+def update_revenue_row(cursor, revenue_id, data, changes=None):
+    """Betrag und Notiz eines bestehenden Umsatzes ändern; liefert das Datum"""
+    _require_revenue_write_access()
+    existing = cursor.execute('SELECT date FROM revenue WHERE id = ?', (revenue_id,)).fetchone()
+    if not existing:
+        raise ApiError('Umsatz nicht gefunden', 404)
+
+    _check_month_lock(existing['date'])
+    _check_month_open(cursor, existing['date'])
+    cursor.execute(
+        'UPDATE revenue SET amount = ?, notes = ? WHERE id = ?',
+        (data['amount'], data.get('notes', ''), revenue_id)
+    )
+    if changes is not None:
+        changes.append((None, existing['date'], 0.0))
+    return existing['date']
+
+
+def delete_revenue_row(cursor, revenue_id, changes=None):
+    """Umsatz löschen; liefert das Datum"""
+    _require_revenue_write_access()
+    existing = cursor.execute('SELECT date FROM revenue WHERE id = ?', (revenue_id,)).fetchone()
+    if not existing:
+        raise ApiError('Umsatz nicht gefunden', 404)
+
+    _check_month_lock(existing['date'])
+    _check_month_open(cursor, existing['date'])
+    cursor.execute('DELETE FROM revenue WHERE id = ?', (revenue_id,))
+    if changes is not None:
+        changes.append((None, existing['date'], 0.0))
+    return existing['date']
+
+
+@app.route('/api/revenue', methods=['POST'])
+def create_revenue():
+    """Umsatz für ein Datum erstellen oder aktualisieren"""
+    try:
+        _require_revenue_write_access()
+    except ApiError as exc:
+        return jsonify({'error': exc.message}), exc.status_code
+
+    data = request.json
+
+    with immediate_transaction() as cursor:
+        changes = []
+        with request_data_errors():
+            revenue_id, _ = save_revenue(cursor, data, changes)
+        # Provision des Tages und abhängiger späterer Tage neu berechnen
+        recompute_commission_cascade(cursor, changes)
+
+    return jsonify({'id': revenue_id, 'message': 'Umsatz gespeichert'})
+
+
+MAX_BATCH_OPERATIONS = 200
+
+
+def _apply_batch_operation(cursor, operation, changes):
+    """Führe eine einzelne Batch-Operation aus; liefert (ID, Datum)"""
+    entity = operation.get('entity')
+    op = operation.get('op')
+    row_id = operation.get('id')
+    data = operation.get('data') or {}
+
+    if entity == 'time_entry':
+        if op == 'create':
+            return save_time_entry(cursor, data, changes)
+        if op == 'update':
+            return row_id, update_time_entry_row(cursor, row_id, data, changes)
+        if op == 'delete':
+            return row_id, delete_time_entry_row(cursor, row_id, changes, operation.get('expected_version'))
+    elif entity == 'revenue':
+        if op == 'create':
+            return save_revenue(cursor, data, changes)
+        if op == 'update':
+            return row_id, update_revenue_row(cursor, row_id, data, changes)
+        if op == 'delete':
+            return row_id, delete_revenue_row(cursor, row_id, changes)
+
+    raise ApiError(f'Unbekannte Operation: {entity}/{op}', 400)
+
+
+@app.route('/api/batch', methods=['POST'])
+def batch_operations():
+    """Mehrere Schreiboperationen in einer Transaktion ausführen (alles oder nichts)"""
+    payload = request.json or {}
+    operations = payload.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'operations muss eine nicht-leere Liste sein'}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({'error': f'Höchstens {MAX_BATCH_OPERATIONS} Operationen pro Batch'}), 400
+
+    results = []
+    changes = []
+    with immediate_transaction() as cursor:
+        for index, operation in enumerate(operations):
+            operation = operation if isinstance(operation, dict) else {}
+            try:
+                with request_data_errors():
+                    row_id, row_date = _apply_batch_operation(cursor, operation, changes)
+            except ApiError as exc:
+                exc.details['failed_index'] = index
+                raise
+
+            results.append({
+                'index': index,
+                'entity': operation['entity'],
+                'op': operation['op'],
+                'id': row_id,
+                'date': row_date,
+            })
+
+        # Provision einmal je betroffenem Tag (inkl. abhängiger späterer Tage) neu berechnen
+        recomputed_dates = recompute_commission_cascade(cursor, changes)
+
+    return jsonify({'results': results, 'recomputed_dates': recomputed_dates})
+
+
+# Delta-Sync: Änderungen seit einer Sequenznummer aus change_log
+CHANGES_PAGE_SIZE = 1000
+CHANGE_LOG_COMPACT_INTERVAL = 3600  # Sekunden
+
+_change_log_lock = threading.Lock()
+_change_log_compacted_at = 0.0
+
+
+def compact_change_log(cursor):
+    """Je Datensatz nur den jüngsten Protokolleintrag behalten; liefert die Anzahl gelöschter Einträge
+
+    Clients erhalten ohnehin den aktuellen Stand eines geänderten Datensatzes,
+    ältere Einträge desselben Datensatzes sind daher überflüssig. Ein Client
+    mit beliebig altem ``since`` sieht nach der Verdichtung dieselben Datensätze.
+    """
+    return cursor.execute('''
+        DELETE FROM change_log
+        WHERE seq NOT IN (SELECT MAX(seq) FROM change_log GROUP BY entity, row_id)
+    ''').rowcount
+
+
+def _compact_change_log_if_due():
+    global _change_log_compacted_at
+    with _change_log_lock:
+        if time.monotonic() - _change_log_compacted_at < CHANGE_LOG_COMPACT_INTERVAL:
+            return
+        _change_log_compacted_at = time.monotonic()
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    removed = compact_change_log(cursor)
     conn.commit()
     conn.close()
+    if removed:
+        logger.info('Änderungsprotokoll verdichtet: %s Einträge entfernt', removed)
 
-    # Provision für diesen Tag neu berechnen
-    compute_commission_for_date(data['date'])
 
-    return jsonify({'id': revenue_id, 'message': 'Umsatz gespeichert'})
+def load_changes(cursor, since, limit=CHANGES_PAGE_SIZE):
+    """Aktuelle Datensätze und Löschungen seit ``since`` (innerhalb einer Lesetransaktion)"""
+    log_rows = cursor.execute(
+        '''
+            SELECT entity, row_id, op, MAX(seq) AS seq
+            FROM change_log
+            WHERE seq > ?
+            GROUP BY entity, row_id
+            ORDER BY seq
+            LIMIT ?
+        ''',
+        (since, limit + 1),
+    ).fetchall()
+    has_more = len(log_rows) > limit
+    log_rows = log_rows[:limit]
+
+    if has_more:
+        last_seq = log_rows[-1]['seq']
+    else:
+        last_seq = cursor.execute('SELECT COALESCE(MAX(seq), 0) AS seq FROM change_log').fetchone()['seq']
+        last_seq = max(last_seq, since)
+
+    result = {'since': since, 'last_seq': last_seq, 'has_more': has_more, 'deleted': {}}
+    for entity in CHANGE_LOG_TABLES:
+        ids = [row['row_id'] for row in log_rows if row['entity'] == entity]
+        rows = []
+        for offset in range(0, len(ids), 500):
+            chunk = ids[offset:offset + 500]
+            placeholders = ', '.join('?' for _ in chunk)
+            rows.extend(
+                dict(row)
+                for row in cursor.execute(f'SELECT * FROM main.{entity} WHERE id IN ({placeholders})', chunk)
+            )
+        present = {row['id'] for row in rows}
+        result[entity] = sorted(rows, key=lambda row: row['id'])
+        result['deleted'][entity] = sorted(row_id for row_id in ids if row_id not in present)
+    return result
+
+
+@app.route('/api/changes')
+def get_changes():
+    """Geänderte Zeiterfassungen, Umsätze und Mitarbeitende seit ``since`` (Delta-Sync)
+
+    Der Client merkt sich ``last_seq`` und fragt damit beim nächsten Mal an;
+    solange ``has_more`` gesetzt ist, sofort weiterblättern.
+    """
+    try:
+        since = int(request.args.get('since', 0))
+        limit = parse_page_limit(request.args.get('limit'), CHANGES_PAGE_SIZE, CHANGES_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'since und limit müssen ganze Zahlen sein'}), 400
+    if since < 0:
+        return jsonify({'error': 'since darf nicht negativ sein'}), 400
+
+    _compact_change_log_if_due()
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    # Eine Lesetransaktion, damit Protokoll und Datensätze zusammenpassen
+    cursor.execute('BEGIN')
+    changes = load_changes(cursor, since, limit)
+    conn.rollback()
+    conn.close()
+    return jsonify(changes)
+
+
+# Server-Sent Events: Änderungen an offene Clients dieses Prozesses verteilen
+EVENTS_KEEPALIVE_SECONDS = 15
+EVENTS_QUEUE_SIZE = 256
+
+
+class ChangeBroadcaster:
+    """Verteilt Änderungsmeldungen an alle offenen /api/events-Verbindungen
+
+    Jede Verbindung hat eine eigene, begrenzte Warteschlange. Läuft sie über
+    (langsamer Client), wird sie geleert und erhält stattdessen ein
+    ``resync``-Ereignis, damit der Client seine Daten neu lädt.
+    """
+
+    def __init__(self, queue_size=EVENTS_QUEUE_SIZE):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._queue_size = queue_size
+        self.last_seq = None
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self._queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def has_subscribers(self):
+        with self._lock:
+            return bool(self._subscribers)
+
+    def publish(self, events):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            for event in events:
+                try:
+                    subscriber.put_nowait(event)
+                except queue.Full:
+                    while not subscriber.empty():
+                        try:
+                            subscriber.get_nowait()
+                        except queue.Empty:
+                            break
+                    subscriber.put_nowait({'type': 'resync'})
+                    break
+
+
+BROADCASTER = ChangeBroadcaster()
+_events_publish_lock = threading.Lock()
+
+
+def _change_event(cursor, log_row):
+    """Schlanke Meldung zu einem Protokolleintrag mit dem aktuellen Stand der Zeile"""
+    event = {
+        'type': 'change',
+        'seq': log_row['seq'],
+        'entity': log_row['entity'],
+        'id': log_row['row_id'],
+        'op': log_row['op'],
+        'date': log_row['date'],
+        'row': None,
+    }
+    if log_row['entity'] == 'time_entries':
+        row = cursor.execute(
+            '''
+                SELECT id, employee_id, date, entry_type, start_time, end_time, pause_minutes,
+                       commission, duftreise_bis_18, duftreise_ab_18, notes, version
+                FROM time_entries WHERE id = ?
+            ''',
+            (log_row['row_id'],),
+        ).fetchone()
+        event['row'] = dict(row) if row else None
+    elif log_row['entity'] == 'revenue':
+        row = cursor.execute(
+            'SELECT id, date, amount, notes FROM revenue WHERE id = ?', (log_row['row_id'],)
+        ).fetchone()
+        event['row'] = dict(row) if row else None
+    elif log_row['entity'] == 'employees':
+        row = cursor.execute(
+            f"SELECT {', '.join(EMPLOYEE_FIELDS.values())} FROM employees WHERE id = ?",
+            (log_row['row_id'],),
+        ).fetchone()
+        event['row'] = dict(row) if row else None
+    if event['row'] is None and event['op'] != 'delete':
+        # Zeile wurde inzwischen gelöscht, die Löschung folgt als eigenes Ereignis
+        return None
+    return event
+
+
+def publish_pending_changes():
+    """Neue Einträge aus change_log an die offenen Verbindungen melden
+
+    Ohne Verbindungen wird nichts gelesen; die erste Verbindung setzt den
+    Startpunkt auf den aktuellen Stand des Protokolls.
+    """
+    with _events_publish_lock:
+        if not BROADCASTER.has_subscribers():
+            BROADCASTER.last_seq = None
+            return
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('BEGIN')
+        try:
+            if BROADCASTER.last_seq is None:
+                BROADCASTER.last_seq = cursor.execute(
+                    'SELECT COALESCE(MAX(seq), 0) AS seq FROM change_log'
+                ).fetchone()['seq']
+                return
+
+            log_rows = cursor.execute(
+                '''
+                    SELECT entity, row_id, op, date, MAX(seq) AS seq
+                    FROM change_log WHERE seq > ?
+                    GROUP BY entity, row_id
+                    ORDER BY seq
+                ''',
+                (BROADCASTER.last_seq,),
+            ).fetchall()
+            events = [event for event in (_change_event(cursor, row) for row in log_rows) if event]
+            if log_rows:
+                BROADCASTER.last_seq = log_rows[-1]['seq']
+        finally:
+            conn.rollback()
+            conn.close()
+
+    if events:
+        BROADCASTER.publish(events)
+
+
+@app.after_request
+def publish_changes_after_write(response):
+    """Nach erfolgreichen Schreibzugriffen die Änderungen an offene Clients melden"""
+    if (
+        request.method in ('POST', 'PUT', 'DELETE')
+        and request.path.startswith('/api/')
+        and response.status_code < 400
+    ):
+        publish_pending_changes()
+    return response
+
+
+def _format_sse(event):
+    lines = []
+    if event.get('seq') is not None:
+        lines.append(f"id: {event['seq']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {app.json.dumps(event)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+@app.route('/api/events')
+def event_stream():
+    """Server-Sent-Events-Stream mit Änderungsmeldungen (Zeiterfassungen, Umsätze, Mitarbeitende)"""
+    subscriber = BROADCASTER.subscribe()
+    publish_pending_changes()
+
+    def stream():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    event = subscriber.get(timeout=EVENTS_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    # Kommentarzeile hält Proxys und WLAN-Router von einem Verbindungsabbruch ab
+                    yield ': keepalive\n\n'
+                    continue
+                yield _format_sse(event)
+        finally:
+            BROADCASTER.unsubscribe(subscriber)
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(stream(), mimetype='text/event-stream', headers=headers)
+
+
+# Neuberechnung ganzer Zeiträume (CLI und Admin-Endpunkt)
+REBUILD_WRITE_BATCH = 5000
+# Monate, in die während der Berechnung gebucht wurde, höchstens so oft neu berechnen
+REBUILD_MAX_ATTEMPTS = 3
+
+REBUILD_STATUS = {'state': 'idle'}
+_rebuild_lock = threading.Lock()
+
+
+def load_commission_rules(cursor):
+    """Provisionseinstellungen und Schwellen für Berechnungen im Speicher"""
+    settings = cursor.execute(
+        'SELECT percentage, monthly_max FROM commission_settings WHERE id = 1'
+    ).fetchone()
+    rows = cursor.execute(
+        'SELECT weekday, employee_count, threshold, valid_from FROM commission_thresholds '
+        'ORDER BY valid_from DESC'
+    ).fetchall()
+    return commission_engine.build_rules(
+        settings['percentage'] if settings else 0,
+        settings['monthly_max'] if settings else 0,
+        rows,
+    )
+
+
+def evaluate_month_commissions(month):
+    """Provisionen eines Monats im Speicher berechnen; liefert {entry_id: Provision}
+
+    Entspricht recompute_commission_for_date, wenn der Monat zunächst genullt
+    und danach Tag für Tag aufsteigend berechnet wird. ``month`` enthält
+    ``entries`` (Tupel id, employee_id, date, entry_type, start_time, end_time,
+    pause_minutes in ID-Reihenfolge), ``revenue`` ({Datum: Betrag}),
+    ``hours_before`` (Stunden je Mitarbeiter vor Monatsbeginn),
+    ``commission_employees`` und ``rules`` (siehe commission_engine.build_rules).
+    """
+    commission_employees = month['commission_employees']
+    hours_before = dict(month['hours_before'])
+
+    commissions = {}
+    entries_by_date = {}
+    for entry in month['entries']:
+        commissions[entry[0]] = 0.0
+        entries_by_date.setdefault(entry[2], []).append(entry)
+
+    # Kompakte Zeilen je Mitarbeiter mit Provision und Tag für commission_engine
+    days, revenue = [], []
+    row_day, row_employee, row_hours, row_hours_before, row_entry = [], [], [], [], []
+    for date_str in sorted(entries_by_date):
+        day_hours = {}
+        entry_ids = {}
+        for entry_id, employee_id, _, entry_type, start_time, end_time, pause_minutes in entries_by_date[date_str]:
+            if entry_type != 'work' or start_time is None or end_time is None:
+                continue
+            hours = calculate_work_hours(start_time, end_time, pause_minutes)
+            day_hours[employee_id] = day_hours.get(employee_id, 0.0) + hours
+            if employee_id in commission_employees:
+                entry_ids[employee_id] = entry_id
+
+        if entry_ids:
+            days.append(date_str)
+            revenue.append(month['revenue'].get(date_str, 0))
+            for employee_id, entry_id in entry_ids.items():
+                row_day.append(len(days) - 1)
+                row_employee.append(employee_id)
+                row_hours.append(day_hours[employee_id])
+                row_hours_before.append(hours_before.get(employee_id, 0.0))
+                row_entry.append(entry_id)
+
+        for employee_id, hours in day_hours.items():
+            hours_before[employee_id] = hours_before.get(employee_id, 0.0) + hours
+
+    evaluate = (
+        commission_engine.evaluate_days_batch if commission_engine.np is not None
+        else commission_engine.evaluate_days
+    )
+    values = evaluate(days, row_day, row_employee, row_hours, row_hours_before, revenue, month['rules'])
+    for entry_id, value in zip(row_entry, values):
+        commissions[entry_id] = float(value)
+    return commissions
+
+
+def load_rebuild_months(cursor, start_year, start_month, end_year, end_month):
+    """Alle Daten für die Neuberechnung eines Zeitraums in wenigen Abfragen laden"""
+    range_start, _ = month_date_bounds(start_year, start_month)
+    _, range_end = month_date_bounds(end_year, end_month)
+    rules = load_commission_rules(cursor)
+    commission_employees = {
+        row['id'] for row in cursor.execute('SELECT id FROM employees WHERE has_commission = 1')
+    }
+
+    # Stundenpräfix je Mitarbeiter einmalig: Übertrag archivierter Jahre vor dem Zeitraum,
+    # Einträge vor dem Zeitraum, danach monatsweise
+    hours_before = {
+        row['employee_id']: row['hours']
+        for row in cursor.execute(
+            'SELECT employee_id, SUM(hours) AS hours FROM archived_hours WHERE year < ? GROUP BY employee_id',
+            (start_year,),
+        )
+    }
+    monthly_hours = {}
+    rows = cursor.execute(
+        '''
+            SELECT employee_id, date, start_time, end_time, pause_minutes
+            FROM time_entries
+            WHERE entry_type = 'work'
+              AND start_time IS NOT NULL AND end_time IS NOT NULL
+              AND date < ?
+        ''',
+        (range_end,),
+    )
+    for row in rows:
+        hours = calculate_work_hours(row['start_time'], row['end_time'], row['pause_minutes'])
+        if row['date'] < range_start:
+            hours_before[row['employee_id']] = hours_before.get(row['employee_id'], 0.0) + hours
+        else:
+            key = (row['date'][:7], row['employee_id'])
+            monthly_hours[key] = monthly_hours.get(key, 0.0) + hours
+
+    months = {}
+    for year, month in iter_months(start_year, start_month, end_year, end_month):
+        period = f'{year}-{month:02d}'
+        months[period] = {
+            'period': period,
+            'entries': [],
+            'revenue': {},
+            'hours_before': dict(hours_before),
+            'commission_employees': commission_employees,
+            'rules': rules,
+        }
+        for (hours_period, employee_id), hours in monthly_hours.items():
+            if hours_period == period:
+                hours_before[employee_id] = hours_before.get(employee_id, 0.0) + hours
+
+    rows = cursor.execute(
+        '''
+            SELECT id, employee_id, date, entry_type, start_time, end_time, pause_minutes
+            FROM time_entries
+            WHERE date >= ? AND date < ?
+            ORDER BY date, id
+        ''',
+        (range_start, range_end),
+    )
+    for row in rows:
+        months[row['date'][:7]]['entries'].append(tuple(row))
+    rows = cursor.execute(
+        'SELECT date, amount FROM revenue WHERE date >= ? AND date < ? ORDER BY id',
+        (range_start, range_end),
+    )
+    for row in rows:
+        months[row['date'][:7]]['revenue'][row['date']] = row['amount']
+
+    return [months[period] for period in sorted(months)]
+
+
+def _latest_change_seq(cursor):
+    return cursor.execute('SELECT COALESCE(MAX(seq), 0) AS seq FROM change_log').fetchone()['seq']
+
+
+def _commission_rules_state(cursor):
+    """Aktuelle Einstellungen und Schwellen zum Vergleich zweier Lesestände"""
+    settings = cursor.execute('SELECT percentage, monthly_max FROM commission_settings WHERE id = 1').fetchone()
+    thresholds = cursor.execute(
+        'SELECT weekday, employee_count, threshold, valid_from FROM commission_thresholds '
+        'ORDER BY weekday, employee_count, valid_from'
+    ).fetchall()
+    return tuple(settings or ()), [tuple(row) for row in thresholds]
+
+
+def _month_changed_since(cursor, period, seq):
+    """Hat change_log seit ``seq`` Einträge, die den Monat betreffen?
+
+    Änderungen an Mitarbeitenden (ohne Datum) betreffen jeden Monat.
+    """
+    month_start, month_end = month_date_bounds(int(period[:4]), int(period[5:7]))
+    row = cursor.execute(
+        '''
+            SELECT 1 FROM change_log
+            WHERE seq > ? AND (date IS NULL OR (date >= ? AND date < ?))
+            LIMIT 1
+        ''',
+        (seq, month_start, month_end),
+    ).fetchone()
+    return row is not None
+
+
+def _load_open_rebuild_months(cursor, periods):
+    """Daten der noch offenen Monate unter einem Lesestand
+
+    Liefert (Monate, Lesestand); der Lesestand besteht aus dem change_log-Stand
+    und den dabei gültigen Provisionsregeln.
+    """
+    cursor.execute('BEGIN')
+    try:
+        closed_periods = {row['period'] for row in cursor.execute('SELECT period FROM month_snapshots')}
+        months = []
+        for first, last in periods:
+            months.extend(load_rebuild_months(cursor, *first, *last))
+        state = (_latest_change_seq(cursor), _commission_rules_state(cursor))
+    finally:
+        cursor.connection.rollback()
+    # Abgeschlossene Monate behalten ihre eingefrorenen Provisionen
+    return [month for month in months if month['period'] not in closed_periods], state
+
+
+def _evaluate_rebuild_months(months, workers, progress=None):
+    """Provisionen je Monat berechnen (bei mehreren Monaten im Prozesspool); liefert {Monat: {ID: Provision}}"""
+    results = {}
+    if workers == 1 or len(months) <= 1:
+        for index, month in enumerate(months, start=1):
+            results[month['period']] = evaluate_month_commissions(month)
+            if progress:
+                progress(index, len(months))
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(evaluate_month_commissions, month): month['period'] for month in months}
+        for index, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if progress:
+                progress(index, len(months))
+    return results
+
+
+def _write_rebuild_results(conn, results, snapshot):
+    """Berechnete Provisionen in Stapeln zurückschreiben; liefert (geschrieben, veraltete Monate)
+
+    Vor jedem Stapel wird unter der Schreibsperre geprüft, ob ein Monat
+    inzwischen abgeschlossen wurde (bleibt unverändert) oder seit dem
+    Lesestand Buchungen erhalten hat (wird nicht überschrieben, sondern neu
+    berechnet). Eigene Schreibvorgänge verschieben den Stand des Monats mit.
+    Haben sich die Provisionsregeln geändert, sind alle übrigen Monate veraltet.
+    """
+    snapshot_seq, snapshot_rules = snapshot
+    cursor = conn.cursor()
+    rows = [
+        (period, entry_id, commission)
+        for period, commissions in sorted(results.items())
+        for entry_id, commission in commissions.items()
+    ]
+    seen_seq = dict.fromkeys(results, snapshot_seq)
+    skipped = set()
+    written = 0
+    for offset in range(0, len(rows), REBUILD_WRITE_BATCH):
+        batch = rows[offset:offset + REBUILD_WRITE_BATCH]
+        cursor.execute('BEGIN IMMEDIATE')
+        closed_periods = {row['period'] for row in cursor.execute('SELECT period FROM month_snapshots')}
+        periods = {period for period, _, _ in batch} - skipped
+        if _commission_rules_state(cursor) != snapshot_rules:
+            skipped.update(results)
+        for period in sorted(periods - skipped):
+            if period in closed_periods or _month_changed_since(cursor, period, seen_seq[period]):
+                skipped.add(period)
+        updates = [(commission, entry_id) for period, entry_id, commission in batch if period not in skipped]
+        cursor.executemany('UPDATE time_entries SET commission = ? WHERE id = ?', updates)
+        latest_seq = _latest_change_seq(cursor)
+        for period in periods - skipped:
+            seen_seq[period] = latest_seq
+        conn.commit()
+        written += len(updates)
+
+    closed_periods = {row['period'] for row in cursor.execute('SELECT period FROM month_snapshots')}
+    return written, sorted(skipped - closed_periods)
+
+
+def rebuild_commissions(start_year, start_month, end_year, end_month, workers=None, progress=None):
+    """Provisionen eines Zeitraums vollständig neu berechnen und zurückschreiben
+
+    Monate sind wegen des monatlichen Maximums unabhängig voneinander und werden
+    parallel in einem Prozesspool berechnet; abgeschlossene Monate werden übersprungen. ``progress(fertig, gesamt)`` wird
+    nach jedem Monat aufgerufen. Monate, in die während der Berechnung gebucht
+    wurde, werden nicht mit veralteten Werten überschrieben, sondern erneut
+    berechnet. Liefert die Anzahl geschriebener Einträge.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    archived = cursor.execute(
+        'SELECT year FROM archived_years WHERE year BETWEEN ? AND ? ORDER BY year', (start_year, end_year)
+    ).fetchall()
+    if archived:
+        conn.close()
+        raise ValueError(f"Archivierte Jahre können nicht neu berechnet werden: {archived[0]['year']}")
+
+    try:
+        periods = [((start_year, start_month), (end_year, end_month))]
+        months, snapshot = _load_open_rebuild_months(cursor, periods)
+        results = _evaluate_rebuild_months(months, workers, progress)
+        written, stale = _write_rebuild_results(conn, results, snapshot)
+        for _ in range(REBUILD_MAX_ATTEMPTS - 1):
+            if not stale:
+                break
+            periods = [((int(period[:4]), int(period[5:7])),) * 2 for period in stale]
+            months, snapshot = _load_open_rebuild_months(cursor, periods)
+            results = _evaluate_rebuild_months(months, workers)
+            count, stale = _write_rebuild_results(conn, results, snapshot)
+            written += count
+        if stale:
+            logger.warning(
+                'Neuberechnung: Monate %s wurden laufend geändert und nicht vollständig neu berechnet',
+                ', '.join(stale),
+            )
+    finally:
+        conn.close()
+    return written
+
+
+def _run_rebuild_job(start, end, workers):
+    """Hintergrund-Thread der Neuberechnung; startet anschließend vorgemerkte Regeländerungen"""
+    def report(done, total):
+        with _rebuild_lock:
+            REBUILD_STATUS.update({'months_done': done, 'months_total': total})
+
+    try:
+        updated = rebuild_commissions(*start, *end, workers=workers, progress=report)
+    except Exception as exc:  # Fehler im Status melden statt den Thread stumm zu beenden
+        logging.exception('Neuberechnung der Provisionen fehlgeschlagen')
+        with _rebuild_lock:
+            REBUILD_STATUS.update({
+                'state': 'failed',
+                'error': str(exc),
+                'finished_at': datetime.now().isoformat(timespec='seconds'),
+            })
+        return
+
+    publish_pending_changes()
+    with _rebuild_lock:
+        pending_since = REBUILD_STATUS.pop('pending_since', None)
+        REBUILD_STATUS.update({
+            'state': 'done',
+            'updated_entries': updated,
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+        })
+    if pending_since is not None:
+        request_open_months_rebuild(pending_since)
+
+
+def _start_rebuild_job_locked(start, end, workers=None, **details):
+    """Neuberechnung im Hintergrund starten; ``_rebuild_lock`` muss gehalten werden"""
+    REBUILD_STATUS.clear()
+    REBUILD_STATUS.update({
+        'state': 'running',
+        'from': f'{start[0]:04d}-{start[1]:02d}',
+        'to': f'{end[0]:04d}-{end[1]:02d}',
+        'months_done': 0,
+        'months_total': len(list(iter_months(*start, *end))),
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        **details,
+    })
+    threading.Thread(target=_run_rebuild_job, args=(start, end, workers), daemon=True).start()
+    return dict(REBUILD_STATUS)
+
+
+def request_open_months_rebuild(since=''):
+    """Offene Monate ab ``since`` nach einer Regeländerung im Hintergrund neu berechnen
+
+    Bereichsberichte summieren die gespeicherten Provisionen, die Monatsübersicht
+    rechnet offene Monate neu; nach geänderten Einstellungen, Schwellen oder
+    Provisionsberechtigungen müssen die gespeicherten Werte daher nachgezogen
+    werden. Läuft bereits eine Neuberechnung, wird ``since`` vorgemerkt und im
+    Anschluss berechnet. Liefert den Status oder None, wenn es nichts zu tun gibt.
+    """
+    conn = get_db_connection()
+    span = conn.execute(
+        'SELECT MIN(date) AS first, MAX(date) AS last FROM time_entries WHERE date >= ?', (since,)
+    ).fetchone()
+    conn.close()
+    if not span['first']:
+        return None
+
+    start = (int(span['first'][:4]), int(span['first'][5:7]))
+    end = (int(span['last'][:4]), int(span['last'][5:7]))
+    with _rebuild_lock:
+        if REBUILD_STATUS.get('state') == 'running':
+            pending = REBUILD_STATUS.get('pending_since')
+            REBUILD_STATUS['pending_since'] = since if pending is None else min(pending, since)
+            return dict(REBUILD_STATUS)
+        return _start_rebuild_job_locked(start, end, trigger='rules')
+
+
+@app.route('/api/commission/rebuild', methods=['GET', 'POST'])
+def commission_rebuild():
+    """Neuberechnung eines Zeitraums starten (POST) oder Fortschritt abfragen (GET)"""
+    if not current_user_is_admin():
+        return jsonify({'error': 'Nur Administratoren dürfen Provisionen neu berechnen'}), 403
+
+    if request.method == 'GET':
+        with _rebuild_lock:
+            return jsonify(dict(REBUILD_STATUS))
+
+    data = request.json or {}
+    try:
+        start = parse_year_month(data.get('from'))
+        end = parse_year_month(data.get('to'))
+        workers = int(data['workers']) if data.get('workers') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Ungültiger Zeitraum, erwartet from/to im Format YYYY-MM'}), 400
+    if start > end:
+        return jsonify({'error': 'Der Beginn liegt nach dem Ende des Zeitraums'}), 400
+    if workers is not None and workers < 1:
+        return jsonify({'error': 'workers muss mindestens 1 sein'}), 400
+
+    with _rebuild_lock:
+        if REBUILD_STATUS.get('state') == 'running':
+            return jsonify({'error': 'Es läuft bereits eine Neuberechnung', **REBUILD_STATUS}), 409
+        status = _start_rebuild_job_locked(start, end, workers)
+    return jsonify(status), 202
 
 
 @app.route('/api/commission-settings', methods=['GET', 'POST'])
@@ -843,7 +2521,8 @@ def commission_settings():
     ''', (data.get('percentage', 0), data.get('monthly_max', 0)))
     conn.commit()
     conn.close()
-    return jsonify({'message': 'Einstellungen gespeichert'})
+    rebuild = request_open_months_rebuild()
+    return jsonify({'message': 'Einstellungen gespeichert', 'rebuild': rebuild}), 202 if rebuild else 200
 
 
 @app.route('/api/commission-thresholds', methods=['GET', 'POST'])
@@ -864,6 +2543,7 @@ def commission_thresholds():
         return jsonify([dict(row) for row in rows])
 
     data = request.json
+    valid_from = data.get('valid_from', '1970-01-01')
     cursor.execute('''
         INSERT INTO commission_thresholds (weekday, employee_count, threshold, valid_from)
         VALUES (?, ?, ?, ?)
@@ -873,15 +2553,153 @@ def commission_thresholds():
         data['weekday'],
         data['employee_count'],
         data.get('threshold', 0),
-        data.get('valid_from', '1970-01-01'),
+        valid_from,
     ))
     conn.commit()
     conn.close()
-    return jsonify({'message': 'Schwelle gespeichert'})
+    # Eine Schwelle gilt erst ab valid_from; frühere Tage bleiben unverändert
+    rebuild = request_open_months_rebuild(valid_from)
+    return jsonify({'message': 'Schwelle gespeichert', 'rebuild': rebuild}), 202 if rebuild else 200
+
+
+def _parse_simulation_thresholds(rows):
+    """Schwellenzeilen aus der Simulationsanfrage prüfen"""
+    if not isinstance(rows, list):
+        raise ValueError('thresholds muss eine Liste sein')
+    parsed = []
+    for row in rows:
+        weekday = int(row['weekday'])
+        employee_count = int(row['employee_count'])
+        if not 0 <= weekday <= 6 or employee_count < 0:
+            raise ValueError('Ungültiger Wochentag oder ungültige Besetzung')
+        valid_from = row.get('valid_from') or '1970-01-01'
+        datetime.strptime(valid_from, '%Y-%m-%d')
+        parsed.append({
+            'weekday': weekday,
+            'employee_count': employee_count,
+            'threshold': float(row.get('threshold', 0)),
+            'valid_from': valid_from,
+        })
+    return parsed
+
+
+def simulate_commissions(cursor, start, end, percentage=None, monthly_max=None, threshold_rows=None):
+    """Provisionen eines Zeitraums mit alternativen Regeln berechnen, ohne zu schreiben
+
+    Nicht angegebene Regeln werden aus den aktuellen Einstellungen übernommen.
+    Verglichen wird mit den gespeicherten Provisionen.
+    """
+    current_rules = load_commission_rules(cursor)
+    if threshold_rows is None:
+        threshold_rows = cursor.execute(
+            'SELECT weekday, employee_count, threshold, valid_from FROM commission_thresholds'
+        ).fetchall()
+    rules = commission_engine.build_rules(
+        current_rules['percentage'] if percentage is None else percentage,
+        current_rules['monthly_max'] if monthly_max is None else monthly_max,
+        threshold_rows,
+    )
+
+    months = load_rebuild_months(cursor, *start, *end)
+    range_start, _ = month_date_bounds(*start)
+    _, range_end = month_date_bounds(*end)
+    stored = {
+        row['id']: row['commission'] or 0
+        for row in cursor.execute(
+            'SELECT id, commission FROM time_entries WHERE date >= ? AND date < ?',
+            (range_start, range_end),
+        )
+    }
+    names = {row['id']: row['name'] for row in cursor.execute('SELECT id, name FROM employees')}
+
+    per_employee = {}
+    per_month = []
+    for month in months:
+        month['rules'] = rules
+        simulated = evaluate_month_commissions(month)
+        month_current = 0.0
+        month_simulated = 0.0
+        for entry_id, employee_id, *_ in month['entries']:
+            current_value = stored.get(entry_id, 0)
+            simulated_value = simulated[entry_id]
+            totals = per_employee.setdefault(employee_id, [0.0, 0.0])
+            totals[0] += current_value
+            totals[1] += simulated_value
+            month_current += current_value
+            month_simulated += simulated_value
+        per_month.append({
+            'period': month['period'],
+            'current': round(month_current, 2),
+            'simulated': round(month_simulated, 2),
+            'difference': round(month_simulated - month_current, 2),
+        })
+
+    employees = [
+        {
+            'employee_id': employee_id,
+            'name': names.get(employee_id),
+            'current': round(current_total, 2),
+            'simulated': round(simulated_total, 2),
+            'difference': round(simulated_total - current_total, 2),
+        }
+        for employee_id, (current_total, simulated_total) in per_employee.items()
+        if current_total or simulated_total
+    ]
+    employees.sort(key=lambda item: item['name'] or '')
+
+    total_current = sum(item['current'] for item in per_month)
+    total_simulated = sum(item['simulated'] for item in per_month)
+    return {
+        'settings': {'percentage': rules['percentage'], 'monthly_max': rules['monthly_max']},
+        'employees': employees,
+        'months': per_month,
+        'total': {
+            'current': round(total_current, 2),
+            'simulated': round(total_simulated, 2),
+            'difference': round(total_simulated - total_current, 2),
+        },
+    }
+
+
+@app.route('/api/commission/simulate', methods=['POST'])
+def commission_simulate():
+    """Was-wäre-wenn-Berechnung der Provisionen mit alternativen Einstellungen"""
+    if not current_user_is_admin():
+        return jsonify({'error': 'Nur Administratoren dürfen Provisionen simulieren'}), 403
+
+    data = request.json or {}
+    try:
+        start = parse_year_month(data.get('from'))
+        end = parse_year_month(data.get('to'))
+        settings = data.get('settings') or {}
+        percentage = float(settings['percentage']) if 'percentage' in settings else None
+        monthly_max = float(settings['monthly_max']) if 'monthly_max' in settings else None
+        threshold_rows = (
+            _parse_simulation_thresholds(data['thresholds']) if data.get('thresholds') is not None else None
+        )
+    except (KeyError, TypeError, ValueError, AttributeError) as exc:
+        return jsonify({'error': f'Ungültige Simulationsparameter: {exc}'}), 400
+
+    if start > end:
+        return jsonify({'error': 'Der Beginn liegt nach dem Ende des Zeitraums'}), 400
+    if len(list(iter_months(*start, *end))) > MAX_REPORT_RANGE_MONTHS:
+        return jsonify({'error': f'Höchstens {MAX_REPORT_RANGE_MONTHS} Monate pro Simulation'}), 400
+
+    conn = get_db_connection()
+    attach_archives(conn, month_date_bounds(*start)[0], month_date_bounds(*end)[1])
+    cursor = conn.cursor()
+    cursor.execute('BEGIN')
+    result = simulate_commissions(cursor, start, end, percentage, monthly_max, threshold_rows)
+    conn.rollback()
+    conn.close()
+
+    result.update({'from': data['from'], 'to': data['to']})
+    return jsonify(result)
 
 def fetch_employee_month_entries(employee_id, year, month):
     """Lade Zeiteinträge eines Mitarbeiters für einen bestimmten Monat"""
     conn = get_db_connection()
+    attach_archives(conn, *month_date_bounds(year, month))
     entries = conn.execute(
         '''
             SELECT * FROM time_entries
@@ -940,7 +2758,19 @@ def build_month_summary(entries, contract_hours=None):
 
 
 def get_month_overview(year, month):
-    """Bereite Monatsübersicht für alle aktiven Mitarbeitenden auf"""
+    """Bereite Monatsübersicht für alle aktiven Mitarbeitenden auf
+
+    Abgeschlossene Monate kommen ohne Neuberechnung aus dem Monatsabschluss.
+    """
+    snapshot = load_month_snapshot(year, month)
+    if snapshot is not None:
+        return {
+            'month': month,
+            'year': year,
+            'employees': [item for item in snapshot['employees'] if item['employee']['is_active']],
+            'closed': snapshot['closed'],
+        }
+
     conn = get_db_connection()
     employees = conn.execute(
         'SELECT * FROM employees WHERE is_active = 1 ORDER BY name'
@@ -971,6 +2801,297 @@ def get_month_overview(year, month):
     }
 
 
+# Monatsabschluss: Provisionen und Summen eines Monats einfrieren
+
+def _snapshot_checksum(payload):
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def build_month_snapshot(cursor, year, month):
+    """Provisionen des Monats neu berechnen und die Übersicht als Snapshot aufbauen
+
+    Enthält alle aktiven Mitarbeitenden sowie inaktive mit Einträgen im Monat.
+    Archivierte Monate sind bereits eingefroren und werden nur gelesen.
+    """
+    month_start, month_end = month_date_bounds(year, month)
+    archived = cursor.execute('SELECT 1 FROM archived_years WHERE year = ?', (year,)).fetchone()
+    if not archived:
+        # Wie bei der Neuberechnung: Monat nullen, dann Tage aufsteigend berechnen
+        cursor.execute(
+            'UPDATE time_entries SET commission = 0 WHERE date >= ? AND date < ?', (month_start, month_end)
+        )
+        dates = cursor.execute(
+            'SELECT DISTINCT date FROM time_entries WHERE date >= ? AND date < ? ORDER BY date',
+            (month_start, month_end),
+        ).fetchall()
+        for row in dates:
+            recompute_commission_for_date(cursor, row['date'])
+
+    return {'month': month, 'year': year, 'employees': load_month_employee_reports(cursor, year, month)}
+
+
+def load_month_employee_reports(cursor, year, month):
+    """Stammdaten, Einträge und Summen aller aktiven und im Monat gebuchten Mitarbeitenden
+
+    Zwei Abfragen für den ganzen Monat statt einer je Mitarbeitenden.
+    """
+    month_start, month_end = month_date_bounds(year, month)
+    employees = cursor.execute(
+        '''
+            SELECT * FROM employees
+            WHERE is_active = 1
+               OR id IN (SELECT employee_id FROM time_entries WHERE date >= ? AND date < ?)
+            ORDER BY name
+        ''',
+        (month_start, month_end),
+    ).fetchall()
+    entries_by_employee = {}
+    rows = cursor.execute(
+        'SELECT * FROM time_entries WHERE date >= ? AND date < ? ORDER BY date',
+        (month_start, month_end),
+    )
+    for row in rows:
+        entries_by_employee.setdefault(row['employee_id'], []).append(row)
+
+    reports = []
+    for employee in employees:
+        entries = entries_by_employee.get(employee['id'], [])
+        reports.append({
+            'employee': dict(employee),
+            'entries': [dict(row) for row in entries],
+            'summary': build_month_summary(entries, employee['contract_hours']),
+        })
+    return reports
+
+
+def close_month(year, month, closed_by=None):
+    """Monat abschließen; liefert den Status des Abschlusses"""
+    period = f'{year}-{month:02d}'
+    month_start, month_end = month_date_bounds(year, month)
+    if month_start > date.today().isoformat():
+        raise ApiError('Zukünftige Monate können nicht abgeschlossen werden', 400)
+
+    conn = get_db_connection()
+    attach_archives(conn, month_start, month_end)
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        if cursor.execute('SELECT 1 FROM month_snapshots WHERE period = ?', (period,)).fetchone():
+            raise ApiError(f'Der Monat {period} ist bereits abgeschlossen', 409)
+        snapshot = build_month_snapshot(cursor, year, month)
+        payload = json.dumps(snapshot, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        cursor.execute(
+            'INSERT INTO month_snapshots (period, payload, checksum, closed_by) VALUES (?, ?, ?, ?)',
+            (period, payload, _snapshot_checksum(payload), closed_by),
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    logger.info('Monat %s abgeschlossen (%s)', period, closed_by or 'unbekannt')
+    return get_month_close_status(year, month)
+
+
+def reopen_month(year, month):
+    """Monatsabschluss aufheben; der Snapshot wird verworfen"""
+    period = f'{year}-{month:02d}'
+    conn = get_db_connection()
+    deleted = conn.execute('DELETE FROM month_snapshots WHERE period = ?', (period,)).rowcount
+    conn.commit()
+    conn.close()
+    if not deleted:
+        raise ApiError(f'Der Monat {period} ist nicht abgeschlossen', 404)
+    logger.info('Monat %s wieder geöffnet', period)
+
+
+def get_month_close_status(year, month):
+    """Abschlussstatus eines Monats (ohne die eingefrorenen Daten)"""
+    period = f'{year}-{month:02d}'
+    conn = get_db_connection()
+    row = conn.execute(
+        'SELECT period, checksum, closed_at, closed_by FROM month_snapshots WHERE period = ?', (period,)
+    ).fetchone()
+    conn.close()
+    if not row:
+        return {'period': period, 'closed': False}
+    return {'closed': True, **dict(row)}
+
+
+def load_month_snapshot(year, month):
+    """Eingefrorene Übersicht eines abgeschlossenen Monats oder None
+
+    Die Prüfsumme wird bei jedem Lesen kontrolliert; ein veränderter Snapshot
+    wird nicht ausgeliefert.
+    """
+    conn = get_db_connection()
+    row = conn.execute(
+        'SELECT period, payload, checksum, closed_at, closed_by FROM month_snapshots WHERE period = ?',
+        (f'{year}-{month:02d}',),
+    ).fetchone()
+    conn.close()
+    if not row:
+        return None
+
+    if _snapshot_checksum(row['payload']) != row['checksum']:
+        logger.error('Prüfsumme des Monatsabschlusses %s stimmt nicht', row['period'])
+        raise ApiError(f"Monatsabschluss {row['period']} ist beschädigt (Prüfsumme stimmt nicht)", 500)
+
+    snapshot = json.loads(row['payload'])
+    snapshot['closed'] = {
+        'closed_at': row['closed_at'],
+        'closed_by': row['closed_by'],
+        'checksum': row['checksum'],
+    }
+    return snapshot
+
+
+def find_snapshot_employee(snapshot, employee_id):
+    """Eintrag eines Mitarbeiters im Snapshot oder None"""
+    for item in snapshot['employees']:
+        if item['employee']['id'] == employee_id:
+            return item
+    return None
+
+
+@app.errorhandler(ApiError)
+def handle_api_error(exc):
+    return jsonify({'error': exc.message, **exc.details}), exc.status_code
+
+
+@app.route('/api/months/<int:year>/<int:month>/close', methods=['GET', 'POST'])
+def month_close(year, month):
+    """Abschlussstatus abfragen (GET) oder Monat abschließen (POST)"""
+    if not current_user_is_admin():
+        return jsonify({'error': 'Nur Administratoren dürfen Monate abschließen'}), 403
+    if month < 1 or month > 12:
+        return jsonify({'error': 'Ungültiger Monat'}), 400
+
+    if request.method == 'GET':
+        return jsonify(get_month_close_status(year, month))
+
+    user = get_current_user() or {}
+    return jsonify(close_month(year, month, closed_by=user.get('username')))
+
+
+@app.route('/api/months/<int:year>/<int:month>/reopen', methods=['POST'])
+def month_reopen(year, month):
+    """Monatsabschluss aufheben, danach wird wieder live berechnet"""
+    if not current_user_is_admin():
+        return jsonify({'error': 'Nur Administratoren dürfen Monate wieder öffnen'}), 403
+    if month < 1 or month > 12:
+        return jsonify({'error': 'Ungültiger Monat'}), 400
+
+    reopen_month(year, month)
+    return jsonify(get_month_close_status(year, month))
+
+
+def fetch_monthly_rollup(cursor, start_date, end_date, employee_id=None):
+    """Aggregiere Zeiteinträge je Mitarbeiter und Monat in einer Abfrage"""
+    query = f'''
+        SELECT te.employee_id,
+               strftime('%Y-%m', te.date) AS period,
+               SUM(CASE WHEN {HAS_WORK_TIMES_SQL} THEN {SUMMARY_HOURS_SQL} ELSE 0 END) AS total_hours,
+               SUM(CASE WHEN {HAS_WORK_TIMES_SQL} THEN 1 ELSE 0 END) AS work_days,
+               SUM(CASE WHEN te.entry_type = 'vacation' THEN 1 ELSE 0 END) AS vacation_days,
+               SUM(CASE WHEN te.entry_type = 'sick' THEN 1 ELSE 0 END) AS sick_days,
+               SUM(COALESCE(te.commission, 0)) AS total_commission,
+               SUM(COALESCE(te.duftreise_bis_18, 0)) AS total_duftreise_bis_18,
+               SUM(COALESCE(te.duftreise_ab_18, 0)) AS total_duftreise_ab_18
+        FROM time_entries te
+        WHERE te.date >= ? AND te.date < ?
+    '''
+    params = [start_date, end_date]
+
+    if employee_id is not None:
+        query += ' AND te.employee_id = ?'
+        params.append(employee_id)
+
+    query += ' GROUP BY te.employee_id, period'
+    return cursor.execute(query, params).fetchall()
+
+
+def _rollup_summary(row=None, contract_hours=None):
+    """Wandle eine Rollup-Zeile in das Format von build_month_summary um"""
+    summary = {
+        'total_hours': round(row['total_hours'] or 0, 2) if row else 0,
+        'total_commission': round(row['total_commission'] or 0, 2) if row else 0,
+        'work_days': row['work_days'] if row else 0,
+        'vacation_days': row['vacation_days'] if row else 0,
+        'sick_days': row['sick_days'] if row else 0,
+        'total_duftreise_bis_18': row['total_duftreise_bis_18'] if row else 0,
+        'total_duftreise_ab_18': row['total_duftreise_ab_18'] if row else 0,
+    }
+
+    if contract_hours is not None:
+        summary['contract_hours_month'] = contract_hours * 4.33
+
+    return summary
+
+
+def get_range_report(start_year, start_month, end_year, end_month, employee_id=None):
+    """Monats- und Gesamtsummen für einen Zeitraum aus einem einzigen Rollup"""
+    months = list(iter_months(start_year, start_month, end_year, end_month))
+    start_date, _ = month_date_bounds(start_year, start_month)
+    _, end_date = month_date_bounds(end_year, end_month)
+
+    conn = get_db_connection()
+    attach_archives(conn, start_date, end_date)
+    cursor = conn.cursor()
+    rollup = fetch_monthly_rollup(cursor, start_date, end_date, employee_id)
+
+    if employee_id is not None:
+        employees = cursor.execute(
+            'SELECT * FROM employees WHERE id = ?', (employee_id,)
+        ).fetchall()
+    else:
+        employee_ids = sorted({row['employee_id'] for row in rollup})
+        placeholders = ','.join('?' for _ in employee_ids)
+        condition = f' OR id IN ({placeholders})' if employee_ids else ''
+        employees = cursor.execute(
+            f'SELECT * FROM employees WHERE is_active = 1{condition} ORDER BY name',
+            employee_ids,
+        ).fetchall()
+    conn.close()
+
+    rollup_by_key = {(row['employee_id'], row['period']): row for row in rollup}
+    summary_keys = (
+        'total_hours', 'total_commission', 'work_days', 'vacation_days', 'sick_days',
+        'total_duftreise_bis_18', 'total_duftreise_ab_18',
+    )
+
+    report_employees = []
+    for employee in employees:
+        month_items = []
+        totals = dict.fromkeys(summary_keys, 0)
+
+        for year, month in months:
+            row = rollup_by_key.get((employee['id'], f'{year}-{month:02d}'))
+            summary = _rollup_summary(row, employee['contract_hours'])
+            month_items.append({'year': year, 'month': month, 'summary': summary})
+            if row:
+                for key in summary_keys:
+                    totals[key] += row[key] or 0
+
+        totals['total_hours'] = round(totals['total_hours'], 2)
+        totals['total_commission'] = round(totals['total_commission'], 2)
+        totals['contract_hours_month'] = employee['contract_hours'] * 4.33 * len(months)
+
+        report_employees.append({
+            'employee': dict(employee),
+            'months': month_items,
+            'summary': totals,
+        })
+
+    return {
+        'from': f'{start_year}-{start_month:02d}',
+        'to': f'{end_year}-{end_month:02d}',
+        'employees': report_employees,
+    }
+
+
 def _format_reports_overview_for_pdf(overview):
     """Bereite Daten für den PDF-Export auf."""
     formatted_employees = []
@@ -1036,252 +3157,19 @@ def _format_reports_overview_for_pdf(overview):
     return overview
 
 
-def _render_reports_overview_pdf(
-    prepared_overview, month_name, generated_at, include_details=False
-):
-    """Erzeuge ein PDF-Dokument der Monatsübersicht und liefere dessen Bytes."""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=landscape(A4),
-        leftMargin=15 * mm,
-        rightMargin=15 * mm,
-        topMargin=20 * mm,
-        bottomMargin=20 * mm,
-        title=f"Monatsübersicht {month_name} {prepared_overview.get('year', '')}",
-    )
-
-    styles = getSampleStyleSheet()
-    if 'Small' not in styles:
-        styles.add(
-            ParagraphStyle(name='Small', parent=styles['Normal'], fontSize=9, leading=11)
-        )
-    if 'Italic' not in styles:
-        styles.add(
-            ParagraphStyle(name='Italic', parent=styles['Normal'], fontName='Helvetica-Oblique')
-        )
-    if 'Metric' not in styles:
-        styles.add(
-            ParagraphStyle(
-                name='Metric',
-                parent=styles['Normal'],
-                leading=14,
-                alignment=1,
-                spaceBefore=0,
-                spaceAfter=0,
-            )
-        )
-    if 'EmployeeName' not in styles:
-        styles.add(
-            ParagraphStyle(
-                name='EmployeeName',
-                parent=styles['Normal'],
-                fontSize=12,
-                leading=14,
-                spaceBefore=0,
-                spaceAfter=0,
-            )
-        )
-
-    story = []
-    title_parts = ["Monatsübersicht", month_name, str(prepared_overview.get('year', ''))]
-    title_text = " ".join(part for part in title_parts if part)
-    story.append(Paragraph(title_text.strip(), styles['Title']))
-    story.append(
-        Paragraph(
-            f"Generiert am {generated_at.strftime('%d.%m.%Y %H:%M')}",
-            styles['Small'],
-        )
-    )
-    story.append(Spacer(1, 12))
-
-    def format_decimal(value, suffix=''):
-        if value is None:
-            return '-'
-        try:
-            number = float(value)
-        except (TypeError, ValueError):
-            return str(value)
-        formatted = f"{number:.2f}" if not number.is_integer() else f"{int(number)}"
-        return f"{formatted}{suffix}"
-
-    def format_hours_minutes(value):
-        if value is None:
-            return '-'
-        try:
-            total_minutes = int(round(float(value) * 60))
-        except (TypeError, ValueError):
-            return str(value)
-
-        hours = total_minutes // 60
-        minutes = total_minutes % 60
-        return f"{hours} h {minutes:02d} min"
-
-    for item in prepared_overview.get('employees', []):
-        employee = item.get('employee', {}) or {}
-        summary = item.get('summary', {}) or {}
-        entries = item.get('entries', []) or []
-        employee_name = employee.get('name') or 'Unbekannter Mitarbeitender'
-        safe_employee_name = escape(employee_name)
-        name_paragraph = Paragraph(
-            (
-                "<para alignment='left'><font size='12'><b>{}</b></font><br/>"
-                "<font size='9' color='#555555'>Monatsübersicht</font></para>"
-            ).format(safe_employee_name),
-            styles['EmployeeName'],
-        )
-
-        metrics_config = [
-            ('Gesamtstunden', summary.get('total_hours'), ''),
-            ('Arbeitstage', summary.get('work_days'), ''),
-            ('Urlaubstage', summary.get('vacation_days'), ''),
-            ('Krankheitstage', summary.get('sick_days'), ''),
-            (
-                'Duftreisen vor 18 Uhr',
-                summary.get('total_duftreise_bis_18'),
-                '',
-            ),
-            (
-                'Duftreisen nach 18 Uhr',
-                summary.get('total_duftreise_ab_18'),
-                '',
-            ),
-            ('Provision gesamt', summary.get('total_commission'), ' €'),
-        ]
-
-        metric_cells = []
-        for label, value, suffix in metrics_config:
-            if label == 'Gesamtstunden':
-                metric_value = format_hours_minutes(value)
-            else:
-                metric_value = format_decimal(value, suffix)
-            metric_value = escape(metric_value)
-            metric_label = escape(label)
-            metric_cells.append(
-                Paragraph(
-                    "<para alignment='center'><font size='14'><b>{}</b></font><br/><font size='9' color='#555555'>{}</font></para>".format(
-                        metric_value, metric_label
-                    ),
-                    styles['Metric'],
-                )
-            )
-
-        available_width = doc.width
-        name_col_width = available_width * 0.22
-        if metric_cells:
-            metric_col_width = (available_width - name_col_width) / len(metric_cells)
-        else:
-            metric_col_width = available_width - name_col_width
-
-        summary_row = [name_paragraph] + metric_cells
-        summary_table = Table(
-            [summary_row],
-            colWidths=[name_col_width] + [metric_col_width] * len(metric_cells),
-            hAlign='LEFT',
-        )
-        summary_table.setStyle(
-            TableStyle(
-                [
-                    ('BACKGROUND', (0, 0), (0, 0), colors.HexColor('#EEF2F7')),
-                    ('BACKGROUND', (1, 0), (-1, 0), colors.HexColor('#F9FAFB')),
-                    ('BOX', (0, 0), (-1, -1), 0.6, colors.HexColor('#D8DFEA')),
-                    ('INNERGRID', (1, 0), (-1, -1), 0.4, colors.HexColor('#E5EAF2')),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 10),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-                    ('TOPPADDING', (0, 0), (-1, -1), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
-                ]
-            )
-        )
-        story.append(summary_table)
-
-        if include_details:
-            story.append(Spacer(1, 8))
-
-            if entries:
-                detail_headers = [
-                    'Datum',
-                    'Typ',
-                    'Start',
-                    'Ende',
-                    'Pause',
-                    'Arbeitszeit',
-                    'Duftreisen < 18',
-                    'Duftreisen ≥ 18',
-                    'Provision',
-                    'Notizen',
-                ]
-                detail_rows = [
-                    [Paragraph(f'<b>{escape(header)}</b>', styles['Small']) for header in detail_headers]
-                ]
-
-                for entry in entries:
-                    pause_value = entry.get('pause_minutes')
-                    if pause_value in (None, ''):
-                        pause_display = '-'
-                    else:
-                        pause_display = f"{int(pause_value)} min"
-
-                    detail_rows.append(
-                        [
-                            Paragraph(escape(entry.get('formatted_date') or '-'), styles['Small']),
-                            Paragraph(escape(entry.get('entry_type_label') or '-'), styles['Small']),
-                            Paragraph(escape(entry.get('start_time') or '-'), styles['Small']),
-                            Paragraph(escape(entry.get('end_time') or '-'), styles['Small']),
-                            Paragraph(escape(pause_display), styles['Small']),
-                            Paragraph(
-                                escape(format_hours_minutes(entry.get('calculated_hours'))),
-                                styles['Small'],
-                            ),
-                            Paragraph(
-                                escape(format_decimal(entry.get('duftreise_bis_18'))),
-                                styles['Small'],
-                            ),
-                            Paragraph(
-                                escape(format_decimal(entry.get('duftreise_ab_18'))),
-                                styles['Small'],
-                            ),
-                            Paragraph(
-                                escape(format_decimal(entry.get('commission'), ' €')),
-                                styles['Small'],
-                            ),
-                            Paragraph(escape(entry.get('notes') or '-'), styles['Small']),
-                        ]
-                    )
-
-                column_widths = [
-                    doc.width * width
-                    for width in [0.1, 0.12, 0.08, 0.08, 0.08, 0.1, 0.08, 0.08, 0.1, 0.18]
-                ]
-
-                detail_table = Table(detail_rows, colWidths=column_widths, repeatRows=1)
-                detail_table.setStyle(
-                    TableStyle(
-                        [
-                            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E3E8F0')),
-                            ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#1F2937')),
-                            ('BOX', (0, 0), (-1, -1), 0.4, colors.HexColor('#D1D5DB')),
-                            ('INNERGRID', (0, 0), (-1, -1), 0.25, colors.HexColor('#E5E7EB')),
-                            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                            ('ALIGN', (2, 1), (8, -1), 'CENTER'),
-                            ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                            ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-                            ('TOPPADDING', (0, 0), (-1, -1), 4),
-                            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-                        ]
-                    )
-                )
-                story.append(detail_table)
-            else:
-                story.append(Paragraph('Keine Tagesdaten vorhanden.', styles['Small']))
+def _pdf_reports():
+    """PDF-Modul erst beim ersten PDF importieren (ReportLab ist groß und langsam zu laden)"""
+    import pdf_reports
+    return pdf_reports
 
-        story.append(Spacer(1, 14))
 
-    doc.build(story)
-    return buffer.getvalue()
+def _render_reports_overview_pdf(
+    prepared_overview, month_name, generated_at, include_details=False
+):
+    """Erzeuge ein PDF-Dokument der Monatsübersicht und liefere dessen Bytes."""
+    return _pdf_reports().render_month_overview(
+        prepared_overview, month_name, generated_at, include_details=include_details
+    )
 
 
 def _build_reports_overview_pdf_response(year, month, include_details=False):
@@ -1318,111 +3206,220 @@ def _build_reports_overview_pdf_response(year, month, include_details=False):
 
 def _build_employee_monthly_pdf(employee, entries, summary, year, month):
     """Erzeuge ein PDF für den Monatsbericht eines Mitarbeiters"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, title='Monatsbericht')
-    styles = getSampleStyleSheet()
+    month_name = MONTH_NAMES[month - 1] if 1 <= month <= 12 else str(month)
+    return _pdf_reports().render_employee_month(
+        employee, entries, summary, month_name, year, ENTRY_TYPE_LABELS
+    )
 
+
+def _format_range_label(year, month):
+    """Monatsbezeichnung für Zeitraum-Auswertungen, z. B. 'März 2024'"""
     month_name = MONTH_NAMES[month - 1] if 1 <= month <= 12 else str(month)
-    generated_at = datetime.now().strftime('%d.%m.%Y %H:%M')
+    return f"{month_name} {year}"
+
 
-    story = []
-    title = Paragraph(
-        f"Monatsbericht {escape(employee['name'])} – {escape(month_name)} {year}",
-        styles['Title'],
+def _render_range_report_pdf(report, generated_at):
+    """Erzeuge ein PDF mit Monats- und Gesamtsummen für einen Zeitraum"""
+    start_year, start_month = parse_year_month(report['from'])
+    end_year, end_month = parse_year_month(report['to'])
+    period_label = (
+        f"{_format_range_label(start_year, start_month)} – "
+        f"{_format_range_label(end_year, end_month)}"
     )
-    story.append(title)
-    story.append(Spacer(1, 6 * mm))
-    story.append(Paragraph(f"Generiert am {generated_at} Uhr", styles['Normal']))
-    story.append(Spacer(1, 10 * mm))
-
-    summary_data = [
-        ['Gesamtstunden', f"{summary.get('total_hours', 0):.2f}"],
-        ['Arbeitstage', summary.get('work_days', 0)],
-        ['Urlaubstage', summary.get('vacation_days', 0)],
-        ['Krankheitstage', summary.get('sick_days', 0)],
-        ['Provision gesamt (€)', f"{summary.get('total_commission', 0):.2f}"],
-        ['Duftreisen vor 18 Uhr', summary.get('total_duftreise_bis_18', 0)],
-        ['Duftreisen nach 18 Uhr', summary.get('total_duftreise_ab_18', 0)],
-    ]
+    return _pdf_reports().render_range_report(report, period_label, _format_range_label, generated_at)
 
-    if 'contract_hours_month' in summary:
-        summary_data.append(['Vertragsstunden (Monat)', f"{summary['contract_hours_month']:.2f}"])
 
-    summary_table = Table(summary_data, colWidths=[70 * mm, 50 * mm])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
-        ('BACKGROUND', (0, 0), (-1, -1), colors.whitesmoke),
-    ]))
+def build_dashboard(cursor, reference_date):
+    """Kennzahlen der Startseite über indizierte Datumsbereiche"""
+    today_str = reference_date.isoformat()
+    week_start = reference_date - timedelta(days=reference_date.weekday())
+    week_end = week_start + timedelta(days=7)
+    month_start, month_end = month_date_bounds(reference_date.year, reference_date.month)
+    range_start = min(week_start.isoformat(), month_start)
+    range_end = max(week_end.isoformat(), month_end)
 
-    story.append(summary_table)
-    story.append(Spacer(1, 12 * mm))
+    employees = cursor.execute(
+        'SELECT id, name, contract_hours, has_commission FROM employees WHERE is_active = 1 ORDER BY name'
+    ).fetchall()
 
-    table_header = ['Datum', 'Art', 'Arbeitszeit', 'Pause (Min)', 'Provision (€)', 'Duftreisen', 'Notizen']
-    table_rows = [table_header]
+    # Eine Abfrage über den Bereich Wochenbeginn/Monatsbeginn bis Wochen-/Monatsende
+    hours_rows = cursor.execute(
+        f'''
+            SELECT te.employee_id,
+                   SUM(CASE WHEN te.date >= ? AND te.date < ? AND {HAS_WORK_TIMES_SQL}
+                            THEN {SUMMARY_HOURS_SQL} ELSE 0 END) AS hours_week,
+                   SUM(CASE WHEN te.date >= ? AND te.date < ? AND {HAS_WORK_TIMES_SQL}
+                            THEN {SUMMARY_HOURS_SQL} ELSE 0 END) AS hours_month,
+                   SUM(CASE WHEN te.date >= ? AND te.date <= ?
+                            THEN COALESCE(te.commission, 0) ELSE 0 END) AS commission_mtd
+            FROM time_entries te
+            WHERE te.date >= ? AND te.date < ?
+            GROUP BY te.employee_id
+        ''',
+        (
+            week_start.isoformat(), week_end.isoformat(),
+            month_start, month_end,
+            month_start, today_str,
+            range_start, range_end,
+        ),
+    ).fetchall()
+    hours_by_employee = {row['employee_id']: row for row in hours_rows}
 
-    for entry in entries:
-        entry_date = entry.get('date')
-        formatted_date = ''
-        if entry_date:
-            try:
-                formatted_date = datetime.strptime(entry_date, '%Y-%m-%d').strftime('%d.%m.%Y')
-            except ValueError:
-                formatted_date = entry_date
+    employee_stats = []
+    for employee in employees:
+        row = hours_by_employee.get(employee['id'])
+        employee_stats.append({
+            'employee_id': employee['id'],
+            'name': employee['name'],
+            'hours_week': round(row['hours_week'] or 0, 2) if row else 0,
+            'hours_month': round(row['hours_month'] or 0, 2) if row else 0,
+            'commission_mtd': round(row['commission_mtd'] or 0, 2) if row else 0,
+        })
 
-        entry_type_label = ENTRY_TYPE_LABELS.get(entry.get('entry_type'), entry.get('entry_type', ''))
-        if entry.get('entry_type') == 'work':
-            work_time = ' - '.join(filter(None, [entry.get('start_time'), entry.get('end_time')]))
-        else:
-            work_time = ''
-
-        pause_minutes = entry.get('pause_minutes') or 0
-        commission_value = entry.get('commission') or 0
-        duft_bis = entry.get('duftreise_bis_18') or 0
-        duft_ab = entry.get('duftreise_ab_18') or 0
-        duft_text = ''
-        if duft_bis or duft_ab:
-            duft_text = f"bis 18: {duft_bis}\nab 18: {duft_ab}"
-
-        notes_raw = entry.get('notes') or ''
-        notes_paragraph = Paragraph(escape(notes_raw).replace('\n', '<br/>'), styles['BodyText'])
-
-        table_rows.append([
-            formatted_date,
-            entry_type_label,
-            work_time,
-            pause_minutes,
-            f"{commission_value:.2f}",
-            duft_text,
-            notes_paragraph,
-        ])
+    staffing_rows = cursor.execute(
+        '''
+            SELECT te.employee_id, e.name, e.has_commission, te.entry_type, te.start_time, te.end_time
+            FROM time_entries te
+            JOIN employees e ON te.employee_id = e.id
+            WHERE te.date = ?
+            ORDER BY e.name
+        ''',
+        (today_str,),
+    ).fetchall()
+    commission_staff = {
+        row['employee_id'] for row in staffing_rows
+        if row['has_commission'] and row['entry_type'] == 'work' and row['start_time'] and row['end_time']
+    }
 
-    if len(table_rows) == 1:
-        table_rows.append(['-', '-', '-', '-', '-', '-', Paragraph('Keine Einträge', styles['BodyText'])])
+    revenue_today = cursor.execute(
+        'SELECT amount FROM revenue WHERE date = ?', (today_str,)
+    ).fetchone()
+    revenue_month = cursor.execute(
+        'SELECT COALESCE(SUM(amount), 0) AS total FROM revenue WHERE date >= ? AND date <= ?',
+        (month_start, today_str),
+    ).fetchone()
+    threshold = lookup_commission_threshold(cursor, today_str, len(commission_staff))
+    revenue_amount = revenue_today['amount'] if revenue_today else None
 
-    entry_table = Table(
-        table_rows,
-        colWidths=[22 * mm, 24 * mm, 28 * mm, 24 * mm, 26 * mm, 32 * mm, 60 * mm],
-        repeatRows=1,
-    )
-    entry_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-    ]))
+    return {
+        'date': today_str,
+        'week_start': week_start.isoformat(),
+        'active_employees': len(employees),
+        'with_commission': sum(1 for employee in employees if employee['has_commission']),
+        'contract_hours_week': sum(employee['contract_hours'] or 0 for employee in employees),
+        'hours_week': round(sum(stat['hours_week'] for stat in employee_stats), 2),
+        'hours_month': round(sum(stat['hours_month'] for stat in employee_stats), 2),
+        'commission_mtd': round(sum(stat['commission_mtd'] for stat in employee_stats), 2),
+        'employees': employee_stats,
+        'staffing_today': [
+            {
+                'employee_id': row['employee_id'],
+                'name': row['name'],
+                'entry_type': row['entry_type'],
+                'start_time': row['start_time'],
+                'end_time': row['end_time'],
+            }
+            for row in staffing_rows
+        ],
+        'revenue_today': {
+            'amount': revenue_amount,
+            'threshold': threshold,
+            'commission_employees': len(commission_staff),
+            'threshold_met': (
+                revenue_amount is not None and threshold is not None and revenue_amount >= threshold
+            ),
+        },
+        'revenue_month_to_date': round(revenue_month['total'], 2),
+    }
+
+
+@app.route('/api/dashboard')
+def dashboard():
+    """Kennzahlen für die Startseite (optional zu einem Stichtag ?date=YYYY-MM-DD)"""
+    date_param = request.args.get('date')
+    try:
+        reference_date = datetime.strptime(date_param, '%Y-%m-%d').date() if date_param else date.today()
+    except ValueError:
+        return jsonify({'error': 'Ungültiges Datum, erwartet YYYY-MM-DD'}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('BEGIN')
+    stats = build_dashboard(cursor, reference_date)
+    conn.rollback()
+    conn.close()
+    return jsonify(stats)
+
+
+@app.route('/api/calendar/<int:employee_id>/<int:year>/<int:month>')
+def calendar_bundle(employee_id, year, month):
+    """Alle Daten der Kalenderansicht eines Monats in einer Antwort"""
+    try:
+        month_start, month_end = month_date_bounds(year, month)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    conn = get_db_connection()
+    attach_archives(conn, month_start, month_end)
+    cursor = conn.cursor()
+    # Eine Lesetransaktion, damit Einträge, Umsätze und Summen zusammenpassen
+    cursor.execute('BEGIN')
+    employee = cursor.execute('SELECT * FROM employees WHERE id = ?', (employee_id,)).fetchone()
+    if not employee:
+        conn.rollback()
+        conn.close()
+        return jsonify({'error': 'Mitarbeiter nicht gefunden'}), 404
+
+    entries = cursor.execute(
+        '''
+            SELECT * FROM time_entries
+            WHERE employee_id = ? AND date >= ? AND date < ?
+            ORDER BY date, id
+        ''',
+        (employee_id, month_start, month_end),
+    ).fetchall()
+    revenue = cursor.execute(
+        'SELECT id, date, amount, notes FROM revenue WHERE date >= ? AND date < ? ORDER BY date',
+        (month_start, month_end),
+    ).fetchall()
+    closed = cursor.execute(
+        'SELECT 1 FROM month_snapshots WHERE period = ?', (f'{year}-{month:02d}',)
+    ).fetchone() is not None
+    conn.rollback()
+    conn.close()
 
-    story.append(entry_table)
+    bundle = {
+        'employee': dict(employee),
+        'year': year,
+        'month': month,
+        'entries': [dict(row) for row in entries],
+        'revenue': [dict(row) for row in revenue],
+        'summary': build_month_summary(entries, employee['contract_hours']),
+        'locked': current_user_is_employee() and is_month_locked_for_employee(month_start),
+        'closed': closed,
+    }
 
-    doc.build(story)
-    return buffer.getvalue()
+    response = jsonify(bundle)
+    response.add_etag()
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
 
 
 @app.route('/api/reports/monthly/<int:employee_id>/<int:year>/<int:month>')
 def monthly_report(employee_id, year, month):
     """Monatsbericht für Mitarbeiter"""
+    snapshot = load_month_snapshot(year, month)
+    frozen = find_snapshot_employee(snapshot, employee_id) if snapshot else None
+    if frozen:
+        return jsonify({
+            'employee': frozen['employee'],
+            'month': month,
+            'year': year,
+            'entries': frozen['entries'],
+            'summary': frozen['summary'],
+            'closed': snapshot['closed'],
+        })
+
     conn = get_db_connection()
 
     # Mitarbeiter-Info
@@ -1452,19 +3449,36 @@ def monthly_report(employee_id, year, month):
     return jsonify(report)
 
 
+def _employee_pdf_filename(employee, year, month):
+    """Dateiname des Monatsbericht-PDFs, nur mit unkritischen Zeichen"""
+    safe_name = ''.join(
+        ch for ch in employee['name'] if ch.isalnum() or ch in ('_', '-', '.')
+    ).strip()
+    if not safe_name:
+        safe_name = f"mitarbeiter_{employee['id']}"
+    return f"zeiterfassung_{safe_name}_{year}_{month:02d}.pdf"
+
+
 @app.route('/api/reports/monthly/<int:employee_id>/<int:year>/<int:month>/export/pdf')
 def monthly_report_pdf(employee_id, year, month):
     """Erzeuge ein PDF für den Monatsbericht eines Mitarbeiters"""
-    conn = get_db_connection()
-    employee = conn.execute('SELECT * FROM employees WHERE id = ?', (employee_id,)).fetchone()
-    conn.close()
+    snapshot = load_month_snapshot(year, month)
+    frozen = find_snapshot_employee(snapshot, employee_id) if snapshot else None
+    if frozen:
+        employee = frozen['employee']
+        entries_for_pdf = frozen['entries']
+        summary = frozen['summary']
+    else:
+        conn = get_db_connection()
+        employee = conn.execute('SELECT * FROM employees WHERE id = ?', (employee_id,)).fetchone()
+        conn.close()
 
-    if not employee:
-        return jsonify({'error': 'Mitarbeiter nicht gefunden'}), 404
+        if not employee:
+            return jsonify({'error': 'Mitarbeiter nicht gefunden'}), 404
 
-    entries_rows = fetch_employee_month_entries(employee_id, year, month)
-    summary = build_month_summary(entries_rows, employee['contract_hours'])
-    entries_for_pdf = [dict(row) for row in entries_rows]
+        entries_rows = fetch_employee_month_entries(employee_id, year, month)
+        summary = build_month_summary(entries_rows, employee['contract_hours'])
+        entries_for_pdf = [dict(row) for row in entries_rows]
 
     try:
         pdf_bytes = _build_employee_monthly_pdf(dict(employee), entries_for_pdf, summary, year, month)
@@ -1472,18 +3486,101 @@ def monthly_report_pdf(employee_id, year, month):
         logger.exception('PDF-Erstellung fehlgeschlagen')
         return jsonify({'error': f'PDF-Erstellung fehlgeschlagen: {exc}'}), 500
 
-    safe_name = ''.join(
-        ch for ch in employee['name'] if ch.isalnum() or ch in ('_', '-', '.')
-    ).strip()
-    if not safe_name:
-        safe_name = f'mitarbeiter_{employee_id}'
-
-    filename = f"zeiterfassung_{safe_name}_{year}_{month:02d}.pdf"
+    filename = _employee_pdf_filename(employee, year, month)
     headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
 
     return Response(pdf_bytes, mimetype='application/pdf', headers=headers)
 
 
+class _ZipStream(io.RawIOBase):
+    """Nicht spulbarer Schreibpuffer: zipfile schreibt hinein, take() gibt das Geschriebene ab"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _render_employee_pdf_job(report, year, month):
+    """Prozesspool-Aufgabe: PDF eines Mitarbeiters aus bereits geladenen Daten"""
+    return _build_employee_monthly_pdf(report['employee'], report['entries'], report['summary'], year, month)
+
+
+def iter_monthly_pdf_zip(reports, year, month, workers=None):
+    """ZIP mit einem Monatsbericht-PDF je Mitarbeitenden stückweise erzeugen
+
+    Die PDFs werden parallel in einem Prozesspool gerendert und in der
+    Reihenfolge ihrer Fertigstellung ins Archiv geschrieben. Höchstens
+    ``2 * workers`` PDFs sind gleichzeitig in Arbeit, jedes fertige PDF wird
+    sofort als Teil des ZIP-Stroms ausgegeben.
+    """
+    workers = workers or PDF_EXPORT_WORKERS or os.cpu_count() or 1
+    stream = _ZipStream()
+    pending = {}
+    queue = iter(reports)
+    with ProcessPoolExecutor(max_workers=workers) as executor, \
+            zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as archive:
+        while True:
+            while len(pending) < 2 * workers:
+                report = next(queue, None)
+                if report is None:
+                    break
+                future = executor.submit(_render_employee_pdf_job, report, year, month)
+                pending[future] = _employee_pdf_filename(report['employee'], year, month)
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                filename = pending.pop(future)
+                try:
+                    archive.writestr(filename, future.result())
+                except Exception as exc:  # Ein fehlerhaftes PDF soll nicht das ganze Archiv abbrechen
+                    logger.exception('PDF-Erstellung für %s fehlgeschlagen', filename)
+                    archive.writestr(f'FEHLER_{filename}.txt', f'PDF-Erstellung fehlgeschlagen: {exc}\n')
+                yield stream.take()
+    yield stream.take()
+
+
+@app.route('/api/reports/monthly/<int:year>/<int:month>/export/zip')
+def monthly_reports_zip(year, month):
+    """Monatsberichte aller Mitarbeitenden als ZIP mit je einem PDF"""
+    if not current_user_is_admin():
+        return jsonify({'error': 'Nur Administratoren dürfen Auswertungen exportieren'}), 403
+    if month < 1 or month > 12:
+        return jsonify({'error': 'Ungültiger Monat'}), 400
+
+    # Alle Daten vorab in einem Durchgang laden, der Stream selbst braucht keine Datenbank
+    snapshot = load_month_snapshot(year, month)
+    if snapshot is not None:
+        reports = snapshot['employees']
+    else:
+        month_start, month_end = month_date_bounds(year, month)
+        conn = get_db_connection()
+        attach_archives(conn, month_start, month_end)
+        cursor = conn.cursor()
+        cursor.execute('BEGIN')
+        reports = load_month_employee_reports(cursor, year, month)
+        conn.rollback()
+        conn.close()
+
+    filename = f"monatsberichte_{year}_{month:02d}.zip"
+    headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
+    return Response(iter_monthly_pdf_zip(reports, year, month), mimetype='application/zip', headers=headers)
+
+
+
 @app.route('/api/reports/overview/<int:year>/<int:month>')
 def reports_overview(year, month):
     """Monatliche Übersicht für alle aktiven Mitarbeitenden"""
@@ -1555,18 +3652,653 @@ def reports_overview_export_pdf_detailed(year, month):
         return jsonify({'error': 'Nur Administratoren dürfen Auswertungen exportieren'}), 403
     return _build_reports_overview_pdf_response(year, month, include_details=True)
 
+
+def _parse_report_range_args():
+    """Lese from/to/employee_id für Zeitraum-Auswertungen aus den Query-Parametern"""
+    try:
+        start_year, start_month = parse_year_month(request.args.get('from'))
+        end_year, end_month = parse_year_month(request.args.get('to'))
+    except ValueError:
+        return None, (jsonify({'error': 'Parameter from/to im Format YYYY-MM erforderlich'}), 400)
+
+    if (start_year, start_month) > (end_year, end_month):
+        return None, (jsonify({'error': 'from darf nicht nach to liegen'}), 400)
+
+    month_count = (end_year - start_year) * 12 + (end_month - start_month) + 1
+    if month_count > MAX_REPORT_RANGE_MONTHS:
+        return None, (
+            jsonify({'error': f'Zeitraum darf höchstens {MAX_REPORT_RANGE_MONTHS} Monate umfassen'}),
+            400,
+        )
+
+    employee_id = request.args.get('employee_id')
+    if employee_id:
+        try:
+            employee_id = int(employee_id)
+        except ValueError:
+            return None, (jsonify({'error': 'Ungültige employee_id'}), 400)
+    else:
+        employee_id = None
+
+    return (start_year, start_month, end_year, end_month, employee_id), None
+
+
+def _load_range_report():
+    """Gemeinsame Vorbereitung der Zeitraum-Endpunkte (Rechte, Parameter, Daten)"""
+    if not current_user_is_admin():
+        return None, (jsonify({'error': 'Nur Administratoren dürfen Auswertungen abrufen'}), 403)
+
+    args, error = _parse_report_range_args()
+    if error:
+        return None, error
+
+    report = get_range_report(*args)
+    if args[4] is not None and not report['employees']:
+        return None, (jsonify({'error': 'Mitarbeiter nicht gefunden'}), 404)
+
+    return report, None
+
+
+@app.route('/api/reports/range')
+def reports_range():
+    """Monats- und Gesamtsummen für einen Zeitraum (z. B. ein Jahr)"""
+    report, error = _load_range_report()
+    if error:
+        return error
+    return jsonify(report)
+
+
+@app.route('/api/reports/range/export')
+def reports_range_export():
+    """Exportiere eine Zeitraum-Auswertung als CSV"""
+    report, error = _load_range_report()
+    if error:
+        return error
+
+    output = io.StringIO()
+    writer = csv.writer(output, delimiter=';')
+
+    writer.writerow([
+        'Mitarbeiter',
+        'Monat',
+        'Gesamtstunden',
+        'Arbeitstage',
+        'Urlaubstage',
+        'Krankheitstage',
+        'Duftreisen vor 18 Uhr',
+        'Duftreisen nach 18 Uhr',
+        'Provision',
+        'Vertragliche Stunden',
+    ])
+
+    def write_summary(name, label, summary):
+        writer.writerow([
+            name,
+            label,
+            summary['total_hours'],
+            summary['work_days'],
+            summary['vacation_days'],
+            summary['sick_days'],
+            summary['total_duftreise_bis_18'],
+            summary['total_duftreise_ab_18'],
+            summary['total_commission'],
+            summary.get('contract_hours_month', 0),
+        ])
+
+    for item in report['employees']:
+        name = item['employee']['name']
+        for month_item in item['months']:
+            write_summary(name, f"{month_item['year']}-{month_item['month']:02d}", month_item['summary'])
+        write_summary(name, 'Gesamt', item['summary'])
+
+    filename = f"auswertungen_{report['from']}_{report['to']}.csv"
+    headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
+
+    return Response(output.getvalue(), mimetype='text/csv', headers=headers)
+
+
+@app.route('/api/reports/range/export/pdf')
+def reports_range_export_pdf():
+    """Exportiere eine Zeitraum-Auswertung als PDF"""
+    report, error = _load_range_report()
+    if error:
+        return error
+
+    try:
+        pdf_bytes = _render_range_report_pdf(report, datetime.now())
+    except Exception as exc:
+        logger.exception('PDF-Erstellung fehlgeschlagen')
+        return jsonify({'error': f'PDF-Erstellung fehlgeschlagen: {exc}'}), 500
+
+    filename = f"auswertungen_{report['from']}_{report['to']}.pdf"
+    headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
+
+    return Response(pdf_bytes, mimetype='application/pdf', headers=headers)
+
 # Statische Dateien servieren
+_static_assets = None
+_static_assets_lock = threading.Lock()
+
+
+def _make_static_asset(body, filename, cache_control):
+    """Beschreibe eine statische Datei inkl. ETag und gzip-Variante"""
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    if mimetype.startswith('text/') or mimetype == 'application/javascript':
+        mimetype += '; charset=utf-8'
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+    gzip_body = compressor.compress(body) + compressor.flush()
+    return {
+        'body': body,
+        'gzip_body': gzip_body if len(gzip_body) < len(body) else None,
+        'etag': hashlib.sha256(body).hexdigest()[:32],
+        'mimetype': mimetype,
+        'cache_control': cache_control,
+    }
+
+
+def build_static_assets():
+    """Lese index.html, app.js und sw.js ein, fingerprinte sie per Inhalts-Hash und komprimiere vorab"""
+    assets = {}
+    replacements = {}
+
+    for filename in FINGERPRINTED_ASSETS:
+        with open(os.path.join(STATIC_ROOT, filename), 'rb') as handle:
+            body = handle.read()
+        digest = hashlib.sha256(body).hexdigest()[:12]
+        stem, ext = os.path.splitext(filename)
+        fingerprinted = f'{stem}.{digest}{ext}'
+        replacements[filename] = fingerprinted
+        assets[fingerprinted] = _make_static_asset(body, filename, IMMUTABLE_CACHE_CONTROL)
+        # Unversionierte URL bleibt für ältere, noch zwischengespeicherte Seiten erreichbar
+        assets[filename] = _make_static_asset(body, filename, REVALIDATE_CACHE_CONTROL)
+
+    with open(os.path.join(STATIC_ROOT, 'index.html'), 'rb') as handle:
+        index_body = handle.read().decode('utf-8')
+    for filename, fingerprinted in replacements.items():
+        index_body = index_body.replace(f'src="{filename}"', f'src="/{fingerprinted}"')
+    assets['index.html'] = _make_static_asset(
+        index_body.encode('utf-8'), 'index.html', REVALIDATE_CACHE_CONTROL
+    )
+
+    app_shell = ['/'] + [f'/{name}' for name in replacements.values()]
+    # index.html enthält die fingerprinteten Namen, ihr Hash versioniert also die ganze Shell
+    shell_version = assets['index.html']['etag'][:12]
+    with open(os.path.join(STATIC_ROOT, 'sw.js'), 'rb') as handle:
+        sw_body = handle.read().decode('utf-8')
+    sw_body = sw_body.replace('__CACHE_VERSION__', shell_version)
+    sw_body = sw_body.replace('__APP_SHELL__', json.dumps(app_shell))
+    assets['sw.js'] = _make_static_asset(sw_body.encode('utf-8'), 'sw.js', REVALIDATE_CACHE_CONTROL)
+
+    return assets
+
+
+def get_static_assets():
+    """Statische Dateien einmalig pro Prozess aufbereiten"""
+    global _static_assets
+    if _static_assets is None:
+        with _static_assets_lock:
+            if _static_assets is None:
+                _static_assets = build_static_assets()
+    return _static_assets
+
+
+def _static_asset_response(name):
+    """Antwort für eine vorbereitete statische Datei inkl. ETag und gzip-Variante"""
+    asset = get_static_assets().get(name)
+    if asset is None:
+        abort(404)
+
+    use_gzip = asset['gzip_body'] is not None and 'gzip' in request.accept_encodings
+    response = Response(asset['gzip_body'] if use_gzip else asset['body'], mimetype=asset['mimetype'])
+    response.set_etag(f"{asset['etag']}-gz" if use_gzip else asset['etag'])
+    response.headers['Cache-Control'] = asset['cache_control']
+    if asset['gzip_body'] is not None:
+        response.vary.add('Accept-Encoding')
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response.make_conditional(request)
+
+
 @app.route('/')
 def serve_index():
-    return send_from_directory('.', 'index.html')
+    return _static_asset_response('index.html')
 
 @app.route('/<path:filename>')
 def serve_static(filename):
-    return send_from_directory('.', filename)
+    return _static_asset_response(filename)
+
+def _backup_files():
+    """Vorhandene Sicherungen, älteste zuerst"""
+    if not os.path.isdir(BACKUP_DIR):
+        return []
+    return sorted(
+        name for name in os.listdir(BACKUP_DIR)
+        if name.startswith('zeiterfassung_') and name.endswith('.db.gz')
+    )
+
+
+def create_backup():
+    """Online-Sicherung über die SQLite-Backup-API, gzip-komprimiert und rotiert
+
+    Die Datenbank wird in Schritten zu BACKUP_PAGES_PER_STEP Seiten kopiert;
+    zwischen den Schritten können andere Verbindungen schreiben. Liefert
+    Name, Größe und Dauer der neuen Sicherung.
+    """
+    if not _backup_lock.acquire(blocking=False):
+        raise RuntimeError('Es läuft bereits eine Sicherung')
+
+    started = time.monotonic()
+    with _backup_status_lock:
+        BACKUP_STATUS.update({'running': True, 'started_at': datetime.now().isoformat(timespec='seconds')})
+
+    try:
+        os.makedirs(BACKUP_DIR, exist_ok=True)
+        name = f"zeiterfassung_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.db.gz"
+        target = os.path.join(BACKUP_DIR, name)
+        snapshot = target[:-len('.gz')] + '.tmp'
+
+        source = sqlite3.connect(DB_PATH)
+        destination = sqlite3.connect(snapshot)
+        try:
+            source.backup(
+                destination,
+                pages=BACKUP_PAGES_PER_STEP,
+                progress=lambda status, remaining, total: time.sleep(BACKUP_STEP_SLEEP),
+            )
+            check = destination.execute('PRAGMA quick_check').fetchone()[0]
+        finally:
+            destination.close()
+            source.close()
+        if check != 'ok':
+            os.remove(snapshot)
+            raise RuntimeError(f'Sicherung fehlerhaft: {check}')
+
+        with open(snapshot, 'rb') as raw, gzip.open(target + '.tmp', 'wb', compresslevel=6) as packed:
+            shutil.copyfileobj(raw, packed)
+        os.replace(target + '.tmp', target)
+        os.remove(snapshot)
+
+        # Rotation: nur die neuesten BACKUP_RETENTION Sicherungen behalten
+        files = _backup_files()
+        for old in files[:max(0, len(files) - BACKUP_RETENTION)]:
+            os.remove(os.path.join(BACKUP_DIR, old))
+
+        result = {
+            'file': name,
+            'size_bytes': os.path.getsize(target),
+            'duration_seconds': round(time.monotonic() - started, 3),
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+        }
+    except Exception as exc:
+        with _backup_status_lock:
+            BACKUP_STATUS.update({
+                'running': False,
+                'last_error': str(exc),
+                'last_error_at': datetime.now().isoformat(timespec='seconds'),
+            })
+        raise
+    else:
+        with _backup_status_lock:
+            BACKUP_STATUS.update({'running': False, 'last_success': result, 'last_error': None})
+        return result
+    finally:
+        _backup_lock.release()
+
+
+def _run_backup_in_background():
+    try:
+        create_backup()
+    except Exception:
+        logging.exception('Datenbanksicherung fehlgeschlagen')
+
+
+def start_backup_scheduler():
+    """Sicherungen alle BACKUP_INTERVAL_HOURS Stunden in einem Hintergrund-Thread"""
+    if BACKUP_INTERVAL_HOURS <= 0:
+        return None
+
+    def loop():
+        while not _backup_scheduler_stop.wait(BACKUP_INTERVAL_HOURS * 3600):
+            _run_backup_in_background()
+
+    thread = threading.Thread(target=loop, name='backup-scheduler', daemon=True)
+    thread.start()
+    return thread
+
+
+# Profilmessung einzelner Anfragen (nur Administratoren): mit ?profile=1 oder
+# dem Header X-Profile: 1 läuft genau diese Anfrage unter cProfile und
+# tracemalloc. Ohne Schalter kostet das nur zwei Lookups je Anfrage.
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+PROFILE_RETENTION = int(os.environ.get('PROFILE_RETENTION', 50))
+PROFILE_TOP_ALLOCATIONS = 25
+PROFILE_ID_PATTERN = re.compile(r'^\d{8}_\d{6}_\d{6}$')
+
+# tracemalloc misst prozessweit: immer nur eine Messung gleichzeitig
+_profile_lock = threading.Lock()
+
+
+def _profile_requested():
+    return request.args.get('profile') == '1' or request.headers.get('X-Profile') == '1'
+
+
+@app.before_request
+def start_request_profile():
+    """Profilmessung starten, wenn ein Administrator sie anfordert"""
+    if not _profile_requested() or not current_user_is_admin():
+        return None
+    if not _profile_lock.acquire(blocking=False):
+        return jsonify({'error': 'Es läuft bereits eine Profilmessung'}), 409
+
+    tracemalloc.start()
+    profiler = cProfile.Profile()
+    g.request_profile = {
+        'profiler': profiler,
+        'started_at': datetime.now(),
+        'started': time.perf_counter(),
+    }
+    profiler.enable()
+    return None
+
+
+@app.after_request
+def finish_request_profile(response):
+    """Messung erst nach dem Senden beenden, damit gestreamte Antworten mitzählen"""
+    profile = g.pop('request_profile', None)
+    if profile is None:
+        return response
+
+    metadata = {
+        'method': request.method,
+        'path': request.path,
+        'query': {key: value for key, value in request.args.items() if key != 'profile'},
+        'user': get_current_user().get('username'),
+        'status': response.status_code,
+    }
+    response.call_on_close(lambda: _store_request_profile(profile, metadata))
+    return response
+
+
+@app.teardown_request
+def abandon_request_profile(exc):
+    """Messung trotzdem abschließen, falls after_request nicht mehr lief"""
+    profile = g.pop('request_profile', None)
+    if profile is not None:
+        _store_request_profile(profile, {'method': request.method, 'path': request.path, 'status': 500})
+
+
+def _store_request_profile(profile, metadata):
+    """Messung beenden und .pstats sowie Metadaten mit den größten Allokationen ablegen"""
+    try:
+        profile['profiler'].disable()
+        duration = time.perf_counter() - profile['started']
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        profile_id = profile['started_at'].strftime('%Y%m%d_%H%M%S_%f')
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profile['profiler'].dump_stats(os.path.join(PROFILE_DIR, f'{profile_id}.pstats'))
+
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        allocations = [
+            {
+                'location': f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}',
+                'size_bytes': stat.size,
+                'count': stat.count,
+            }
+            for stat in snapshot.statistics('lineno')[:PROFILE_TOP_ALLOCATIONS]
+        ]
+        metadata = {
+            'id': profile_id,
+            **metadata,
+            'started_at': profile['started_at'].isoformat(timespec='seconds'),
+            'duration_ms': round(duration * 1000, 1),
+            'peak_memory_bytes': peak,
+            'allocations': allocations,
+        }
+        with open(os.path.join(PROFILE_DIR, f'{profile_id}.json'), 'w', encoding='utf-8') as handle:
+            json.dump(metadata, handle, ensure_ascii=False, indent=2)
+
+        # Rotation: nur die neuesten PROFILE_RETENTION Messungen behalten
+        profile_ids = _profile_ids()
+        for old in profile_ids[:max(0, len(profile_ids) - PROFILE_RETENTION)]:
+            for suffix in ('.json', '.pstats'):
+                path = os.path.join(PROFILE_DIR, old + suffix)
+                if os.path.exists(path):
+                    os.remove(path)
+        logger.info('Profilmessung %s für %s %s gespeichert', profile_id, metadata['method'], metadata['path'])
+    except Exception:
+        logging.exception('Profilmessung konnte nicht gespeichert werden')
+    finally:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        _profile_lock.release()
+
+
+def _profile_ids():
+    """Gespeicherte Messungen, älteste zuerst"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    return sorted(
+        name[:-len('.json')] for name in os.listdir(PROFILE_DIR)
+        if name.endswith('.json') and PROFILE_ID_PATTERN.match(name[:-len('.json')])
+    )
+
+
+def _load_profile_metadata(profile_id):
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        raise ApiError('Profilmessung nicht gefunden', 404)
+    path = os.path.join(PROFILE_DIR, f'{profile_id}.json')
+    if not os.path.exists(path):
+        raise ApiError('Profilmessung nicht gefunden', 404)
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def _require_profile_admin():
+    if not current_user_is_admin():
+        raise ApiError('Nur Administratoren dürfen Profilmessungen abrufen', 403)
+
+
+@app.route('/api/profiles')
+def list_profiles():
+    """Gespeicherte Profilmessungen, neueste zuerst (ohne Allokationsliste)"""
+    _require_profile_admin()
+    profiles = []
+    for profile_id in reversed(_profile_ids()):
+        metadata = _load_profile_metadata(profile_id)
+        metadata.pop('allocations', None)
+        profiles.append(metadata)
+    return jsonify({'directory': os.path.abspath(PROFILE_DIR), 'profiles': profiles})
+
+
+@app.route('/api/profiles/<profile_id>')
+def get_profile(profile_id):
+    """Metadaten und größte Allokationsstellen einer Messung"""
+    _require_profile_admin()
+    return jsonify(_load_profile_metadata(profile_id))
+
+
+@app.route('/api/profiles/<profile_id>/pstats')
+def download_profile_stats(profile_id):
+    """cProfile-Daten einer Messung, z. B. für snakeviz oder python -m pstats"""
+    _require_profile_admin()
+    _load_profile_metadata(profile_id)
+    with open(os.path.join(PROFILE_DIR, f'{profile_id}.pstats'), 'rb') as handle:
+        data = handle.read()
+    headers = {'Content-Disposition': f'attachment; filename="profil_{profile_id}.pstats"'}
+    return Response(data, mimetype='application/octet-stream', headers=headers)
+
+
+@app.route('/api/backups', methods=['GET', 'POST'])
+def backups():
+    """Sicherung starten (POST) oder Status und vorhandene Sicherungen abfragen (GET)"""
+    if not current_user_is_admin():
+        return jsonify({'error': 'Nur Administratoren dürfen Sicherungen verwalten'}), 403
+
+    if request.method == 'POST':
+        if _backup_lock.locked():
+            return jsonify({'error': 'Es läuft bereits eine Sicherung'}), 409
+        threading.Thread(target=_run_backup_in_background, daemon=True).start()
+        return jsonify({'message': 'Sicherung gestartet'}), 202
+
+    with _backup_status_lock:
+        status = dict(BACKUP_STATUS)
+    status.update({
+        'directory': os.path.abspath(BACKUP_DIR),
+        'interval_hours': BACKUP_INTERVAL_HOURS,
+        'retention': BACKUP_RETENTION,
+        'backups': [
+            {'file': name, 'size_bytes': os.path.getsize(os.path.join(BACKUP_DIR, name))}
+            for name in reversed(_backup_files())
+        ],
+    })
+    return jsonify(status)
+
+
+def archive_year(year):
+    """Ein abgeschlossenes Jahr in zeiterfassung_<Jahr>.db verschieben
+
+    Zeiteinträge und Umsätze des Jahres wandern in die Archivdatei, in der
+    Hauptdatenbank bleibt je Mitarbeiter die Stundensumme des Jahres für die
+    160-Stunden-Grenze. Jahre müssen der Reihe nach archiviert werden.
+    Liefert die Anzahl verschobener Zeiteinträge und Umsätze.
+    """
+    if year >= date.today().year:
+        raise ValueError('Nur abgeschlossene Jahre können archiviert werden')
+
+    start_date, end_date = f'{year}-01-01', f'{year + 1}-01-01'
+    path = archive_path(year)
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if cursor.execute('SELECT 1 FROM archived_years WHERE year = ?', (year,)).fetchone():
+            raise ValueError(f'Das Jahr {year} ist bereits archiviert')
+        for table in ARCHIVED_TABLES:
+            older = cursor.execute(f'SELECT MIN(date) AS first FROM {table}').fetchone()['first']
+            if older and older < start_date:
+                raise ValueError(f'Bitte zuerst die Jahre vor {year} archivieren')
+        if os.path.exists(path):
+            raise ValueError(f'Die Archivdatei {path} existiert bereits')
+
+        # Archivdatei mit demselben Tabellenaufbau anlegen
+        archive = sqlite3.connect(path)
+        for table in ARCHIVED_TABLES:
+            schema = cursor.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            ).fetchone()['sql']
+            archive.execute(schema)
+            archive.execute(f'CREATE INDEX idx_{table}_date ON {table} (date)')
+        archive.commit()
+        archive.close()
+
+        cursor.execute('ATTACH DATABASE ? AS archive', (path,))
+        cursor.execute('BEGIN IMMEDIATE')
+        hours = {}
+        rows = cursor.execute(
+            '''
+                SELECT employee_id, start_time, end_time, pause_minutes FROM time_entries
+                WHERE entry_type = 'work'
+                  AND start_time IS NOT NULL AND end_time IS NOT NULL
+                  AND date >= ? AND date < ?
+            ''',
+            (start_date, end_date),
+        )
+        for row in rows:
+            hours[row['employee_id']] = hours.get(row['employee_id'], 0.0) + calculate_work_hours(
+                row['start_time'], row['end_time'], row['pause_minutes']
+            )
+        cursor.executemany(
+            'INSERT INTO archived_hours (employee_id, year, hours) VALUES (?, ?, ?)',
+            [(employee_id, year, total) for employee_id, total in hours.items()],
+        )
+
+        moved = {}
+        for table in ARCHIVED_TABLES:
+            cursor.execute(
+                f'INSERT INTO archive.{table} SELECT * FROM main.{table} WHERE date >= ? AND date < ?',
+                (start_date, end_date),
+            )
+            moved[table] = cursor.rowcount
+            cursor.execute(f'DELETE FROM main.{table} WHERE date >= ? AND date < ?', (start_date, end_date))
+        cursor.execute(
+            'INSERT INTO archived_years (year, path) VALUES (?, ?)', (year, os.path.basename(path))
+        )
+        conn.commit()
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    return moved
+
+
+def run_archive_command(args):
+    """CLI: server.py archive --year YYYY"""
+    try:
+        moved = archive_year(args.year)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    print(
+        f"Jahr {args.year} archiviert: {moved['time_entries']} Zeiteinträge, "
+        f"{moved['revenue']} Umsätze nach {archive_path(args.year)}"
+    )
+
+
+def run_recompute_command(args):
+    """CLI: server.py recompute --from YYYY-MM --to YYYY-MM [--workers N]"""
+    try:
+        start = parse_year_month(args.start)
+        end = parse_year_month(args.end)
+    except ValueError:
+        raise SystemExit('Ungültiger Zeitraum, erwartet --from/--to im Format YYYY-MM')
+    if start > end:
+        raise SystemExit('Der Beginn liegt nach dem Ende des Zeitraums')
+
+    def report(done, total):
+        print(f'\r{done}/{total} Monate berechnet', end='', flush=True)
+
+    started = datetime.now()
+    try:
+        updated = rebuild_commissions(*start, *end, workers=args.workers, progress=report)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    seconds = (datetime.now() - started).total_seconds()
+    print(f'\n{updated} Einträge in {seconds:.1f} s neu berechnet')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Arbeitszeiterfassung Server')
+    subparsers = parser.add_subparsers(dest='command')
+    recompute = subparsers.add_parser('recompute', help='Provisionen eines Zeitraums neu berechnen')
+    recompute.add_argument('--from', dest='start', required=True, help='Erster Monat (YYYY-MM)')
+    recompute.add_argument('--to', dest='end', required=True, help='Letzter Monat (YYYY-MM)')
+    recompute.add_argument('--workers', type=int, default=None, help='Anzahl Prozesse (Standard: CPU-Kerne)')
+    subparsers.add_parser('backup', help='Sofort eine Sicherung der Datenbank anlegen')
+    archive = subparsers.add_parser('archive', help='Abgeschlossenes Jahr in eine Archivdatei verschieben')
+    archive.add_argument('--year', type=int, required=True, help='Zu archivierendes Jahr')
+    args = parser.parse_args(argv)
 
-if __name__ == '__main__':
     # Datenbank initialisieren
     init_database()
+
+    if args.command == 'recompute':
+        run_recompute_command(args)
+        return
+    if args.command == 'archive':
+        run_archive_command(args)
+        return
+    if args.command == 'backup':
+        result = create_backup()
+        print(f"Sicherung {result['file']} ({result['size_bytes']} Bytes) in {result['duration_seconds']} s erstellt")
+        return
+
+    get_static_assets()
+    start_backup_scheduler()
     
     # Server starten
     print("Starte Zeiterfassung Server...")
@@ -1574,3 +4306,7 @@ if __name__ == '__main__':
     print(f"Öffne http://localhost:{port} in deinem Browser")
     debug_mode = os.environ.get("FLASK_DEBUG", "0").lower() in ("1", "true")
     app.run(host='0.0.0.0', port=port, debug=debug_mode)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+// Service Worker: hält die App-Shell (index.html + app.js) offline verfügbar.
+// Der Server ersetzt __CACHE_VERSION__ und __APP_SHELL__ beim Start durch den
+// Inhalts-Hash bzw. die fingerprinteten URLs.
+const CACHE_NAME = 'zeiterfassung-shell-__CACHE_VERSION__';
+const APP_SHELL = __APP_SHELL__;
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(CACHE_NAME)
+            .then(cache => cache.addAll(APP_SHELL))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(
+                keys
+                    .filter(key => key.startsWith('zeiterfassung-shell-') && key !== CACHE_NAME)
+                    .map(key => caches.delete(key))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    const url = new URL(request.url);
+
+    if (request.method !== 'GET' || url.origin !== self.location.origin || url.pathname.startsWith('/api/')) {
+        return;
+    }
+
+    if (request.mode === 'navigate') {
+        // Sofort aus dem Cache anzeigen, im Hintergrund aktualisieren
+        event.respondWith(
+            caches.open(CACHE_NAME).then(async cache => {
+                const cached = await cache.match('/');
+                const network = fetch(request)
+                    .then(response => {
+                        if (response.ok) {
+                            cache.put('/', response.clone());
+                        }
+                        return response;
+                    })
+                    .catch(() => cached);
+                return cached || network;
+            })
+        );
+        return;
+    }
+
+    if (APP_SHELL.includes(url.pathname)) {
+        event.respondWith(
+            caches.match(request).then(cached => cached || fetch(request))
+        );
+    }
+});
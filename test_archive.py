@@ -0,0 +1,116 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import server
+
+
+class ArchiveTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        server.DB_PATH = os.path.join(self.tmp_dir, 'zeiterfassung.db')
+        server.init_database()
+
+        conn = server.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('UPDATE commission_settings SET percentage = ?, monthly_max = ? WHERE id = 1', (10, 1000))
+        cursor.execute(
+            'INSERT INTO employees (name, contract_hours, has_commission, is_active, start_date) '
+            'VALUES (?, ?, ?, ?, ?)',
+            ('Anna', 40, 1, 1, '2022-01-01'),
+        )
+        self.employee_id = cursor.lastrowid
+        # Dezember 2022: 19 Tage à 8 Stunden = 152 Stunden, die Grenze wird am 02.01.2023 erreicht
+        dates = [f'2022-12-{day:02d}' for day in range(1, 20)] + ['2023-01-02', '2023-01-03']
+        for entry_date in dates:
+            cursor.execute(
+                '''
+                    INSERT INTO time_entries (
+                        employee_id, date, entry_type, start_time, end_time, pause_minutes,
+                        commission, duftreise_bis_18, duftreise_ab_18, notes
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''',
+                (self.employee_id, entry_date, 'work', '09:00', '17:00', 0, 0, 1, 0, ''),
+            )
+        for entry_date in ('2022-12-01', '2023-01-02', '2023-01-03'):
+            cursor.execute('INSERT INTO revenue (date, amount, notes) VALUES (?, ?, ?)', (entry_date, 500, ''))
+        conn.commit()
+        conn.close()
+        for entry_date in ('2023-01-02', '2023-01-03'):
+            server.compute_commission_for_date(entry_date)
+
+        server.SESSIONS['archive-admin'] = {'username': 'Admin', 'role': 'admin'}
+        self.client = server.app.test_client()
+        self.headers = {'Authorization': 'Bearer archive-admin'}
+
+    def tearDown(self):
+        server.SESSIONS.pop('archive-admin', None)
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_archive_moves_year_and_keeps_hour_carryover(self):
+        moved = server.archive_year(2022)
+        self.assertEqual(moved, {'time_entries': 19, 'revenue': 1})
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, 'zeiterfassung_2022.db')))
+
+        conn = server.get_db_connection()
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM time_entries').fetchone()[0], 2)
+        self.assertEqual(server.get_employee_hours_before(conn.cursor(), self.employee_id, '2023-01-03'), 160)
+        conn.close()
+
+        # Ohne den Übertrag aus dem Archiv gäbe es im Januar keine Provision
+        server.compute_commission_for_date('2023-01-02')
+        server.compute_commission_for_date('2023-01-03')
+        response = self.client.get(
+            f'/api/reports/monthly/{self.employee_id}/2023/1', headers=self.headers
+        )
+        self.assertEqual([entry['commission'] for entry in response.get_json()['entries']], [50, 50])
+
+        with self.assertRaises(ValueError):
+            server.archive_year(2022)
+        with self.assertRaises(ValueError):
+            server.rebuild_commissions(2022, 12, 2023, 1, workers=1)
+
+    def test_reads_attach_archives_and_writes_are_rejected(self):
+        server.archive_year(2022)
+
+        response = self.client.get(
+            f'/api/calendar/{self.employee_id}/2022/12', headers=self.headers
+        )
+        bundle = response.get_json()
+        self.assertEqual(len(bundle['entries']), 19)
+        self.assertEqual(bundle['summary']['total_hours'], 152)
+        self.assertEqual([row['amount'] for row in bundle['revenue']], [500])
+
+        response = self.client.get('/api/time-entries?from=2022-12-18&to=2023-01-02', headers=self.headers)
+        self.assertEqual([entry['date'] for entry in response.get_json()], ['2023-01-02', '2022-12-19', '2022-12-18'])
+
+        response = self.client.get('/api/reports/range?from=2022-12&to=2023-01', headers=self.headers)
+        months = response.get_json()['employees'][0]['months']
+        self.assertEqual([month['summary']['work_days'] for month in months], [19, 2])
+
+        response = self.client.post(
+            '/api/time-entries',
+            json={'employee_id': self.employee_id, 'date': '2022-12-20', 'entry_type': 'work',
+                  'start_time': '09:00', 'end_time': '17:00'},
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 409)
+        response = self.client.post('/api/revenue', json={'date': '2022-12-20', 'amount': 10}, headers=self.headers)
+        self.assertEqual(response.status_code, 409)
+
+    def test_years_must_be_archived_in_order(self):
+        conn = server.get_db_connection()
+        conn.execute(
+            "INSERT INTO revenue (date, amount, notes) VALUES ('2021-06-01', 100, '')"
+        )
+        conn.commit()
+        conn.close()
+        with self.assertRaises(ValueError):
+            server.archive_year(2022)
+        with self.assertRaises(ValueError):
+            server.archive_year(server.date.today().year)
+
+
+if __name__ == '__main__':
+    unittest.main()
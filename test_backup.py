@@ -0,0 +1,88 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+
+import server
+
+
+class BackupTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        server.DB_PATH = os.path.join(self.tmp_dir, 'zeiterfassung.db')
+        server.init_database()
+        self.original_backup = (server.BACKUP_DIR, server.BACKUP_RETENTION)
+        server.BACKUP_DIR = os.path.join(self.tmp_dir, 'backups')
+
+        conn = server.get_db_connection()
+        conn.execute(
+            'INSERT INTO employees (name, contract_hours, has_commission, is_active, start_date) '
+            'VALUES (?, ?, ?, ?, ?)',
+            ('Anna', 40, 0, 1, '2024-01-01'),
+        )
+        conn.commit()
+        conn.close()
+
+        server.SESSIONS['backup-admin'] = {'username': 'Admin', 'role': 'admin'}
+        server.SESSIONS['backup-employee'] = {'username': 'Anna', 'role': 'employee'}
+        self.client = server.app.test_client()
+
+    def tearDown(self):
+        server.SESSIONS.pop('backup-admin', None)
+        server.SESSIONS.pop('backup-employee', None)
+        server.BACKUP_DIR, server.BACKUP_RETENTION = self.original_backup
+        server.BACKUP_STATUS.update({'running': False, 'last_success': None, 'last_error': None})
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def restore(self, name):
+        restored = os.path.join(self.tmp_dir, 'restored.db')
+        with gzip.open(os.path.join(server.BACKUP_DIR, name), 'rb') as packed, open(restored, 'wb') as raw:
+            shutil.copyfileobj(packed, raw)
+        return sqlite3.connect(restored)
+
+    def test_backup_while_writer_holds_transaction(self):
+        writer = sqlite3.connect(server.DB_PATH)
+        writer.execute('BEGIN IMMEDIATE')
+        writer.execute("UPDATE employees SET name = 'Anna B.'")
+        try:
+            result = server.create_backup()
+        finally:
+            writer.commit()
+            writer.close()
+
+        self.assertGreater(result['size_bytes'], 0)
+        restored = self.restore(result['file'])
+        # Die noch nicht bestätigte Änderung ist nicht in der Sicherung
+        self.assertEqual(restored.execute('SELECT name FROM employees').fetchall(), [('Anna',)])
+        restored.close()
+        self.assertEqual(server.BACKUP_STATUS['last_success']['file'], result['file'])
+
+    def test_rotation_keeps_newest_snapshots(self):
+        server.BACKUP_RETENTION = 2
+        names = [server.create_backup()['file'] for _ in range(3)]
+        self.assertEqual(sorted(os.listdir(server.BACKUP_DIR)), names[1:])
+
+    def test_admin_endpoints(self):
+        employee = {'Authorization': 'Bearer backup-employee'}
+        admin = {'Authorization': 'Bearer backup-admin'}
+        self.assertEqual(self.client.post('/api/backups', headers=employee).status_code, 403)
+
+        self.assertEqual(self.client.post('/api/backups', headers=admin).status_code, 202)
+        deadline = time.monotonic() + 10
+        status = {}
+        while time.monotonic() < deadline:
+            status = self.client.get('/api/backups', headers=admin).get_json()
+            if status['last_success']:
+                break
+            time.sleep(0.05)
+
+        self.assertEqual(len(status['backups']), 1)
+        self.assertEqual(status['backups'][0]['file'], status['last_success']['file'])
+        self.assertIn('duration_seconds', status['last_success'])
+
+
+if __name__ == '__main__':
+    unittest.main()
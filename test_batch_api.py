@@ -0,0 +1,129 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import server
+
+
+class BatchApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_db = tempfile.NamedTemporaryFile(delete=False)
+        self.tmp_db.close()
+        server.DB_PATH = self.tmp_db.name
+        if os.path.exists(server.DB_PATH):
+            os.remove(server.DB_PATH)
+        server.init_database()
+
+        conn = server.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            'UPDATE commission_settings SET percentage = 10, monthly_max = 10000 WHERE id = 1'
+        )
+        cursor.execute(
+            '''
+                INSERT INTO employees (
+                    name, contract_hours, has_commission, is_active, start_date
+                ) VALUES (?, ?, ?, ?, ?)
+            ''',
+            ('Batch Employee', 40, 1, 1, '2024-01-01'),
+        )
+        self.employee_id = cursor.lastrowid
+        # 160 Stunden Vorarbeit im Januar
+        for day in range(1, 17):
+            cursor.execute(
+                '''
+                    INSERT INTO time_entries (
+                        employee_id, date, entry_type, start_time, end_time, pause_minutes,
+                        commission, duftreise_bis_18, duftreise_ab_18, notes
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''',
+                (self.employee_id, f'2024-01-{day:02d}', 'work', '08:00', '18:00', 0, 0, 0, 0, ''),
+            )
+        conn.commit()
+        conn.close()
+
+        server.SESSIONS['batch-admin'] = {'username': 'Admin', 'role': 'admin'}
+        server.SESSIONS['batch-employee'] = {'username': 'Mitarbeiter', 'role': 'employee'}
+        self.client = server.app.test_client()
+
+    def tearDown(self):
+        server.SESSIONS.pop('batch-admin', None)
+        server.SESSIONS.pop('batch-employee', None)
+        if os.path.exists(self.tmp_db.name):
+            os.remove(self.tmp_db.name)
+
+    def post_batch(self, operations, token='batch-admin'):
+        return self.client.post(
+            '/api/batch',
+            json={'operations': operations},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    def fetch_entries(self, month_prefix):
+        conn = server.get_db_connection()
+        rows = conn.execute(
+            'SELECT date, commission FROM time_entries WHERE date LIKE ? ORDER BY date',
+            (f'{month_prefix}%',),
+        ).fetchall()
+        conn.close()
+        return [(row['date'], row['commission']) for row in rows]
+
+    def test_batch_applies_all_operations_and_recomputes_once_per_date(self):
+        work = {'employee_id': self.employee_id, 'entry_type': 'work', 'start_time': '09:00', 'end_time': '17:00'}
+        response = self.post_batch([
+            {'entity': 'time_entry', 'op': 'create', 'data': {**work, 'date': '2024-02-05'}},
+            {'entity': 'time_entry', 'op': 'create', 'data': {**work, 'date': '2024-02-06'}},
+            {'entity': 'revenue', 'op': 'create', 'data': {'date': '2024-02-05', 'amount': 300}},
+            {'entity': 'revenue', 'op': 'create', 'data': {'date': '2024-02-06', 'amount': 500}},
+        ])
+        self.assertEqual(response.status_code, 200)
+        payload = response.get_json()
+        self.assertEqual([item['index'] for item in payload['results']], [0, 1, 2, 3])
+        self.assertEqual(payload['recomputed_dates'], ['2024-02-05', '2024-02-06'])
+        self.assertEqual(self.fetch_entries('2024-02'), [('2024-02-05', 30.0), ('2024-02-06', 50.0)])
+
+        entry_id = payload['results'][0]['id']
+        response = self.post_batch([
+            {'entity': 'time_entry', 'op': 'delete', 'id': entry_id},
+            {'entity': 'revenue', 'op': 'update', 'id': payload['results'][3]['id'], 'data': {'amount': 100}},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.fetch_entries('2024-02'), [('2024-02-06', 10.0)])
+
+    def test_batch_is_all_or_nothing(self):
+        work = {'employee_id': self.employee_id, 'entry_type': 'work', 'start_time': '09:00', 'end_time': '17:00'}
+        response = self.post_batch([
+            {'entity': 'time_entry', 'op': 'create', 'data': {**work, 'date': '2024-02-05'}},
+            {'entity': 'time_entry', 'op': 'update', 'id': 999999, 'data': work},
+        ])
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.get_json()['failed_index'], 1)
+        self.assertEqual(self.fetch_entries('2024-02'), [])
+
+        response = self.post_batch(
+            [{'entity': 'time_entry', 'op': 'create', 'data': {**work, 'date': '2024-01-20'}}],
+            token='batch-employee',
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(len(self.fetch_entries('2024-01')), 16)
+
+    def test_failing_batch_releases_the_lock(self):
+        work = {'employee_id': self.employee_id, 'entry_type': 'work', 'start_time': '09:00', 'end_time': '17:00'}
+        broken = {'entity': 'time_entry', 'op': 'create', 'data': {**work, 'date': '2024-02-05', 'notes': {'a': 1}}}
+        valid = {'entity': 'time_entry', 'op': 'create', 'data': {**work, 'date': '2024-02-06'}}
+        self.assertEqual(self.post_batch([valid, broken]).status_code, 500)
+        with mock.patch.object(server, 'recompute_commission_cascade', side_effect=RuntimeError('kaputt')):
+            self.assertEqual(self.post_batch([valid]).status_code, 500)
+
+        # Beide Transaktionen sind zurückgerollt: ein anderer Schreibender bekommt die Sperre sofort
+        conn = server.sqlite3.connect(server.DB_PATH, timeout=0)
+        conn.execute('BEGIN IMMEDIATE')
+        conn.rollback()
+        conn.close()
+        self.assertEqual(self.fetch_entries('2024-02'), [])
+        self.assertEqual(self.post_batch([valid]).status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
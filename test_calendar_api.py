@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+
+import server
+
+
+class CalendarBundleApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_db = tempfile.NamedTemporaryFile(delete=False)
+        self.tmp_db.close()
+        server.DB_PATH = self.tmp_db.name
+        if os.path.exists(server.DB_PATH):
+            os.remove(server.DB_PATH)
+        server.init_database()
+
+        conn = server.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            '''
+                INSERT INTO employees (
+                    name, contract_hours, has_commission, is_active, start_date
+                ) VALUES (?, ?, ?, ?, ?)
+            ''',
+            ('Anna', 40, 0, 1, '2024-01-01'),
+        )
+        self.employee_id = cursor.lastrowid
+        rows = [
+            ('2024-03-01', 'work', '09:00', '17:00', 30),
+            ('2024-03-04', 'vacation', None, None, 0),
+            ('2024-04-01', 'work', '09:00', '12:00', 0),
+        ]
+        for entry_date, entry_type, start_time, end_time, pause in rows:
+            cursor.execute(
+                '''
+                    INSERT INTO time_entries (
+                        employee_id, date, entry_type, start_time, end_time, pause_minutes,
+                        commission, duftreise_bis_18, duftreise_ab_18, notes
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''',
+                (self.employee_id, entry_date, entry_type, start_time, end_time, pause, 0, 1, 0, ''),
+            )
+        cursor.execute('INSERT INTO revenue (date, amount, notes) VALUES (?, ?, ?)', ('2024-03-01', 1200, ''))
+        conn.commit()
+        conn.close()
+
+        server.SESSIONS['calendar-admin'] = {'username': 'Admin', 'role': 'admin'}
+        self.client = server.app.test_client()
+        self.headers = {'Authorization': 'Bearer calendar-admin'}
+
+    def tearDown(self):
+        server.SESSIONS.pop('calendar-admin', None)
+        if os.path.exists(self.tmp_db.name):
+            os.remove(self.tmp_db.name)
+
+    def test_bundle_contains_month_data_and_summary(self):
+        response = self.client.get(f'/api/calendar/{self.employee_id}/2024/3', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        bundle = response.get_json()
+
+        self.assertEqual(bundle['employee']['name'], 'Anna')
+        self.assertEqual([entry['date'] for entry in bundle['entries']], ['2024-03-01', '2024-03-04'])
+        self.assertEqual([row['amount'] for row in bundle['revenue']], [1200])
+        self.assertEqual(bundle['summary']['total_hours'], 7.5)
+        self.assertEqual(bundle['summary']['work_days'], 1)
+        self.assertEqual(bundle['summary']['vacation_days'], 1)
+        self.assertEqual(bundle['summary']['total_duftreise_bis_18'], 2)
+        self.assertFalse(bundle['locked'])
+
+        response = self.client.get(f'/api/calendar/{self.employee_id}/2024/13', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/calendar/999/2024/3', headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    def test_etag_revalidation(self):
+        url = f'/api/calendar/{self.employee_id}/2024/3'
+        first = self.client.get(url, headers=self.headers)
+        etag = first.headers['ETag']
+
+        response = self.client.get(url, headers={**self.headers, 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        conn = server.get_db_connection()
+        conn.execute("UPDATE time_entries SET notes = 'geändert' WHERE date = '2024-03-01'")
+        conn.commit()
+        conn.close()
+
+        response = self.client.get(url, headers={**self.headers, 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import server
+
+
+class ChangesApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        server.DB_PATH = os.path.join(self.tmp_dir, 'zeiterfassung.db')
+        server.init_database()
+
+        conn = server.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            'INSERT INTO employees (name, contract_hours, has_commission, is_active, start_date) '
+            'VALUES (?, ?, ?, ?, ?)',
+            ('Anna', 40, 1, 1, '2024-01-01'),
+        )
+        self.employee_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+
+        server.SESSIONS['changes-admin'] = {'username': 'Admin', 'role': 'admin'}
+        self.client = server.app.test_client()
+        self.headers = {'Authorization': 'Bearer changes-admin'}
+
+    def tearDown(self):
+        server.SESSIONS.pop('changes-admin', None)
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def changes(self, since):
+        response = self.client.get(f'/api/changes?since={since}', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    def test_delta_contains_only_rows_changed_since_sequence(self):
+        initial = self.changes(0)
+        self.assertEqual([row['name'] for row in initial['employees']], ['Anna'])
+
+        entry = {
+            'employee_id': self.employee_id, 'date': '2024-03-04', 'entry_type': 'work',
+            'start_time': '09:00', 'end_time': '17:00',
+        }
+        entry_id = self.client.post('/api/time-entries', json=entry, headers=self.headers).get_json()['id']
+        after_entry = self.changes(initial['last_seq'])
+        self.assertEqual([row['id'] for row in after_entry['time_entries']], [entry_id])
+        self.assertEqual(after_entry['employees'], [])
+        self.assertFalse(after_entry['has_more'])
+
+        self.client.post('/api/revenue', json={'date': '2024-03-04', 'amount': 900}, headers=self.headers)
+        self.client.delete(f'/api/time-entries/{entry_id}', headers=self.headers)
+        after_delete = self.changes(after_entry['last_seq'])
+        self.assertEqual(after_delete['time_entries'], [])
+        self.assertEqual(after_delete['deleted']['time_entries'], [entry_id])
+        self.assertEqual([row['amount'] for row in after_delete['revenue']], [900])
+
+        self.assertEqual(self.changes(after_delete['last_seq'])['revenue'], [])
+
+    def test_unchanged_recompute_is_not_logged_and_compaction_keeps_result(self):
+        entry = {
+            'employee_id': self.employee_id, 'date': '2024-03-04', 'entry_type': 'work',
+            'start_time': '09:00', 'end_time': '17:00',
+        }
+        for notes in ('a', 'b', 'c'):
+            self.client.post('/api/time-entries', json={**entry, 'notes': notes}, headers=self.headers)
+        before = self.changes(0)
+
+        conn = server.get_db_connection()
+        log_size = conn.execute('SELECT COUNT(*) FROM change_log').fetchone()[0]
+        server.recompute_commission_for_date(conn.cursor(), '2024-03-04')
+        conn.commit()
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM change_log').fetchone()[0], log_size)
+
+        removed = server.compact_change_log(conn.cursor())
+        conn.commit()
+        conn.close()
+        self.assertEqual(removed, 2)
+        self.assertEqual(self.changes(0), before)
+
+    def test_paging_with_limit(self):
+        for day in range(1, 6):
+            self.client.post('/api/revenue', json={'date': f'2024-03-0{day}', 'amount': day}, headers=self.headers)
+
+        first = self.client.get('/api/changes?since=0&limit=3', headers=self.headers).get_json()
+        self.assertTrue(first['has_more'])
+        rest = self.changes(first['last_seq'])
+        self.assertFalse(rest['has_more'])
+        amounts = [row['amount'] for row in first['revenue'] + rest['revenue']]
+        self.assertEqual(sorted(amounts), [1, 2, 3, 4, 5])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import tempfile
+import unittest
+
+import server
+
+
+class CommissionCascadeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_db = tempfile.NamedTemporaryFile(delete=False)
+        self.tmp_db.close()
+        server.DB_PATH = self.tmp_db.name
+        if os.path.exists(server.DB_PATH):
+            os.remove(server.DB_PATH)
+        server.init_database()
+
+        conn = server.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            'UPDATE commission_settings SET percentage = ?, monthly_max = ? WHERE id = 1',
+            (10, 100),
+        )
+        cursor.execute(
+            '''
+                INSERT INTO employees (
+                    name, contract_hours, has_commission, is_active, start_date
+                ) VALUES (?, ?, ?, ?, ?)
+            ''',
+            ('Anna', 40, 1, 1, '2024-01-01'),
+        )
+        self.employee_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+
+        server.SESSIONS['cascade-admin'] = {'username': 'Admin', 'role': 'admin'}
+        self.client = server.app.test_client()
+        self.headers = {'Authorization': 'Bearer cascade-admin'}
+
+    def tearDown(self):
+        server.SESSIONS.pop('cascade-admin', None)
+        if os.path.exists(self.tmp_db.name):
+            os.remove(self.tmp_db.name)
+
+    def insert_work_days(self, dates, revenue=None):
+        conn = server.get_db_connection()
+        cursor = conn.cursor()
+        entry_ids = []
+        for entry_date in dates:
+            cursor.execute(
+                '''
+                    INSERT INTO time_entries (
+                        employee_id, date, entry_type, start_time, end_time, pause_minutes,
+                        commission, duftreise_bis_18, duftreise_ab_18, notes
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''',
+                (self.employee_id, entry_date, 'work', '09:00', '17:00', 0, 0, 0, 0, ''),
+            )
+            entry_ids.append(cursor.lastrowid)
+            if revenue is not None:
+                cursor.execute(
+                    'INSERT INTO revenue (date, amount, notes) VALUES (?, ?, ?)',
+                    (entry_date, revenue, ''),
+                )
+        conn.commit()
+        conn.close()
+        return entry_ids
+
+    def recompute_all_sequentially(self):
+        conn = server.get_db_connection()
+        dates = [row['date'] for row in conn.execute('SELECT DISTINCT date FROM time_entries ORDER BY date')]
+        conn.close()
+        for entry_date in dates:
+            server.compute_commission_for_date(entry_date)
+
+    def commissions(self):
+        conn = server.get_db_connection()
+        rows = conn.execute('SELECT date, commission FROM time_entries ORDER BY date').fetchall()
+        conn.close()
+        return {row['date']: row['commission'] for row in rows}
+
+    def test_hour_threshold_flip_recomputes_later_day(self):
+        # 19 Tage à 8 Stunden im Januar: die Grenze wird am 05.02. erreicht
+        conn = server.get_db_connection()
+        conn.execute('UPDATE commission_settings SET monthly_max = 1000 WHERE id = 1')
+        conn.commit()
+        conn.close()
+        january_ids = self.insert_work_days([f'2024-01-{day:02d}' for day in range(2, 21)])
+        self.insert_work_days(['2024-02-05', '2024-02-06', '2024-02-07'], revenue=500)
+        self.recompute_all_sequentially()
+        self.assertEqual(self.commissions()['2024-02-05'], 50)
+
+        response = self.client.post(
+            '/api/batch',
+            json={'operations': [{'entity': 'time_entry', 'op': 'delete', 'id': january_ids[0]}]},
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 200)
+        # Nur der Tag, an dem sich die Berechtigung umkehrt, wird zusätzlich berechnet
+        self.assertEqual(response.get_json()['recomputed_dates'], ['2024-01-02', '2024-02-05'])
+
+        after_cascade = self.commissions()
+        self.assertEqual(after_cascade['2024-02-05'], 0)
+        self.assertEqual(after_cascade['2024-02-06'], 50)
+
+        self.recompute_all_sequentially()
+        self.assertEqual(self.commissions(), after_cascade)
+
+    def test_binding_monthly_cap_recomputes_later_days_in_month(self):
+        self.insert_work_days([f'2024-01-{day:02d}' for day in range(2, 22)])
+        self.insert_work_days(['2024-02-05', '2024-02-06', '2024-02-07'], revenue=600)
+        self.insert_work_days(['2024-03-04'], revenue=600)
+        self.recompute_all_sequentially()
+        before = self.commissions()
+        self.assertEqual(
+            [before['2024-02-05'], before['2024-02-06'], before['2024-02-07']], [60, 40, 0]
+        )
+
+        response = self.client.post(
+            '/api/revenue', json={'date': '2024-02-05', 'amount': 200}, headers=self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+
+        after_cascade = self.commissions()
+        self.assertEqual(
+            [after_cascade['2024-02-05'], after_cascade['2024-02-06'], after_cascade['2024-02-07']],
+            [20, 60, 20],
+        )
+        self.assertEqual(after_cascade['2024-03-04'], 60)
+
+        self.recompute_all_sequentially()
+        self.assertEqual(self.commissions(), after_cascade)
+
+    def test_planner_stops_once_both_totals_pass_threshold(self):
+        self.insert_work_days([f'2024-01-{day:02d}' for day in range(1, 31)])
+        conn = server.get_db_connection()
+        cursor = conn.cursor()
+        affected = server.plan_eligibility_dates(cursor, self.employee_id, {'2024-01-01': -8.0})
+        conn.close()
+        # Vor der Änderung hatte der 01.01. 8 Stunden mehr: Grenze am 19.01. statt am 20.01.
+        self.assertEqual(affected, ['2024-01-19'])
+
+
+if __name__ == '__main__':
+    unittest.main()
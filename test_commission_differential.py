@@ -0,0 +1,362 @@
+"""Differenzielle Tests: optimierte Provisionspfade gegen die Referenz
+
+Hypothesis erzeugt zufällige Verläufe (Besetzung, Umsätze, Schwellen mit
+wechselndem valid_from, greifende Monatsmaxima, Mitarbeitende, die die
+160-Stunden-Grenze mitten im Monat oder genau mit einer Schicht erreichen,
+Stundenübertrag aus archivierten Jahren). Referenz ist
+recompute_commission_for_date, Tag für Tag aufsteigend auf genullten Daten.
+Verglichen wird centgenau mit der Neuberechnung (skalar und NumPy), der
+Simulation und der inkrementellen Neuberechnung nach einer Änderung.
+Fehlschläge werden von Hypothesis auf einen minimalen Verlauf geschrumpft.
+
+Befund: die inkrementelle Neuberechnung hängt von der Reihenfolge ab, sobald
+das Monatsmaximum greift (CommissionOrderFindingsTestCase). Der zufällige
+Vergleich der inkrementellen Neuberechnung läuft deshalb vorerst nur mit
+Maxima, die nie erreicht werden.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date, timedelta
+from unittest import mock
+
+import commission_engine
+import server
+
+try:
+    from hypothesis import given, settings, strategies as st
+except ImportError:
+    given = None
+
+
+WINDOW_START = date(2024, 1, 20)
+# Vor dem Zeitraum erfasste Tage im Dezember, damit die 160-Stunden-Grenze
+# auch mitten in einem Monat des Zeitraums erreicht wird
+BANK_START = date(2023, 12, 1)
+SHIFTS = [
+    ('work', '09:00', '17:00', 0),
+    ('work', '08:00', '18:30', 45),
+    ('work', '10:00', '14:00', 0),
+    ('work', '12:15', '19:45', 30),
+    ('sick', None, None, 0),
+    ('vacation', None, None, 0),
+]
+# Beispiele je Test; vor dem Zusammenführen einer Optimierung gründlicher prüfen,
+# z. B. COMMISSION_DIFF_EXAMPLES=500 python -m pytest test_commission_differential.py
+MAX_EXAMPLES = int(os.environ.get('COMMISSION_DIFF_EXAMPLES', 60))
+REVENUES = [0, 699.99, 700, 1400, 1999.99, 2100, 3333.33]
+CARRIED_HOURS = [0, 150.25, 152, 153.25, 156, 159.99, 160]
+UNREACHABLE_MAX = 10 ** 9
+
+
+if given is not None:
+    @st.composite
+    def histories(draw, capped=True):
+        """Zufälliger Verlauf: Mitarbeitende, Einträge, Umsätze, Regeln
+
+        Mit ``capped=False`` ist das Monatsmaximum so hoch, dass es nie greift.
+        """
+        employee_count = draw(st.integers(min_value=1, max_value=4))
+        employees = [
+            {
+                'has_commission': draw(st.sampled_from([True, True, False])),
+                # Übertrag aus archivierten Jahren; zusammen mit einer Schicht genau 160 h
+                'carried_hours': draw(st.sampled_from(CARRIED_HOURS)),
+                # Bereits im Dezember gearbeitete 8-Stunden-Tage
+                'bank_days': draw(st.integers(min_value=0, max_value=22)),
+            }
+            for _ in range(employee_count)
+        ]
+        day_count = draw(st.integers(min_value=1, max_value=45))
+        days = []
+        for offset in range(day_count):
+            shifts = draw(st.lists(
+                st.sampled_from([None] + list(range(len(SHIFTS)))),
+                min_size=employee_count, max_size=employee_count,
+            ))
+            days.append({
+                'date': (WINDOW_START + timedelta(days=offset)).isoformat(),
+                'shifts': shifts,
+                'revenue': draw(st.sampled_from([None] + REVENUES)),
+            })
+        valid_from_dates = [
+            (WINDOW_START + timedelta(days=offset)).isoformat() for offset in range(-30, day_count)
+        ]
+        # Grundschwelle für alle Wochentage und Besetzungen (None = keine), dazu
+        # einzelne Schwellen, die erst im oder kurz vor dem Zeitraum gültig werden
+        base_threshold = draw(st.sampled_from([0, 700, 1400, None]))
+        thresholds = [] if base_threshold is None else [
+            {'weekday': weekday, 'employee_count': count, 'threshold': base_threshold, 'valid_from': '2023-01-01'}
+            for weekday in range(7)
+            for count in range(1, employee_count + 1)
+        ]
+        thresholds += draw(st.lists(
+            st.fixed_dictionaries({
+                'weekday': st.integers(min_value=0, max_value=6),
+                'employee_count': st.integers(min_value=1, max_value=employee_count),
+                'threshold': st.sampled_from([0, 700, 1400, 2000]),
+                'valid_from': st.sampled_from(valid_from_dates),
+            }),
+            max_size=12,
+            unique_by=lambda row: (row['weekday'], row['employee_count'], row['valid_from']),
+        ))
+        return {
+            'employees': employees,
+            'days': days,
+            'thresholds': thresholds,
+            'percentage': draw(st.sampled_from([0, 2.5, 5, 7.5, 10])),
+            # Kleine Maxima greifen fast in jedem Monat
+            'monthly_max': draw(st.sampled_from([0, 20, 35.5, 120, 10000])) if capped else UNREACHABLE_MAX,
+        }
+
+    @st.composite
+    def edits(draw, history):
+        """Einige Änderungen an einem Verlauf: Eintrag setzen/löschen oder Umsatz ändern"""
+        edit = st.fixed_dictionaries({
+            'kind': st.sampled_from(['entry', 'delete', 'revenue']),
+            'day': st.integers(min_value=0, max_value=len(history['days']) - 1),
+            'employee': st.integers(min_value=0, max_value=len(history['employees']) - 1),
+            'shift': st.integers(min_value=0, max_value=len(SHIFTS) - 1),
+            'revenue': st.sampled_from(REVENUES),
+            # Löschungen treffen einen vorhandenen Eintrag (Index modulo Anzahl)
+            'pick': st.integers(min_value=0, max_value=1000),
+        })
+        return draw(st.lists(edit, min_size=1, max_size=4))
+
+
+class CommissionDifferentialBase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.databases = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def load_history(self, history):
+        """Frische Datenbank mit dem Verlauf anlegen; liefert die Mitarbeiter-IDs"""
+        # Hypothesis ruft setUp nur einmal je Test auf: jedes Beispiel bekommt eine eigene Datei
+        self.databases += 1
+        server.DB_PATH = os.path.join(self.tmp_dir, f'verlauf_{self.databases}.db')
+        server.init_database()
+        conn = server.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            'UPDATE commission_settings SET percentage = ?, monthly_max = ? WHERE id = 1',
+            (history['percentage'], history['monthly_max']),
+        )
+        for row in history['thresholds']:
+            cursor.execute(
+                'INSERT INTO commission_thresholds (weekday, employee_count, threshold, valid_from) '
+                'VALUES (?, ?, ?, ?)',
+                (row['weekday'], row['employee_count'], row['threshold'], row['valid_from']),
+            )
+
+        employee_ids = []
+        for index, employee in enumerate(history['employees']):
+            cursor.execute(
+                'INSERT INTO employees (name, contract_hours, has_commission, is_active, start_date) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (f'Person {index}', 40, int(employee['has_commission']), 1, '2023-01-01'),
+            )
+            employee_ids.append(cursor.lastrowid)
+            if employee['carried_hours']:
+                cursor.execute(
+                    'INSERT INTO archived_hours (employee_id, year, hours) VALUES (?, ?, ?)',
+                    (employee_ids[-1], 2022, employee['carried_hours']),
+                )
+            for offset in range(employee['bank_days']):
+                self.insert_entry(cursor, employee_ids[-1], (BANK_START + timedelta(days=offset)).isoformat(), 0)
+
+        for day in history['days']:
+            for employee_id, shift in zip(employee_ids, day['shifts']):
+                if shift is not None:
+                    self.insert_entry(cursor, employee_id, day['date'], shift)
+            if day['revenue'] is not None:
+                cursor.execute(
+                    'INSERT INTO revenue (date, amount, notes) VALUES (?, ?, ?)',
+                    (day['date'], day['revenue'], ''),
+                )
+        conn.commit()
+        conn.close()
+        return employee_ids
+
+    @staticmethod
+    def insert_entry(cursor, employee_id, date_str, shift):
+        entry_type, start_time, end_time, pause_minutes = SHIFTS[shift]
+        cursor.execute(
+            '''
+                INSERT INTO time_entries (
+                    employee_id, date, entry_type, start_time, end_time, pause_minutes,
+                    commission, duftreise_bis_18, duftreise_ab_18, notes
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''',
+            (employee_id, date_str, entry_type, start_time, end_time, pause_minutes, 0, 0, 0, ''),
+        )
+
+    def commissions(self):
+        conn = server.get_db_connection()
+        rows = conn.execute('SELECT id, commission FROM time_entries ORDER BY id').fetchall()
+        conn.close()
+        return {row['id']: row['commission'] for row in rows}
+
+    def oracle(self):
+        """Referenz: alle Provisionen nullen und jeden Tag aufsteigend einzeln berechnen"""
+        conn = server.get_db_connection()
+        conn.execute('UPDATE time_entries SET commission = 0')
+        dates = [row['date'] for row in conn.execute('SELECT DISTINCT date FROM time_entries ORDER BY date')]
+        conn.commit()
+        conn.close()
+        for entry_date in dates:
+            server.compute_commission_for_date(entry_date)
+        return self.commissions()
+
+    def api_client(self):
+        """Test-Client mit Administrator-Anmeldung; liefert (Client, Header)"""
+        server.SESSIONS['diff-admin'] = {'username': 'Admin', 'role': 'admin'}
+        self.addCleanup(server.SESSIONS.pop, 'diff-admin', None)
+        return server.app.test_client(), {'Authorization': 'Bearer diff-admin'}
+
+    def scramble_commissions(self):
+        """Gespeicherte Provisionen verfälschen, damit kein Pfad vom Vorzustand profitiert"""
+        conn = server.get_db_connection()
+        conn.execute('UPDATE time_entries SET commission = 9999')
+        conn.commit()
+        conn.close()
+
+
+if given is not None:
+    class CommissionDifferentialTestCase(CommissionDifferentialBase):
+        @settings(max_examples=MAX_EXAMPLES, deadline=None)
+        @given(history=histories())
+        def test_rebuild_and_simulation_match_oracle(self, history):
+            self.load_history(history)
+            expected = self.oracle()
+
+            self.scramble_commissions()
+            with mock.patch.object(commission_engine, 'np', None):
+                server.rebuild_commissions(2023, 12, 2024, 3, workers=1)
+            self.assertEqual(self.commissions(), expected, 'Neuberechnung (skalar)')
+
+            # Simulation mit unveränderten Regeln: Monatssummen wie die Referenz
+            self.scramble_commissions()
+            conn = server.get_db_connection()
+            simulation = server.simulate_commissions(conn.cursor(), (2023, 12), (2024, 3))
+            periods = {
+                row['id']: row['date'][:7]
+                for row in conn.execute('SELECT id, date FROM time_entries')
+            }
+            conn.close()
+            expected_months = {}
+            for entry_id, value in expected.items():
+                expected_months[periods[entry_id]] = expected_months.get(periods[entry_id], 0.0) + value
+            self.assertEqual(
+                {month['period']: month['simulated'] for month in simulation['months'] if month['simulated']},
+                {period: round(total, 2) for period, total in expected_months.items() if round(total, 2)},
+            )
+
+        @unittest.skipIf(commission_engine.np is None, 'NumPy nicht installiert (requirements-dev.txt)')
+        @settings(max_examples=MAX_EXAMPLES, deadline=None)
+        @given(history=histories())
+        def test_numpy_rebuild_matches_oracle(self, history):
+            self.load_history(history)
+            expected = self.oracle()
+
+            self.scramble_commissions()
+            server.rebuild_commissions(2023, 12, 2024, 3, workers=1)
+            self.assertEqual(self.commissions(), expected, 'Neuberechnung (NumPy)')
+
+        @settings(max_examples=MAX_EXAMPLES, deadline=None)
+        @given(data=st.data())
+        def test_incremental_recompute_matches_oracle(self, data):
+            # Greifende Maxima: siehe CommissionOrderFindingsTestCase
+            history = data.draw(histories(capped=False))
+            employee_ids = self.load_history(history)
+            self.oracle()
+            client, headers = self.api_client()
+
+            # Nach jeder Änderung muss die inkrementelle Neuberechnung der Referenz entsprechen
+            for edit in data.draw(edits(history)):
+                conn = server.get_db_connection()
+                entries = conn.execute('SELECT id, date, commission FROM time_entries ORDER BY id').fetchall()
+                conn.close()
+                # Umsatzänderungen und Löschungen bevorzugt an Tagen mit Provision: dort
+                # verschieben sie das Monatsmaximum für spätere Tage
+                paid = [row for row in entries if row['commission']] or entries
+                date_str = history['days'][edit['day']]['date']
+                if edit['kind'] == 'revenue':
+                    if paid:
+                        date_str = paid[edit['pick'] % len(paid)]['date']
+                    response = client.post(
+                        '/api/revenue', json={'date': date_str, 'amount': edit['revenue']}, headers=headers
+                    )
+                elif edit['kind'] == 'entry':
+                    entry_type, start_time, end_time, pause_minutes = SHIFTS[edit['shift']]
+                    response = client.post('/api/time-entries', headers=headers, json={
+                        'employee_id': employee_ids[edit['employee']], 'date': date_str,
+                        'entry_type': entry_type, 'start_time': start_time, 'end_time': end_time,
+                        'pause_minutes': pause_minutes,
+                    })
+                elif paid:
+                    response = client.delete(
+                        f"/api/time-entries/{paid[edit['pick'] % len(paid)]['id']}", headers=headers
+                    )
+                else:
+                    response = None
+                if response is not None:
+                    self.assertEqual(response.status_code, 200, response.get_json())
+
+                incremental = self.commissions()
+                self.assertEqual(incremental, self.oracle(), edit)
+else:
+    @unittest.skip('hypothesis nicht installiert (requirements-dev.txt)')
+    class CommissionDifferentialTestCase(CommissionDifferentialBase):
+        def test_differential_comparison(self):
+            pass
+
+
+class CommissionOrderFindingsTestCase(CommissionDifferentialBase):
+    """Befunde des Vergleichs: greifendes Monatsmaximum, minimal geschrumpft
+
+    recompute_commission_for_date zieht vom Maximum die Provisionen aller
+    anderen Tage des Monats ab, auch späterer; die Referenz verbraucht es
+    wie ``recompute`` chronologisch. Beide Fälle weichen deshalb ab.
+    """
+
+    # 150,25 h Übertrag und ein Dezembertag: die erste Januarschicht überschreitet 160 h
+    HISTORY = {
+        'employees': [{'has_commission': True, 'carried_hours': 150.25, 'bank_days': 1}],
+        'days': [
+            {'date': '2024-01-20', 'shifts': [0], 'revenue': 699.99},
+            {'date': '2024-01-21', 'shifts': [0], 'revenue': 699.99},
+        ],
+        'thresholds': [],
+        'percentage': 2.5,
+        'monthly_max': 20,
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.load_history(self.HISTORY)
+        # 17,50 am ersten Tag, der Rest des Maximums (2,50) am zweiten
+        self.assertEqual(list(self.oracle().values()), [0.0, 17.5, 2.5])
+        self.client, self.headers = self.api_client()
+
+    @unittest.expectedFailure
+    def test_deleting_capped_day_frees_maximum_for_later_days(self):
+        response = self.client.delete('/api/time-entries/2', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.commissions(), self.oracle())
+
+    @unittest.expectedFailure
+    def test_raising_earlier_revenue_ignores_later_days(self):
+        response = self.client.post(
+            '/api/revenue', json={'date': '2024-01-20', 'amount': 1400}, headers=self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.commissions(), self.oracle())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,200 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import commission_engine
+import server
+
+try:
+    from hypothesis import given, settings, strategies as st
+except ImportError:
+    given = None
+
+
+RULES = commission_engine.build_rules(
+    5,
+    120,
+    [
+        {'weekday': weekday, 'employee_count': count, 'threshold': 700 * count, 'valid_from': '2024-01-01'}
+        for weekday in range(7)
+        for count in (1, 2, 3)
+    ],
+)
+
+
+def random_case(rng, day_count=40, employee_count=4):
+    """Zufällige kompakte Eingaben über zwei Monate"""
+    days = [server.date(2024, 1, 15) + server.timedelta(days=offset) for offset in range(day_count)]
+    days = [day.isoformat() for day in days]
+    row_day, row_employee, row_hours, row_hours_before = [], [], [], []
+    cumulative = [rng.choice([0, 100, 150]) for _ in range(employee_count)]
+    for day in range(day_count):
+        for employee in range(employee_count):
+            if rng.random() < 0.6:
+                hours = rng.choice([4.0, 6.5, 7.25, 8.0, 9.75])
+                row_day.append(day)
+                row_employee.append(employee)
+                row_hours.append(hours)
+                row_hours_before.append(cumulative[employee])
+                cumulative[employee] += hours
+    revenue = [rng.choice([0, 800, 1333.33, 2100, 2999.99]) for _ in range(day_count)]
+    return days, row_day, row_employee, row_hours, row_hours_before, revenue
+
+
+class CommissionEngineTestCase(unittest.TestCase):
+    def test_scalar_rules(self):
+        days = ['2024-03-04', '2024-03-05', '2024-03-06']
+        commissions = commission_engine.evaluate_days(
+            days,
+            row_day=[0, 0, 1, 2],
+            row_employee=[1, 2, 1, 1],
+            row_hours=[6.0, 2.0, 8.0, 8.0],
+            row_hours_before=[200, 150, 206, 214],
+            revenue=[2000, 2000, 2000],
+            rules=RULES,
+        )
+        # Tag 1: nur Mitarbeiter 1 berechtigt (2 erst bei 152 h), Schwelle für zwei Personen erreicht
+        # Tag 2 und 3: je 100 € Pool, das Monatsmaximum von 120 € lässt nur noch 20 € bzw. 0 € zu
+        self.assertEqual(commissions, [100.0, 0.0, 20.0, 0.0])
+
+        self.assertIsNone(commission_engine.threshold_for(RULES, '2024-03-04', 4))
+        self.assertEqual(commission_engine.threshold_for(commission_engine.build_rules(5, 0, []), '2024-03-04', 4), 0)
+
+    @unittest.skipIf(commission_engine.np is None, 'NumPy nicht installiert')
+    def test_batch_matches_scalar_on_random_cases(self):
+        for seed in range(20):
+            case = random_case(random.Random(seed))
+            scalar = commission_engine.evaluate_days(*case, RULES)
+            batch = commission_engine.evaluate_days_batch(*case, RULES)
+            self.assertEqual(scalar, [float(value) for value in batch], seed)
+
+
+if given is not None:
+    class CommissionEnginePropertyTestCase(unittest.TestCase):
+        @settings(max_examples=150, deadline=None)
+        @given(
+            seed=st.integers(min_value=0, max_value=2**32 - 1),
+            day_count=st.integers(min_value=1, max_value=60),
+            employee_count=st.integers(min_value=1, max_value=5),
+            percentage=st.sampled_from([0, 2.5, 5, 7.5, 10]),
+            monthly_max=st.sampled_from([0, 35.5, 120, 1000]),
+        )
+        def test_invariants_and_batch_equivalence(self, seed, day_count, employee_count, percentage, monthly_max):
+            rules = dict(RULES, percentage=percentage, monthly_max=monthly_max)
+            case = random_case(random.Random(seed), day_count, employee_count)
+            days, row_day, row_employee, row_hours, row_hours_before, _ = case
+            commissions = commission_engine.evaluate_days(*case, rules)
+
+            paid = {}
+            for row, value in enumerate(commissions):
+                self.assertGreaterEqual(value, 0)
+                if row_hours_before[row] + row_hours[row] < commission_engine.COMMISSION_HOUR_THRESHOLD:
+                    self.assertEqual(value, 0)
+                key = (row_employee[row], days[row_day[row]][:7])
+                paid[key] = paid.get(key, 0) + value
+            for total in paid.values():
+                self.assertLessEqual(total, monthly_max + 0.01)
+
+            if commission_engine.np is not None:
+                batch = commission_engine.evaluate_days_batch(*case, rules)
+                self.assertEqual(commissions, [float(value) for value in batch])
+
+
+class CommissionEngineDatabaseTestCase(unittest.TestCase):
+    """Das Engine-Ergebnis entspricht compute_commission_for_date auf der Datenbank"""
+
+    def setUp(self):
+        self.tmp_db = tempfile.NamedTemporaryFile(delete=False)
+        self.tmp_db.close()
+        server.DB_PATH = self.tmp_db.name
+        if os.path.exists(server.DB_PATH):
+            os.remove(server.DB_PATH)
+        server.init_database()
+
+    def tearDown(self):
+        if os.path.exists(self.tmp_db.name):
+            os.remove(self.tmp_db.name)
+
+    def seed_database(self, rng):
+        conn = server.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('UPDATE commission_settings SET percentage = ?, monthly_max = ? WHERE id = 1', (5, 120))
+        for weekday in range(7):
+            for count in (1, 2, 3):
+                cursor.execute(
+                    'INSERT INTO commission_thresholds (weekday, employee_count, threshold, valid_from) '
+                    'VALUES (?, ?, ?, ?)',
+                    (weekday, count, 700 * count, '2024-01-01'),
+                )
+        employee_ids = []
+        for index in range(4):
+            cursor.execute(
+                'INSERT INTO employees (name, contract_hours, has_commission, is_active, start_date) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (f'Person {index}', 40, int(index != 3), 1, '2023-12-01'),
+            )
+            employee_ids.append(cursor.lastrowid)
+        day = server.date(2023, 12, 1)
+        while day < server.date(2024, 3, 1):
+            for employee_id in employee_ids:
+                if rng.random() < 0.6:
+                    start_minutes = rng.choice([480, 510, 540, 600])
+                    end_minutes = start_minutes + rng.choice([240, 390, 435, 480, 585])
+                    cursor.execute(
+                        '''
+                            INSERT INTO time_entries (
+                                employee_id, date, entry_type, start_time, end_time, pause_minutes,
+                                commission, duftreise_bis_18, duftreise_ab_18, notes
+                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ''',
+                        (
+                            employee_id, day.isoformat(), rng.choice(['work', 'work', 'sick']),
+                            f'{start_minutes // 60:02d}:{start_minutes % 60:02d}',
+                            f'{end_minutes // 60:02d}:{end_minutes % 60:02d}',
+                            rng.choice([0, 30]), 0, 0, 0, '',
+                        ),
+                    )
+            cursor.execute(
+                'INSERT INTO revenue (date, amount, notes) VALUES (?, ?, ?)',
+                (day.isoformat(), rng.choice([0, 800, 1333.33, 2100, 2999.99]), ''),
+            )
+            day += server.timedelta(days=1)
+        conn.commit()
+        conn.close()
+
+    def commissions(self):
+        conn = server.get_db_connection()
+        rows = conn.execute('SELECT id, commission FROM time_entries ORDER BY id').fetchall()
+        conn.close()
+        return {row['id']: row['commission'] for row in rows}
+
+    def database_reference(self):
+        conn = server.get_db_connection()
+        conn.execute('UPDATE time_entries SET commission = 0')
+        dates = [row['date'] for row in conn.execute('SELECT DISTINCT date FROM time_entries ORDER BY date')]
+        conn.commit()
+        conn.close()
+        for entry_date in dates:
+            server.compute_commission_for_date(entry_date)
+        return self.commissions()
+
+    def test_scalar_and_batch_match_database(self):
+        for seed in range(3):
+            self.tearDown()
+            self.setUp()
+            self.seed_database(random.Random(seed))
+            expected = self.database_reference()
+
+            with mock.patch.object(commission_engine, 'np', None):
+                server.rebuild_commissions(2023, 12, 2024, 2, workers=1)
+            self.assertEqual(self.commissions(), expected, seed)
+
+            if commission_engine.np is not None:
+                server.rebuild_commissions(2023, 12, 2024, 2, workers=1)
+                self.assertEqual(self.commissions(), expected, seed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,216 @@
+import os
+import random
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import server
+
+
+class CommissionRebuildTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_db = tempfile.NamedTemporaryFile(delete=False)
+        self.tmp_db.close()
+        server.DB_PATH = self.tmp_db.name
+        if os.path.exists(server.DB_PATH):
+            os.remove(server.DB_PATH)
+        server.init_database()
+
+        rng = random.Random(35)
+        conn = server.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            'UPDATE commission_settings SET percentage = ?, monthly_max = ? WHERE id = 1',
+            (5, 150),
+        )
+        employee_ids = []
+        for name, has_commission in (('Anna', 1), ('Bernd', 1), ('Clara', 0)):
+            cursor.execute(
+                '''
+                    INSERT INTO employees (
+                        name, contract_hours, has_commission, is_active, start_date
+                    ) VALUES (?, ?, ?, ?, ?)
+                ''',
+                (name, 40, has_commission, 1, '2023-11-01'),
+            )
+            employee_ids.append(cursor.lastrowid)
+        for weekday in range(7):
+            for employee_count in (1, 2):
+                cursor.execute(
+                    'INSERT INTO commission_thresholds (weekday, employee_count, threshold, valid_from) '
+                    'VALUES (?, ?, ?, ?)',
+                    (weekday, employee_count, 800 * employee_count, '2023-01-01'),
+                )
+
+        day = server.date(2023, 11, 1)
+        while day < server.date(2024, 3, 1):
+            date_str = day.isoformat()
+            for employee_id in employee_ids:
+                if rng.random() < 0.7:
+                    start_hour = rng.choice([8, 9, 10])
+                    cursor.execute(
+                        '''
+                            INSERT INTO time_entries (
+                                employee_id, date, entry_type, start_time, end_time, pause_minutes,
+                                commission, duftreise_bis_18, duftreise_ab_18, notes
+                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ''',
+                        (
+                            employee_id, date_str, rng.choice(['work', 'work', 'work', 'vacation']),
+                            f'{start_hour:02d}:00', f'{start_hour + rng.choice([6, 8, 9]):02d}:30',
+                            rng.choice([0, 30, 45]), rng.choice([0, 12.5]), 0, 0, '',
+                        ),
+                    )
+            if rng.random() < 0.9:
+                cursor.execute(
+                    'INSERT INTO revenue (date, amount, notes) VALUES (?, ?, ?)',
+                    (date_str, rng.randrange(500, 3000), ''),
+                )
+            day += server.timedelta(days=1)
+        conn.commit()
+        conn.close()
+
+        server.SESSIONS['rebuild-admin'] = {'username': 'Admin', 'role': 'admin'}
+        self.client = server.app.test_client()
+        self.headers = {'Authorization': 'Bearer rebuild-admin'}
+
+    def tearDown(self):
+        server.SESSIONS.pop('rebuild-admin', None)
+        server.REBUILD_STATUS.clear()
+        server.REBUILD_STATUS['state'] = 'idle'
+        if os.path.exists(self.tmp_db.name):
+            os.remove(self.tmp_db.name)
+
+    def commissions(self):
+        conn = server.get_db_connection()
+        rows = conn.execute('SELECT id, commission FROM time_entries ORDER BY id').fetchall()
+        conn.close()
+        return {row['id']: row['commission'] for row in rows}
+
+    def sequential_reference(self):
+        """Zeitraum nullen und Tag für Tag mit compute_commission_for_date berechnen"""
+        conn = server.get_db_connection()
+        conn.execute("UPDATE time_entries SET commission = 0 WHERE date >= '2023-12-01'")
+        dates = [
+            row['date'] for row in conn.execute(
+                "SELECT DISTINCT date FROM time_entries WHERE date >= '2023-12-01' ORDER BY date"
+            )
+        ]
+        conn.commit()
+        conn.close()
+        for entry_date in dates:
+            server.compute_commission_for_date(entry_date)
+        return self.commissions()
+
+    def test_rebuild_matches_sequential_recompute(self):
+        progress = []
+        updated = server.rebuild_commissions(
+            2023, 12, 2024, 2, workers=2, progress=lambda done, total: progress.append((done, total))
+        )
+        rebuilt = self.commissions()
+
+        self.assertEqual(progress[-1], (3, 3))
+        self.assertGreater(updated, 0)
+        self.assertTrue(any(value > 0 for value in rebuilt.values()))
+        self.assertEqual(rebuilt, self.sequential_reference())
+
+        server.rebuild_commissions(2023, 12, 2024, 2, workers=1)
+        self.assertEqual(self.commissions(), rebuilt)
+
+    def rebuild_with_concurrent_write(self, write):
+        """Neuberechnung, bei der ``write`` läuft, nachdem Januar gelesen und bevor er geschrieben ist"""
+        evaluate = server.evaluate_month_commissions
+
+        def evaluate_then_write(month):
+            result = evaluate(month)
+            if month['period'] == '2024-01' and not calls:
+                calls.append(month['period'])
+                write()
+            return result
+
+        calls = []
+        with mock.patch.object(server, 'evaluate_month_commissions', side_effect=evaluate_then_write):
+            server.rebuild_commissions(2023, 12, 2024, 2, workers=1)
+        self.assertEqual(calls, ['2024-01'])
+
+    def test_write_during_rebuild_is_not_overwritten(self):
+        self.sequential_reference()
+        conn = server.get_db_connection()
+        paid_day = conn.execute(
+            "SELECT date FROM time_entries WHERE date LIKE '2024-01-%' AND commission > 0 ORDER BY date LIMIT 1"
+        ).fetchone()
+        conn.close()
+
+        def write():
+            response = self.client.post(
+                '/api/revenue', json={'date': paid_day['date'], 'amount': 0}, headers=self.headers
+            )
+            self.assertEqual(response.status_code, 200)
+
+        self.rebuild_with_concurrent_write(write)
+        rebuilt = self.commissions()
+        # Januar wurde nach der Buchung neu berechnet statt mit dem alten Stand überschrieben
+        self.assertEqual(rebuilt, self.sequential_reference())
+
+    def test_rule_change_during_rebuild_is_not_overwritten(self):
+        def change_settings():
+            conn = server.get_db_connection()
+            conn.execute('UPDATE commission_settings SET percentage = 1 WHERE id = 1')
+            conn.commit()
+            conn.close()
+
+        self.rebuild_with_concurrent_write(change_settings)
+        rebuilt = self.commissions()
+        # Alle Monate wurden mit den neuen Regeln erneut berechnet
+        self.assertEqual(rebuilt, self.sequential_reference())
+
+    def test_month_closed_during_rebuild_keeps_frozen_commissions(self):
+        frozen = {}
+
+        def close_january():
+            # Abschluss mit geänderten Regeln: die Neuberechnung rechnet noch mit den alten
+            conn = server.get_db_connection()
+            conn.execute('UPDATE commission_settings SET percentage = 1 WHERE id = 1')
+            conn.commit()
+            conn.close()
+            response = self.client.post('/api/months/2024/1/close', headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            frozen.update(self.commissions())
+
+        self.rebuild_with_concurrent_write(close_january)
+        conn = server.get_db_connection()
+        january = conn.execute("SELECT id, commission FROM time_entries WHERE date LIKE '2024-01-%'").fetchall()
+        conn.close()
+        self.assertTrue(any(row['commission'] for row in january))
+        self.assertEqual({row['id']: row['commission'] for row in january},
+                         {row['id']: frozen[row['id']] for row in january})
+
+    def test_admin_endpoint_reports_progress(self):
+        response = self.client.post(
+            '/api/commission/rebuild', json={'from': '2024-02', 'to': '2023-12'}, headers=self.headers
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(
+            '/api/commission/rebuild', json={'from': '2023-12', 'to': '2024-02', 'workers': 1},
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.get_json()['months_total'], 3)
+
+        deadline = time.monotonic() + 30
+        status = {}
+        while time.monotonic() < deadline:
+            status = self.client.get('/api/commission/rebuild', headers=self.headers).get_json()
+            if status['state'] != 'running':
+                break
+            time.sleep(0.05)
+
+        self.assertEqual(status['state'], 'done')
+        self.assertEqual(status['months_done'], 3)
+        self.assertEqual(self.commissions(), self.sequential_reference())
+
+
+if __name__ == '__main__':
+    unittest.main()
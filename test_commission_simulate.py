@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+
+import server
+
+
+class CommissionSimulateTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_db = tempfile.NamedTemporaryFile(delete=False)
+        self.tmp_db.close()
+        server.DB_PATH = self.tmp_db.name
+        if os.path.exists(server.DB_PATH):
+            os.remove(server.DB_PATH)
+        server.init_database()
+
+        conn = server.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            'UPDATE commission_settings SET percentage = ?, monthly_max = ? WHERE id = 1',
+            (5, 1000),
+        )
+        for name in ('Anna', 'Bernd'):
+            cursor.execute(
+                '''
+                    INSERT INTO employees (
+                        name, contract_hours, has_commission, is_active, start_date
+                    ) VALUES (?, ?, ?, ?, ?)
+                ''',
+                (name, 40, 1, 1, '2024-01-01'),
+            )
+            employee_id = cursor.lastrowid
+            # Januar: 20 Tage à 8 Stunden, danach ist die 160-Stunden-Grenze erreicht
+            for day in range(2, 22):
+                self.insert_entry(cursor, employee_id, f'2024-01-{day:02d}')
+            for day in (5, 6, 7):
+                self.insert_entry(cursor, employee_id, f'2024-02-{day:02d}')
+            self.insert_entry(cursor, employee_id, '2024-03-04')
+        for entry_date in ('2024-02-05', '2024-02-06', '2024-02-07', '2024-03-04'):
+            cursor.execute('INSERT INTO revenue (date, amount, notes) VALUES (?, ?, ?)', (entry_date, 2000, ''))
+        conn.commit()
+        conn.close()
+        server.rebuild_commissions(2024, 1, 2024, 3, workers=1)
+
+        server.SESSIONS['simulate-admin'] = {'username': 'Admin', 'role': 'admin'}
+        self.client = server.app.test_client()
+        self.headers = {'Authorization': 'Bearer simulate-admin'}
+
+    def tearDown(self):
+        server.SESSIONS.pop('simulate-admin', None)
+        if os.path.exists(self.tmp_db.name):
+            os.remove(self.tmp_db.name)
+
+    @staticmethod
+    def insert_entry(cursor, employee_id, entry_date):
+        cursor.execute(
+            '''
+                INSERT INTO time_entries (
+                    employee_id, date, entry_type, start_time, end_time, pause_minutes,
+                    commission, duftreise_bis_18, duftreise_ab_18, notes
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''',
+            (employee_id, entry_date, 'work', '09:00', '17:00', 0, 0, 0, 0, ''),
+        )
+
+    def stored_commissions(self):
+        conn = server.get_db_connection()
+        rows = conn.execute('SELECT id, commission FROM time_entries ORDER BY id').fetchall()
+        conn.close()
+        return [(row['id'], row['commission']) for row in rows]
+
+    def simulate(self, payload):
+        return self.client.post('/api/commission/simulate', json=payload, headers=self.headers)
+
+    def test_current_rules_reproduce_stored_values(self):
+        result = self.simulate({'from': '2024-01', 'to': '2024-03'}).get_json()
+        self.assertEqual(result['total'], {'current': 400.0, 'simulated': 400.0, 'difference': 0.0})
+        self.assertEqual([month['current'] for month in result['months']], [0.0, 300.0, 100.0])
+
+    def test_candidate_settings_and_thresholds_without_writing(self):
+        before = self.stored_commissions()
+
+        response = self.simulate({
+            'from': '2024-02',
+            'to': '2024-03',
+            'settings': {'percentage': 10, 'monthly_max': 120},
+        })
+        self.assertEqual(response.status_code, 200)
+        result = response.get_json()
+        # Je Tag 200 € für zwei Personen, das Maximum deckelt Februar bei 120 € je Person
+        self.assertEqual(
+            [(month['period'], month['simulated'], month['difference']) for month in result['months']],
+            [('2024-02', 240.0, -60.0), ('2024-03', 200.0, 100.0)],
+        )
+        self.assertEqual(
+            [(item['name'], item['current'], item['simulated']) for item in result['employees']],
+            [('Anna', 200.0, 220.0), ('Bernd', 200.0, 220.0)],
+        )
+
+        response = self.simulate({
+            'from': '2024-02',
+            'to': '2024-03',
+            'thresholds': [{'weekday': weekday, 'employee_count': 2, 'threshold': 2500} for weekday in range(7)],
+        })
+        self.assertEqual(response.get_json()['total']['simulated'], 0)
+
+        self.assertEqual(self.stored_commissions(), before)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.simulate({'from': '2024-02'}).status_code, 400)
+        response = self.simulate({'from': '2024-02', 'to': '2024-03', 'thresholds': [{'weekday': 9, 'employee_count': 1}]})
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
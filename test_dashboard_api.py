@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+
+import server
+
+
+class DashboardApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_db = tempfile.NamedTemporaryFile(delete=False)
+        self.tmp_db.close()
+        server.DB_PATH = self.tmp_db.name
+        if os.path.exists(server.DB_PATH):
+            os.remove(server.DB_PATH)
+        server.init_database()
+
+        conn = server.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            'UPDATE commission_settings SET percentage = ?, monthly_max = ? WHERE id = 1',
+            (10, 1000),
+        )
+        self.employee_ids = {}
+        for name, has_commission in (('Anna', 1), ('Bernd', 0)):
+            cursor.execute(
+                '''
+                    INSERT INTO employees (
+                        name, contract_hours, has_commission, is_active, start_date
+                    ) VALUES (?, ?, ?, ?, ?)
+                ''',
+                (name, 40, has_commission, 1, '2024-01-01'),
+            )
+            self.employee_ids[name] = cursor.lastrowid
+
+        # 2024-05-15 ist ein Mittwoch, die Woche beginnt am 13.05.
+        rows = [
+            ('Anna', '2024-05-02', 'work', '09:00', '17:00', 0, 20),
+            ('Anna', '2024-05-13', 'work', '09:00', '13:00', 0, 5),
+            ('Anna', '2024-05-15', 'work', '10:00', '18:00', 60, 7.5),
+            ('Anna', '2024-05-20', 'work', '09:00', '12:00', 0, 3),
+            ('Bernd', '2024-05-15', 'vacation', None, None, 0, 0),
+            ('Bernd', '2024-04-30', 'work', '09:00', '17:00', 0, 0),
+        ]
+        for name, entry_date, entry_type, start_time, end_time, pause, commission in rows:
+            cursor.execute(
+                '''
+                    INSERT INTO time_entries (
+                        employee_id, date, entry_type, start_time, end_time, pause_minutes,
+                        commission, duftreise_bis_18, duftreise_ab_18, notes
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''',
+                (self.employee_ids[name], entry_date, entry_type, start_time, end_time, pause, commission, 0, 0, ''),
+            )
+        cursor.execute('INSERT INTO revenue (date, amount, notes) VALUES (?, ?, ?)', ('2024-05-02', 900, ''))
+        cursor.execute('INSERT INTO revenue (date, amount, notes) VALUES (?, ?, ?)', ('2024-05-15', 1500, ''))
+        cursor.execute(
+            'INSERT INTO commission_thresholds (weekday, employee_count, threshold, valid_from) VALUES (?, ?, ?, ?)',
+            (2, 1, 1200, '2024-01-01'),
+        )
+        conn.commit()
+        conn.close()
+
+        server.SESSIONS['dashboard-admin'] = {'username': 'Admin', 'role': 'admin'}
+        self.client = server.app.test_client()
+        self.headers = {'Authorization': 'Bearer dashboard-admin'}
+
+    def tearDown(self):
+        server.SESSIONS.pop('dashboard-admin', None)
+        if os.path.exists(self.tmp_db.name):
+            os.remove(self.tmp_db.name)
+
+    def test_dashboard_aggregates_week_month_and_today(self):
+        response = self.client.get('/api/dashboard?date=2024-05-15', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        stats = response.get_json()
+
+        self.assertEqual(stats['week_start'], '2024-05-13')
+        self.assertEqual(stats['active_employees'], 2)
+        self.assertEqual(stats['hours_week'], 11.0)
+        self.assertEqual(stats['hours_month'], 22.0)
+        self.assertEqual(stats['commission_mtd'], 32.5)
+
+        anna = next(item for item in stats['employees'] if item['name'] == 'Anna')
+        bernd = next(item for item in stats['employees'] if item['name'] == 'Bernd')
+        self.assertEqual((anna['hours_week'], anna['hours_month'], anna['commission_mtd']), (11.0, 22.0, 32.5))
+        self.assertEqual((bernd['hours_week'], bernd['hours_month']), (0, 0))
+
+        self.assertEqual(
+            [(item['name'], item['entry_type']) for item in stats['staffing_today']],
+            [('Anna', 'work'), ('Bernd', 'vacation')],
+        )
+        self.assertEqual(
+            stats['revenue_today'],
+            {'amount': 1500, 'threshold': 1200, 'commission_employees': 1, 'threshold_met': True},
+        )
+        self.assertEqual(stats['revenue_month_to_date'], 2400)
+
+    def test_invalid_date(self):
+        response = self.client.get('/api/dashboard?date=15.05.2024', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
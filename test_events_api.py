@@ -0,0 +1,100 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import server
+
+
+class EventsApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        server.DB_PATH = os.path.join(self.tmp_dir, 'zeiterfassung.db')
+        server.init_database()
+
+        conn = server.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            'INSERT INTO employees (name, contract_hours, has_commission, is_active, start_date) '
+            'VALUES (?, ?, ?, ?, ?)',
+            ('Anna', 40, 1, 1, '2024-01-01'),
+        )
+        self.employee_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+
+        server.SESSIONS['events-admin'] = {'username': 'Admin', 'role': 'admin'}
+        self.client = server.app.test_client()
+        self.headers = {'Authorization': 'Bearer events-admin'}
+
+    def tearDown(self):
+        server.SESSIONS.pop('events-admin', None)
+        server.BROADCASTER.last_seq = None
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def read_event(self, chunks):
+        for chunk in chunks:
+            text = chunk.decode('utf-8')
+            if text.startswith('retry:') or text.startswith(':'):
+                continue
+            fields = dict(line.split(': ', 1) for line in text.strip().splitlines())
+            return fields['event'], json.loads(fields['data'])
+        return None
+
+    def test_write_is_pushed_to_open_stream(self):
+        response = self.client.get('/api/events', headers=self.headers, buffered=False)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        chunks = response.response
+        self.assertTrue(next(chunks).startswith(b'retry:'))
+
+        entry = {
+            'employee_id': self.employee_id, 'date': '2024-03-04', 'entry_type': 'work',
+            'start_time': '09:00', 'end_time': '17:00',
+        }
+        entry_id = self.client.post('/api/time-entries', json=entry, headers=self.headers).get_json()['id']
+
+        event_type, event = self.read_event(chunks)
+        self.assertEqual(event_type, 'change')
+        self.assertEqual(event['entity'], 'time_entries')
+        self.assertEqual(event['id'], entry_id)
+        self.assertEqual(event['date'], '2024-03-04')
+        self.assertEqual(event['row']['employee_id'], self.employee_id)
+        self.assertIn('commission', event['row'])
+
+        self.client.delete(f'/api/time-entries/{entry_id}', headers=self.headers)
+        event_type, event = self.read_event(chunks)
+        self.assertEqual((event['op'], event['row']), ('delete', None))
+
+        response.close()
+        self.assertFalse(server.BROADCASTER.has_subscribers())
+
+    def test_employee_update_is_pushed_with_row(self):
+        response = self.client.get('/api/events', headers=self.headers, buffered=False)
+        chunks = response.response
+        next(chunks)
+
+        employee = {
+            'name': 'Anna Berg', 'contract_hours': 30, 'has_commission': True,
+            'is_active': False, 'start_date': '2024-01-01',
+        }
+        response_put = self.client.put(f'/api/employees/{self.employee_id}', json=employee, headers=self.headers)
+        self.assertEqual(response_put.status_code, 200)
+
+        event_type, event = self.read_event(chunks)
+        self.assertEqual((event_type, event['entity'], event['op']), ('change', 'employees', 'update'))
+        self.assertEqual(event['row']['name'], 'Anna Berg')
+        self.assertEqual(event['row']['is_active'], 0)
+        self.assertEqual(set(event['row']), set(server.EMPLOYEE_FIELDS))
+        response.close()
+
+    def test_slow_subscriber_gets_resync(self):
+        broadcaster = server.ChangeBroadcaster(queue_size=2)
+        subscriber = broadcaster.subscribe()
+        broadcaster.publish([{'type': 'change', 'seq': seq} for seq in range(5)])
+        self.assertEqual(subscriber.get_nowait(), {'type': 'resync'})
+        self.assertTrue(subscriber.empty())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+import server
+
+
+class HttpResponsesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_db = tempfile.NamedTemporaryFile(delete=False)
+        self.tmp_db.close()
+        server.DB_PATH = self.tmp_db.name
+        if os.path.exists(server.DB_PATH):
+            os.remove(server.DB_PATH)
+        server.init_database()
+
+        conn = server.get_db_connection()
+        for index in range(60):
+            conn.execute(
+                'INSERT INTO employees (name, contract_hours, start_date) VALUES (?, ?, ?)',
+                (f'Mitarbeiterin {index}', 40, '2024-01-01'),
+            )
+        conn.commit()
+        conn.close()
+
+        server.SESSIONS['http-admin'] = {'username': 'Admin', 'role': 'admin'}
+        self.client = server.app.test_client()
+        self.headers = {'Authorization': 'Bearer http-admin'}
+
+    def tearDown(self):
+        server.SESSIONS.pop('http-admin', None)
+        if os.path.exists(self.tmp_db.name):
+            os.remove(self.tmp_db.name)
+
+    def test_json_is_gzip_compressed_when_accepted(self):
+        response = self.client.get('/api/employees', headers={**self.headers, 'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(len(json.loads(gzip.decompress(response.data))), 60)
+
+        response = self.client.get('/api/employees', headers=self.headers)
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(len(response.get_json()), 60)
+
+        response = self.client.get('/api/health', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_json_provider_falls_back_to_stdlib(self):
+        payload = {'name': 'Müller', 'values': [1, 2.5, None]}
+        fast = server.app.json.loads(server.app.json.dumps(payload))
+
+        original = server.orjson
+        server.orjson = None
+        try:
+            fallback = server.app.json.loads(server.app.json.dumps(payload))
+        finally:
+            server.orjson = original
+
+        self.assertEqual(fast, payload)
+        self.assertEqual(fallback, payload)
+
+    def test_static_assets_are_fingerprinted_and_cacheable(self):
+        response = self.client.get('/', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+        index_html = gzip.decompress(response.data).decode('utf-8')
+
+        fingerprinted = [
+            name for name in server.get_static_assets()
+            if name.startswith('app.') and name != 'app.js'
+        ]
+        self.assertEqual(len(fingerprinted), 1)
+        self.assertIn(f'src="/{fingerprinted[0]}"', index_html)
+
+        response = self.client.get(f'/{fingerprinted[0]}')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        etag = response.headers['ETag']
+
+        response = self.client.get(f'/{fingerprinted[0]}', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get('/sw.js')
+        self.assertIn(f'/{fingerprinted[0]}', response.get_data(as_text=True))
+
+        self.assertEqual(self.client.get('/server.py').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
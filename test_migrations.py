@@ -0,0 +1,154 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import server
+
+
+class MigrationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        server.DB_PATH = os.path.join(self.tmp_dir, 'zeiterfassung.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def user_version(self):
+        conn = sqlite3.connect(server.DB_PATH)
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        conn.close()
+        return version
+
+    def test_new_database_runs_all_migrations_once(self):
+        applied = server.init_database()
+        self.assertEqual(applied, [version for version, _, _ in server.MIGRATIONS])
+        self.assertEqual(self.user_version(), server.SCHEMA_VERSION)
+
+        conn = sqlite3.connect(server.DB_PATH)
+        self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        conn.close()
+
+        # Aktuelle Datenbank: keine Migration, nur die Versionsabfrage
+        statements = []
+        connect = sqlite3.connect
+
+        def traced_connect(*args, **kwargs):
+            conn = connect(*args, **kwargs)
+            conn.set_trace_callback(statements.append)
+            return conn
+
+        migrations = [(version, description, mock.Mock()) for version, description, _ in server.MIGRATIONS]
+        with mock.patch.object(server, 'MIGRATIONS', migrations), \
+                mock.patch.object(server.sqlite3, 'connect', side_effect=traced_connect):
+            self.assertEqual(server.init_database(), [])
+        for _, _, migrate in migrations:
+            migrate.assert_not_called()
+        self.assertEqual(statements, ['PRAGMA user_version'])
+
+    def test_unversioned_legacy_database_is_migrated(self):
+        conn = sqlite3.connect(server.DB_PATH)
+        conn.executescript('''
+            CREATE TABLE employees (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                contract_hours INTEGER NOT NULL,
+                has_commission BOOLEAN NOT NULL DEFAULT 0,
+                is_active BOOLEAN NOT NULL DEFAULT 1,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE TABLE commission_thresholds (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                weekday INTEGER NOT NULL,
+                employee_count INTEGER NOT NULL,
+                threshold REAL NOT NULL,
+                UNIQUE (weekday, employee_count)
+            );
+            INSERT INTO employees (name, contract_hours) VALUES ('Anna', 40);
+            INSERT INTO commission_thresholds (weekday, employee_count, threshold) VALUES (5, 2, 1800);
+        ''')
+        conn.close()
+
+        server.init_database()
+
+        conn = server.get_db_connection()
+        employee_columns = [row['name'] for row in conn.execute('PRAGMA table_info(employees)')]
+        threshold = dict(conn.execute('SELECT * FROM commission_thresholds').fetchone())
+        conn.close()
+        self.assertIn('start_date', employee_columns)
+        self.assertIn('end_date', employee_columns)
+        self.assertEqual(threshold['valid_from'], '1970-01-01')
+        self.assertEqual(threshold['threshold'], 1800)
+        self.assertEqual(self.user_version(), server.SCHEMA_VERSION)
+
+    def test_duplicate_time_entries_are_removed_before_unique_index(self):
+        with mock.patch.object(server, 'MIGRATIONS', server.MIGRATIONS[:7]), \
+                mock.patch.object(server, 'SCHEMA_VERSION', 7):
+            server.init_database()
+
+        conn = server.get_db_connection()
+        conn.executescript('''
+            UPDATE commission_settings SET percentage = 10, monthly_max = 1000 WHERE id = 1;
+            INSERT INTO employees (name, contract_hours, has_commission, start_date)
+                VALUES ('Anna', 40, 1, '2023-01-01');
+            INSERT INTO employees (name, contract_hours, has_commission, start_date)
+                VALUES ('Ben', 40, 1, '2023-01-01');
+            INSERT INTO archived_hours (employee_id, year, hours) VALUES (1, 2023, 200);
+            INSERT INTO archived_hours (employee_id, year, hours) VALUES (2, 2023, 200);
+            INSERT INTO revenue (date, amount) VALUES ('2024-03-04', 1000);
+            INSERT INTO time_entries (employee_id, date, entry_type, start_time, end_time, commission)
+                VALUES (1, '2024-03-04', 'work', '09:00', '17:00', 0);
+            INSERT INTO time_entries (employee_id, date, entry_type, start_time, end_time, commission)
+                VALUES (2, '2024-03-04', 'work', '09:00', '17:00', 0);
+            INSERT INTO time_entries (employee_id, date, entry_type, start_time, end_time, commission)
+                VALUES (1, '2024-03-04', 'work', '09:00', '17:00', 0);
+        ''')
+        conn.commit()
+        conn.close()
+        server.compute_commission_for_date('2024-03-04')
+
+        with self.assertLogs('server', 'WARNING') as logs:
+            self.assertEqual(server.init_database(), [8])
+
+        conn = server.get_db_connection()
+        rows = [tuple(row) for row in conn.execute(
+            'SELECT id, employee_id, commission FROM time_entries ORDER BY id'
+        )]
+        removed = [tuple(row) for row in conn.execute(
+            'SELECT id, employee_id, date, commission FROM time_entries_removed_duplicates'
+        )]
+        with self.assertRaises(sqlite3.IntegrityError):
+            conn.execute(
+                "INSERT INTO time_entries (employee_id, date, entry_type) VALUES (1, '2024-03-04', 'work')"
+            )
+        conn.close()
+        # Der älteste Eintrag bleibt, der entfernte ist gesichert, der Monat neu berechnet
+        self.assertEqual(removed, [(3, 1, '2024-03-04', 66.67)])
+        self.assertEqual(rows, [(1, 1, 50.0), (2, 2, 50.0)])
+        self.assertIn('time_entries_removed_duplicates', logs.output[0])
+        self.assertIn('2024-03', logs.output[-1])
+
+    def test_failed_migration_is_rolled_back(self):
+        server.init_database()
+
+        def broken(cursor):
+            cursor.execute('CREATE TABLE half_done (id INTEGER)')
+            raise RuntimeError('kaputt')
+
+        migrations = server.MIGRATIONS + [(server.SCHEMA_VERSION + 1, 'Defekt', broken)]
+        with mock.patch.object(server, 'MIGRATIONS', migrations), \
+                mock.patch.object(server, 'SCHEMA_VERSION', server.SCHEMA_VERSION + 1):
+            with self.assertRaises(RuntimeError):
+                server.init_database()
+
+        conn = sqlite3.connect(server.DB_PATH)
+        table = conn.execute("SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchone()
+        conn.close()
+        self.assertIsNone(table)
+        self.assertEqual(self.user_version(), server.SCHEMA_VERSION)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import server
+
+
+class MonthCloseTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        server.DB_PATH = os.path.join(self.tmp_dir, 'zeiterfassung.db')
+        server.init_database()
+
+        conn = server.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('UPDATE commission_settings SET percentage = ?, monthly_max = ? WHERE id = 1', (10, 1000))
+        cursor.execute(
+            'INSERT INTO employees (name, contract_hours, has_commission, is_active, start_date) '
+            'VALUES (?, ?, ?, ?, ?)',
+            ('Anna', 40, 1, 1, '2024-01-01'),
+        )
+        self.employee_id = cursor.lastrowid
+        # 20 Tage à 8 Stunden: die 160-Stunden-Grenze wird am 20.01. erreicht
+        for day in range(1, 22):
+            cursor.execute(
+                '''
+                    INSERT INTO time_entries (
+                        employee_id, date, entry_type, start_time, end_time, pause_minutes,
+                        commission, duftreise_bis_18, duftreise_ab_18, notes
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''',
+                (self.employee_id, f'2024-01-{day:02d}', 'work', '09:00', '17:00', 0, 0, 1, 0, ''),
+            )
+        cursor.execute('INSERT INTO revenue (date, amount, notes) VALUES (?, ?, ?)', ('2024-01-20', 500, ''))
+        cursor.execute('INSERT INTO revenue (date, amount, notes) VALUES (?, ?, ?)', ('2024-01-21', 300, ''))
+        conn.commit()
+        conn.close()
+
+        server.SESSIONS['close-admin'] = {'username': 'Admin', 'role': 'admin'}
+        self.client = server.app.test_client()
+        self.headers = {'Authorization': 'Bearer close-admin'}
+
+    def tearDown(self):
+        server.SESSIONS.pop('close-admin', None)
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_closed_month_is_served_from_snapshot(self):
+        response = self.client.post('/api/months/2024/1/close', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        status = response.get_json()
+        self.assertTrue(status['closed'])
+        self.assertEqual(status['closed_by'], 'Admin')
+        self.assertEqual(len(status['checksum']), 64)
+
+        # Direkte Änderung der Livedaten darf die Berichte nicht mehr beeinflussen
+        conn = server.get_db_connection()
+        conn.execute("UPDATE time_entries SET commission = 999 WHERE date = '2024-01-20'")
+        conn.commit()
+        conn.close()
+
+        with mock.patch.object(server, 'compute_commission_for_date') as compute:
+            overview = self.client.get('/api/reports/overview/2024/1', headers=self.headers).get_json()
+            report = self.client.get(
+                f'/api/reports/monthly/{self.employee_id}/2024/1', headers=self.headers
+            ).get_json()
+            csv_body = self.client.get('/api/reports/overview/2024/1/export', headers=self.headers).data
+            pdf = self.client.get(
+                f'/api/reports/monthly/{self.employee_id}/2024/1/export/pdf', headers=self.headers
+            )
+        compute.assert_not_called()
+
+        self.assertEqual(overview['employees'][0]['summary']['total_commission'], 80)
+        self.assertEqual(overview['closed']['checksum'], status['checksum'])
+        self.assertEqual(report['summary']['total_commission'], 80)
+        self.assertIn(';80', csv_body.decode('utf-8'))
+        self.assertEqual(pdf.status_code, 200)
+
+    def test_closed_month_rejects_writes_until_reopened(self):
+        self.client.post('/api/months/2024/1/close', headers=self.headers)
+
+        entry = {
+            'employee_id': self.employee_id, 'date': '2024-01-22', 'entry_type': 'work',
+            'start_time': '09:00', 'end_time': '17:00',
+        }
+        response = self.client.post('/api/time-entries', json=entry, headers=self.headers)
+        self.assertEqual(response.status_code, 409)
+        response = self.client.post(
+            '/api/revenue', json={'date': '2024-01-21', 'amount': 800}, headers=self.headers
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.client.post('/api/months/2024/1/close', headers=self.headers).status_code, 409)
+
+        response = self.client.post('/api/months/2024/1/reopen', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.get_json()['closed'])
+        self.assertEqual(self.client.post('/api/months/2024/1/reopen', headers=self.headers).status_code, 404)
+
+        response = self.client.post(
+            '/api/revenue', json={'date': '2024-01-21', 'amount': 800}, headers=self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+        overview = self.client.get('/api/reports/overview/2024/1', headers=self.headers).get_json()
+        self.assertNotIn('closed', overview)
+        self.assertEqual(overview['employees'][0]['summary']['total_commission'], 130)
+
+    def test_tampered_snapshot_is_not_served(self):
+        server.close_month(2024, 1, closed_by='Admin')
+        conn = server.get_db_connection()
+        conn.execute("UPDATE month_snapshots SET payload = replace(payload, '\"commission\":50', '\"commission\":90')")
+        conn.commit()
+        conn.close()
+
+        response = self.client.get('/api/reports/overview/2024/1', headers=self.headers)
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('Prüfsumme', response.get_json()['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
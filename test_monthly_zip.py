@@ -0,0 +1,77 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+import server
+
+
+class MonthlyZipExportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        server.DB_PATH = os.path.join(self.tmp_dir, 'zeiterfassung.db')
+        server.init_database()
+
+        conn = server.get_db_connection()
+        cursor = conn.cursor()
+        for name, is_active in (('Anna', 1), ('Ben', 1), ('Carla', 0)):
+            cursor.execute(
+                'INSERT INTO employees (name, contract_hours, has_commission, is_active, start_date) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (name, 40, 0, is_active, '2024-01-01'),
+            )
+            cursor.execute(
+                'INSERT INTO time_entries (employee_id, date, entry_type, start_time, end_time, pause_minutes) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (cursor.lastrowid, '2024-05-02', 'work', '09:00', '17:00', 30),
+            )
+        # Inaktiv und ohne Einträge im Monat: kein PDF
+        cursor.execute(
+            'INSERT INTO employees (name, contract_hours, has_commission, is_active, start_date) '
+            'VALUES (?, ?, ?, ?, ?)',
+            ('Dora', 40, 0, 0, '2024-01-01'),
+        )
+        conn.commit()
+        conn.close()
+
+        server.SESSIONS['zip-admin'] = {'username': 'Admin', 'role': 'admin'}
+        server.SESSIONS['zip-employee'] = {'username': 'Anna', 'role': 'employee'}
+        self.client = server.app.test_client()
+
+    def tearDown(self):
+        server.SESSIONS.pop('zip-admin', None)
+        server.SESSIONS.pop('zip-employee', None)
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_zip_contains_one_pdf_per_employee(self):
+        with mock.patch.object(server, 'PDF_EXPORT_WORKERS', 2):
+            response = self.client.get(
+                '/api/reports/monthly/2024/5/export/zip', headers={'Authorization': 'Bearer zip-admin'}
+            )
+            self.assertTrue(response.is_streamed)
+            body = response.get_data()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/zip')
+        with zipfile.ZipFile(io.BytesIO(body)) as archive:
+            self.assertIsNone(archive.testzip())
+            names = sorted(archive.namelist())
+            self.assertEqual(names, [
+                'zeiterfassung_Anna_2024_05.pdf',
+                'zeiterfassung_Ben_2024_05.pdf',
+                'zeiterfassung_Carla_2024_05.pdf',
+            ])
+            self.assertTrue(archive.read(names[0]).startswith(b'%PDF'))
+
+    def test_zip_requires_admin(self):
+        response = self.client.get(
+            '/api/reports/monthly/2024/5/export/zip', headers={'Authorization': 'Bearer zip-employee'}
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
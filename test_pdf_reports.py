@@ -0,0 +1,39 @@
+import subprocess
+import sys
+import unittest
+from datetime import datetime
+
+import pdf_reports
+
+
+class PdfReportsTestCase(unittest.TestCase):
+    def test_server_import_does_not_load_reportlab(self):
+        probe = "import sys, server; print('reportlab' in sys.modules)"
+        output = subprocess.run(
+            [sys.executable, '-c', probe], capture_output=True, text=True, check=True
+        ).stdout
+        self.assertEqual(output.strip().splitlines()[-1], 'False')
+
+    def test_styles_are_built_once(self):
+        self.assertIs(pdf_reports.stylesheet(), pdf_reports.stylesheet())
+        self.assertIs(pdf_reports.table_style('range'), pdf_reports.table_style('range'))
+        self.assertIn('Metric', pdf_reports.stylesheet())
+
+        report = {
+            'from': '2024-01',
+            'to': '2024-02',
+            'employees': [{
+                'employee': {'name': 'Anna'},
+                'months': [{'year': 2024, 'month': 1, 'summary': {'total_hours': 8}}],
+                'summary': {'total_hours': 8},
+            }],
+        }
+        for _ in range(2):
+            pdf = pdf_reports.render_range_report(
+                report, 'Januar 2024 – Februar 2024', lambda year, month: f'{month}/{year}', datetime.now()
+            )
+            self.assertTrue(pdf.startswith(b'%PDF'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import os
+import tempfile
+import time
+import unittest
+
+import server
+
+
+class ReportsRangeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_db = tempfile.NamedTemporaryFile(delete=False)
+        self.tmp_db.close()
+        server.DB_PATH = self.tmp_db.name
+        if os.path.exists(server.DB_PATH):
+            os.remove(server.DB_PATH)
+        server.init_database()
+
+        conn = server.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            '''
+                INSERT INTO employees (
+                    name, contract_hours, has_commission, is_active, start_date
+                ) VALUES (?, ?, ?, ?, ?)
+            ''',
+            ('Range Employee', 40, 1, 1, '2024-01-01'),
+        )
+        self.employee_id = cursor.lastrowid
+
+        rows = [
+            ('2024-01-10', 'work', '08:00', '16:30', 30, 12.5, 1, 0, ''),
+            ('2024-01-11', 'vacation', None, None, 0, 0, 0, 0, ''),
+            ('2024-02-05', 'work', '09:00', '17:00', 60, 7.25, 0, 2, ''),
+            ('2024-02-06', 'sick', None, None, 0, 0, 0, 0, ''),
+            ('2024-03-01', 'work', '22:00', '02:00', 0, 0, 0, 0, ''),
+            ('2024-04-01', 'work', '08:00', '12:00', 0, 3, 0, 0, ''),
+        ]
+        for row in rows:
+            cursor.execute(
+                '''
+                    INSERT INTO time_entries (
+                        employee_id, date, entry_type, start_time, end_time, pause_minutes,
+                        commission, duftreise_bis_18, duftreise_ab_18, notes
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''',
+                (self.employee_id, *row),
+            )
+        conn.commit()
+        conn.close()
+
+        server.SESSIONS['range-admin'] = {'username': 'Admin', 'role': 'admin'}
+        self.client = server.app.test_client()
+        self.headers = {'Authorization': 'Bearer range-admin'}
+
+    def tearDown(self):
+        server.SESSIONS.pop('range-admin', None)
+        server.REBUILD_STATUS.clear()
+        server.REBUILD_STATUS['state'] = 'idle'
+        if os.path.exists(self.tmp_db.name):
+            os.remove(self.tmp_db.name)
+
+    def wait_for_rebuild(self):
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            status = self.client.get('/api/commission/rebuild', headers=self.headers).get_json()
+            if status['state'] != 'running':
+                return status
+            time.sleep(0.05)
+        self.fail('Neuberechnung nicht abgeschlossen')
+
+    def test_monthly_rollup_matches_month_summary(self):
+        report = server.get_range_report(2024, 1, 2024, 3)
+        self.assertEqual(len(report['employees']), 1)
+        months = report['employees'][0]['months']
+        self.assertEqual([(m['year'], m['month']) for m in months], [(2024, 1), (2024, 2), (2024, 3)])
+
+        for item in months:
+            entries = server.fetch_employee_month_entries(self.employee_id, item['year'], item['month'])
+            self.assertEqual(item['summary'], server.build_month_summary(entries, 40))
+
+        totals = report['employees'][0]['summary']
+        self.assertEqual(totals['total_hours'], 19.0)
+        self.assertEqual(totals['total_commission'], 19.75)
+        self.assertEqual(totals['work_days'], 3)
+        self.assertEqual(totals['vacation_days'], 1)
+        self.assertEqual(totals['sick_days'], 1)
+
+    def test_range_endpoint_validates_and_exports(self):
+        response = self.client.get('/api/reports/range?from=2024-05&to=2024-01', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(
+            f'/api/reports/range?from=2024-01&to=2024-12&employee_id={self.employee_id}',
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()['employees'][0]['months']), 12)
+
+        response = self.client.get('/api/reports/range/export?from=2024-01&to=2024-02', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        lines = response.get_data(as_text=True).strip().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[-1].startswith('Range Employee;Gesamt;'))
+
+    def test_rule_changes_keep_range_report_in_line_with_overview(self):
+        conn = server.get_db_connection()
+        conn.execute("INSERT INTO revenue (date, amount) VALUES ('2024-01-10', 2000)")
+        conn.execute(
+            'INSERT INTO archived_hours (employee_id, year, hours) VALUES (?, 2023, 200)', (self.employee_id,)
+        )
+        conn.commit()
+        conn.close()
+
+        def range_commissions():
+            report = server.get_range_report(2024, 1, 2024, 4)
+            return [item['summary']['total_commission'] for item in report['employees'][0]['months']]
+
+        def overview_commissions():
+            return [
+                server.get_month_overview(2024, month)['employees'][0]['summary']['total_commission']
+                for month in range(1, 5)
+            ]
+
+        changes = [
+            ('/api/commission-settings', {'percentage': 5, 'monthly_max': 1000}),
+            ('/api/commission-settings', {'percentage': 5, 'monthly_max': 40}),
+            ('/api/commission-thresholds', {
+                'weekday': 2, 'employee_count': 1, 'threshold': 2500, 'valid_from': '2024-01-01',
+            }),
+            ('/api/commission-thresholds', {
+                'weekday': 2, 'employee_count': 1, 'threshold': 1500, 'valid_from': '2024-01-01',
+            }),
+        ]
+        expected_range = []
+        for url, payload in changes:
+            response = self.client.post(url, json=payload, headers=self.headers)
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.get_json()['rebuild']['trigger'], 'rules')
+            self.assertEqual(self.wait_for_rebuild()['state'], 'done')
+            # Bereichsbericht zuerst: die Übersicht schreibt ihre Neuberechnung zurück
+            reported = range_commissions()
+            self.assertEqual(reported, overview_commissions())
+            expected_range.append(reported[0])
+        self.assertEqual(expected_range, [100.0, 40.0, 0, 40.0])
+
+        response = self.client.put(
+            f'/api/employees/{self.employee_id}',
+            json={'name': 'Range Employee', 'contract_hours': 40, 'has_commission': False,
+                  'start_date': '2024-01-01'},
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 202)
+        self.wait_for_rebuild()
+        self.assertEqual(range_commissions(), [0, 0, 0, 0])
+
+    def test_rule_change_during_running_rebuild_is_queued(self):
+        server.REBUILD_STATUS.update({'state': 'running'})
+        response = self.client.post(
+            '/api/commission-thresholds',
+            json={'weekday': 2, 'employee_count': 1, 'threshold': 0, 'valid_from': '2024-02-01'},
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.get_json()['rebuild']['pending_since'], '2024-02-01')
+        response = self.client.post(
+            '/api/commission-settings', json={'percentage': 5, 'monthly_max': 1000}, headers=self.headers
+        )
+        self.assertEqual(response.get_json()['rebuild']['pending_since'], '')
+        response = self.client.post(
+            '/api/commission/rebuild', json={'from': '2024-01', 'to': '2024-01'}, headers=self.headers
+        )
+        self.assertEqual(response.status_code, 409)
+
+        # Nach dem laufenden Auftrag wird der vorgemerkte Zeitraum berechnet
+        server._run_rebuild_job((2024, 4), (2024, 4), 1)
+        status = self.wait_for_rebuild()
+        self.assertEqual((status['state'], status['trigger'], status['from'], status['to']),
+                         ('done', 'rules', '2024-01', '2024-04'))
+        self.assertNotIn('pending_since', status)
+
+
+if __name__ == '__main__':
+    unittest.main()
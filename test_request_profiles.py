@@ -0,0 +1,76 @@
+import os
+import pstats
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+
+import server
+
+
+class RequestProfileTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        server.DB_PATH = os.path.join(self.tmp_dir, 'zeiterfassung.db')
+        self.original_profile_dir = server.PROFILE_DIR
+        server.PROFILE_DIR = os.path.join(self.tmp_dir, 'profiles')
+        server.init_database()
+
+        server.SESSIONS['profile-admin'] = {'username': 'Admin', 'role': 'admin'}
+        server.SESSIONS['profile-employee'] = {'username': 'Mitarbeiter', 'role': 'employee'}
+        self.client = server.app.test_client()
+        self.admin = {'Authorization': 'Bearer profile-admin'}
+        self.employee = {'Authorization': 'Bearer profile-employee'}
+
+    def tearDown(self):
+        server.SESSIONS.pop('profile-admin', None)
+        server.SESSIONS.pop('profile-employee', None)
+        server.PROFILE_DIR = self.original_profile_dir
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def get(self, url, headers):
+        response = self.client.get(url, headers=headers)
+        response.close()
+        return response
+
+    def test_profiled_request_is_stored_and_downloadable(self):
+        response = self.get('/api/reports/overview/2024/1?profile=1', self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(tracemalloc.is_tracing())
+
+        profiles = self.get('/api/profiles', self.admin).get_json()['profiles']
+        self.assertEqual(len(profiles), 1)
+        profile = profiles[0]
+        self.assertEqual(profile['path'], '/api/reports/overview/2024/1')
+        self.assertEqual(profile['query'], {})
+        self.assertEqual(profile['user'], 'Admin')
+        self.assertEqual(profile['status'], 200)
+        self.assertNotIn('allocations', profile)
+
+        details = self.get(f"/api/profiles/{profile['id']}", self.admin).get_json()
+        self.assertTrue(details['allocations'])
+        self.assertGreater(details['peak_memory_bytes'], 0)
+
+        response = self.get(f"/api/profiles/{profile['id']}/pstats", self.admin)
+        self.assertEqual(response.status_code, 200)
+        stats_path = os.path.join(self.tmp_dir, 'download.pstats')
+        with open(stats_path, 'wb') as handle:
+            handle.write(response.data)
+        functions = {name for _, _, name in pstats.Stats(stats_path).stats}
+        self.assertIn('get_month_overview', functions)
+
+    def test_profiling_requires_switch_and_admin(self):
+        self.get('/api/reports/overview/2024/1', self.admin)
+        self.get('/api/dashboard', {**self.employee, 'X-Profile': '1'})
+        self.assertFalse(os.path.exists(server.PROFILE_DIR))
+
+        self.get('/api/dashboard', {**self.admin, 'X-Profile': '1'})
+        self.assertEqual(len(os.listdir(server.PROFILE_DIR)), 2)
+
+        self.assertEqual(self.get('/api/profiles', self.employee).status_code, 403)
+        self.assertEqual(self.get('/api/profiles/../server/pstats', self.admin).status_code, 404)
+        self.assertEqual(self.get('/api/profiles/20240101_000000_000000', self.admin).status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+import os
+import tempfile
+import unittest
+
+import server
+
+
+class TimeEntriesApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_db = tempfile.NamedTemporaryFile(delete=False)
+        self.tmp_db.close()
+        server.DB_PATH = self.tmp_db.name
+        if os.path.exists(server.DB_PATH):
+            os.remove(server.DB_PATH)
+        server.init_database()
+
+        conn = server.get_db_connection()
+        cursor = conn.cursor()
+        self.employee_ids = []
+        for name in ('Anna', 'Bernd'):
+            cursor.execute(
+                '''
+                    INSERT INTO employees (
+                        name, contract_hours, has_commission, is_active, start_date
+                    ) VALUES (?, ?, ?, ?, ?)
+                ''',
+                (name, 40, 0, 1, '2024-01-01'),
+            )
+            self.employee_ids.append(cursor.lastrowid)
+
+        for day in range(1, 29):
+            for employee_id in self.employee_ids:
+                cursor.execute(
+                    '''
+                        INSERT INTO time_entries (
+                            employee_id, date, entry_type, start_time, end_time, pause_minutes,
+                            commission, duftreise_bis_18, duftreise_ab_18, notes
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''',
+                    (employee_id, f'2024-02-{day:02d}', 'work', '09:00', '17:00', 30, 0, 0, 0, 'Notiz'),
+                )
+        conn.commit()
+        conn.close()
+
+        server.SESSIONS['entries-admin'] = {'username': 'Admin', 'role': 'admin'}
+        self.client = server.app.test_client()
+        self.headers = {'Authorization': 'Bearer entries-admin'}
+
+    def tearDown(self):
+        server.SESSIONS.pop('entries-admin', None)
+        if os.path.exists(self.tmp_db.name):
+            os.remove(self.tmp_db.name)
+
+    def test_keyset_pagination_walks_all_entries_once(self):
+        seen = []
+        url = '/api/time-entries?from=2024-02-05&to=2024-02-20&limit=7'
+        while url:
+            response = self.client.get(url, headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            page = response.get_json()
+            self.assertLessEqual(len(page), 7)
+            seen.extend((entry['date'], entry['id']) for entry in page)
+            next_cursor = response.headers.get('X-Next-Cursor')
+            url = (
+                f'/api/time-entries?from=2024-02-05&to=2024-02-20&limit=7&cursor={next_cursor}'
+                if next_cursor else None
+            )
+
+        self.assertEqual(len(seen), 32)
+        self.assertEqual(len(set(seen)), 32)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_default_cap_and_invalid_cursor(self):
+        original_limit = server.TIME_ENTRIES_DEFAULT_LIMIT
+        server.TIME_ENTRIES_DEFAULT_LIMIT = 10
+        try:
+            response = self.client.get('/api/time-entries', headers=self.headers)
+        finally:
+            server.TIME_ENTRIES_DEFAULT_LIMIT = original_limit
+        self.assertEqual(len(response.get_json()), 10)
+        self.assertIn('X-Next-Cursor', response.headers)
+
+        response = self.client.get('/api/time-entries?limit=100000', headers=self.headers)
+        self.assertEqual(len(response.get_json()), 56)
+
+        response = self.client.get('/api/time-entries?cursor=kaputt', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_field_projection_and_columnar_format(self):
+        response = self.client.get(
+            '/api/time-entries?employee_id=%d&year=2024&month=2&fields=start_time,end_time&format=columnar'
+            % self.employee_ids[0],
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 200)
+        payload = response.get_json()
+        self.assertEqual(payload['columns'], ['id', 'date', 'start_time', 'end_time'])
+        self.assertEqual(len(payload['rows']), 28)
+        self.assertEqual(payload['rows'][0][1:], ['2024-02-28', '09:00', '17:00'])
+
+        response = self.client.get('/api/employees?fields=name&format=columnar', headers=self.headers)
+        self.assertEqual(response.get_json(), {'columns': ['id', 'name'], 'rows': [[1, 'Anna'], [2, 'Bernd']]})
+
+        response = self.client.get('/api/revenue?fields=amount,passwort', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_expected_version_detects_conflicting_writes(self):
+        entry = {
+            'employee_id': self.employee_ids[0], 'date': '2024-02-05', 'entry_type': 'work',
+            'start_time': '10:00', 'end_time': '18:00', 'pause_minutes': 30,
+        }
+        response = self.client.post('/api/time-entries', json=dict(entry, expected_version=1), headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        entry_id, version = response.get_json()['id'], response.get_json()['version']
+        self.assertEqual(version, 2)
+
+        # Zweiter Client arbeitet noch mit Version 1
+        response = self.client.put(
+            f'/api/time-entries/{entry_id}', json=dict(entry, notes='alt', expected_version=1), headers=self.headers
+        )
+        self.assertEqual(response.status_code, 409)
+        response = self.client.delete(f'/api/time-entries/{entry_id}?expected_version=1', headers=self.headers)
+        self.assertEqual(response.status_code, 409)
+
+        # Neu berechnete Provisionen erhöhen die Version nicht
+        conn = server.get_db_connection()
+        conn.execute('UPDATE time_entries SET commission = 12 WHERE id = ?', (entry_id,))
+        conn.commit()
+        conn.close()
+        response = self.client.put(
+            f'/api/time-entries/{entry_id}', json=dict(entry, notes='neu', expected_version=2), headers=self.headers
+        )
+        self.assertEqual(response.get_json()['version'], 3)
+
+        response = self.client.post(
+            '/api/time-entries', json=dict(entry, date='2024-02-29', expected_version=0), headers=self.headers
+        )
+        self.assertEqual(response.get_json()['version'], 1)
+        response = self.client.post(
+            '/api/time-entries', json=dict(entry, date='2024-02-29', expected_version=0), headers=self.headers
+        )
+        self.assertEqual(response.status_code, 409)
+        response = self.client.delete(f'/api/time-entries/{entry_id}?expected_version=3', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+
+        # Unbrauchbare Versionen sind Eingabefehler, auch im Batch
+        for expected_version in ('abc', [1], 1.5, True):
+            response = self.client.post(
+                '/api/time-entries', json=dict(entry, expected_version=expected_version), headers=self.headers
+            )
+            self.assertEqual(response.status_code, 400, expected_version)
+        response = self.client.post('/api/batch', json={'operations': [
+            {'entity': 'time_entry', 'op': 'delete', 'id': 1, 'expected_version': 'abc'},
+        ]}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()['failed_index'], 0)
+
+    def test_malformed_write_is_rejected_and_releases_the_lock(self):
+        entry = {
+            'employee_id': self.employee_ids[0], 'date': '2024-02-05', 'entry_type': 'work',
+            'start_time': '10:00', 'end_time': '18:00', 'pause_minutes': 30,
+        }
+        for body in ({'employee_id': self.employee_ids[0]}, dict(entry, date='05.02.2024')):
+            response = self.client.post('/api/time-entries', json=body, headers=self.headers)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Ungültige Daten', response.get_json()['error'])
+        response = self.client.put('/api/time-entries/1', json=dict(entry, date='kein Datum'), headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+        # Die Transaktion ist zurückgerollt: ein anderer Schreibender bekommt die Sperre sofort
+        conn = server.sqlite3.connect(server.DB_PATH, timeout=0)
+        conn.execute('BEGIN IMMEDIATE')
+        conn.rollback()
+        conn.close()
+        response = self.client.post('/api/time-entries', json=entry, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()